@@ -3,4 +3,10 @@ from .models import *
 
 admin.site.register(Board)
 admin.site.register(Card)
-admin.site.register(CustomUser)
\ No newline at end of file
+admin.site.register(CustomUser)
+admin.site.register(BoardDailyStatistics)
+admin.site.register(OutgoingEmail)
+admin.site.register(AttachmentBlob)
+admin.site.register(AttachmentUpload)
+admin.site.register(BoardChange)
+admin.site.register(ArchivedCard)
@@ -0,0 +1,562 @@
+import base64
+import json
+from datetime import datetime
+from functools import wraps
+
+from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Q
+from django.http import JsonResponse
+from django.middleware.csrf import CsrfViewMiddleware, get_token
+from django.utils.dateparse import parse_datetime
+from django.views.decorators.csrf import csrf_exempt
+
+from .changes import get_changes, record_card_changes
+from .counters import record_card_counts
+from .imports import COLOR_PATTERN
+from .models import Board, Card, CustomUser
+from .permissions import accessible_boards
+from .ranking import free_rank, rank_between
+from .realtime import publish_card_events
+from .search import index_cards
+from .statistics import record_status_changes
+
+# Number of items returned per page when the client does not ask for a page size, and the largest page size
+API_DEFAULT_PAGE_SIZE = 100
+API_MAX_PAGE_SIZE = 1000
+
+# Largest number of cards created or updated by one bulk request
+API_MAX_BULK_SIZE = 1000
+
+# Fields of every resource that a client may request with ?fields=, and the database columns they are read from
+BOARD_FIELDS = {
+    'id': 'id',
+    'title': 'title',
+    'description': 'description',
+    'slug': 'slug',
+    'color': 'color',
+    'owner': 'owner__username',
+    'version': 'version',
+}
+
+CARD_FIELDS = {
+    'id': 'id',
+    'board': 'board_id',
+    'title': 'title',
+    'description': 'description',
+    'status': 'status',
+    'priority': 'priority',
+    'color': 'color',
+    'rank': 'rank',
+    'creator': 'creator__username',
+    'attachment': 'attachment',
+    'create_datetime': 'create_datetime',
+    'update_datetime': 'update_datetime',
+}
+
+MEMBER_FIELDS = {
+    'id': 'id',
+    'username': 'username',
+    'first_name': 'first_name',
+    'last_name': 'last_name',
+}
+
+# Card fields a client may set when creating or updating cards
+WRITABLE_CARD_FIELDS = ('title', 'description', 'status', 'priority', 'color')
+
+# Change log actions after which the object is no longer on the board, sent without its data
+REMOVAL_ACTIONS = ('DELETED', 'ARCHIVED', 'REMOVED')
+
+STATUS_VALUES = {status for status, _ in Card.STATUS_CHOICES}
+PRIORITY_VALUES = {priority for priority, _ in Card.PRIORITY_CHOICES}
+
+
+class APIError(Exception):
+    """
+    Raised by the API views to answer with a JSON error message.
+    """
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+def _response(data, status=200):
+    return JsonResponse(data, status=status, encoder=DjangoJSONEncoder)
+
+
+def _csrf_failed(request):
+    """
+    Returns whether a write request fails the CSRF check of the session authentication.
+
+    The check is the one of CsrfViewMiddleware, run here so that a failure is answered with a JSON error.
+    """
+
+    return CsrfViewMiddleware(lambda request: None).process_view(request, None, (), {}) is not None
+
+
+def api_view(methods):
+    """
+    Turns a function into an API view accepting the given HTTP methods from logged in users.
+
+    API errors and unsupported methods are answered with a JSON error message instead of an HTML page, and
+    anonymous requests get a 401 response instead of a redirect to the sign in page. Requests are authenticated
+    by the session cookie, so writes have to send the CSRF token of the 'csrftoken' cookie, which every GET
+    request sets, in the X-CSRFToken header.
+
+    Args:
+        methods (Iterable[str]): The accepted HTTP methods.
+
+    Returns:
+        function: The decorator.
+    """
+
+    def decorator(view):
+        # The CSRF check is run by the view itself to answer with a JSON error
+        @csrf_exempt
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if not request.user.is_authenticated:
+                return _response({'status': 'error', 'message': 'Authentication required'}, status=401)
+            if request.method not in methods:
+                return _response({'status': 'error', 'message': 'Method not allowed'}, status=405)
+
+            if request.method == 'GET':
+                # Send the CSRF cookie that the writes of the client will need
+                get_token(request)
+            elif _csrf_failed(request):
+                return _response({'status': 'error', 'message': 'CSRF token missing or incorrect'}, status=403)
+            elif request.content_type != 'application/json':
+                return _response({'status': 'error', 'message': 'Expected a JSON body'}, status=415)
+
+            try:
+                return view(request, *args, **kwargs)
+            except APIError as error:
+                return _response({'status': 'error', 'message': error.message}, status=error.status)
+
+        return wrapper
+
+    return decorator
+
+
+def _board(user, board_id):
+    """
+    Returns a board the user has access to, or raises a 404 API error.
+    """
+
+    board = accessible_boards(user).filter(id=board_id).first()
+    if board is None:
+        raise APIError('Board not found', status=404)
+    return board
+
+
+def _requested_fields(request, available):
+    """
+    Returns the fields requested with the 'fields' query parameter, or every available field.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+        available (dict): The available fields and their database columns.
+
+    Returns:
+        list: The names of the requested fields.
+    """
+
+    fields = [field for field in request.GET.get('fields', '').split(',') if field]
+    unknown = set(fields) - set(available)
+    if unknown:
+        raise APIError(f'Unknown fields: {", ".join(sorted(unknown))}')
+    return fields or list(available)
+
+
+def _encode_cursor(values):
+    # Datetimes keep their microseconds, which DjangoJSONEncoder would truncate
+    values = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+def _decode_cursor(cursor, key_fields):
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if not isinstance(values, list) or len(values) != len(key_fields):
+            raise ValueError
+        key = [parse_datetime(value) if field.endswith('datetime') else int(value)
+               for field, value in zip(key_fields, values)]
+        if None in key:
+            raise ValueError
+        return key
+    except (ValueError, TypeError):
+        raise APIError('Invalid cursor')
+
+
+def _item(row, columns):
+    """
+    Returns the API representation of a row read with values().
+
+    Args:
+        row (dict): The row, by database column.
+        columns (dict): The requested fields and their database columns.
+
+    Returns:
+        dict: The row by field name, with attachments as URLs.
+    """
+
+    item = {name: row[column] for name, column in columns.items()}
+    if item.get('attachment'):
+        item['attachment'] = default_storage.url(item['attachment'])
+    elif 'attachment' in item:
+        item['attachment'] = None
+    return item
+
+
+def _paginate(request, queryset, available, key_fields):
+    """
+    Returns one page of a queryset as plain dictionaries, using keyset pagination.
+
+    The rows are ordered by the key fields and a page starts right after the key of the last row of the previous
+    page, so every page costs one indexed query whatever its position. Only the requested fields are read.
+
+    Args:
+        request (HttpRequest): The HTTP request object, with the 'cursor', 'limit' and 'fields' query parameters.
+        queryset (QuerySet): The rows to paginate.
+        available (dict): The fields a client may request and their database columns.
+        key_fields (tuple): The unique ordering of the rows, e.g. ('create_datetime', 'id').
+
+    Returns:
+        dict: The 'results' of the page and the 'next_cursor' to request the next one, or None on the last page.
+    """
+
+    try:
+        limit = min(int(request.GET.get('limit', API_DEFAULT_PAGE_SIZE)), API_MAX_PAGE_SIZE)
+    except ValueError:
+        raise APIError('Invalid limit')
+    if limit < 1:
+        raise APIError('Invalid limit')
+
+    fields = _requested_fields(request, available)
+
+    cursor = request.GET.get('cursor')
+    if cursor:
+        key = _decode_cursor(cursor, key_fields)
+        if len(key_fields) == 1:
+            queryset = queryset.filter(**{f'{key_fields[0]}__gt': key[0]})
+        else:
+            queryset = queryset.filter(
+                Q(**{f'{key_fields[0]}__gt': key[0]}) | Q(**{key_fields[0]: key[0], f'{key_fields[1]}__gt': key[1]})
+            )
+
+    # Read one row more than the page size to know whether there is a next page
+    columns = {name: available[name] for name in fields}
+    rows = list(queryset.order_by(*key_fields).values(*{*key_fields, *columns.values()})[:limit + 1])
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = _encode_cursor([rows[-1][field] for field in key_fields])
+
+    results = [_item(row, columns) for row in rows]
+
+    return {'results': results, 'next_cursor': next_cursor}
+
+
+def _json_body(request):
+    try:
+        return json.loads(request.body)
+    except ValueError:
+        raise APIError('Invalid JSON body')
+
+
+def _card_items(data):
+    """
+    Returns the list of cards of a bulk request body, given either as a list or as {"cards": [...]}.
+    """
+
+    items = data.get('cards') if isinstance(data, dict) else data
+    if not isinstance(items, list) or not items:
+        raise APIError('Expected a non-empty list of cards')
+    if len(items) > API_MAX_BULK_SIZE:
+        raise APIError(f'At most {API_MAX_BULK_SIZE} cards can be sent at once')
+    if not all(isinstance(item, dict) for item in items):
+        raise APIError('Every card must be an object')
+    return items
+
+
+def _card_values(item, index, partial):
+    """
+    Validates the writable fields of a card sent in a bulk request.
+
+    Args:
+        item (dict): The card as sent by the client.
+        index (int): The position of the card in the request, for error messages.
+        partial (bool): Whether missing fields are allowed, as in updates.
+
+    Returns:
+        dict: The validated field values.
+    """
+
+    values = {field: item[field] for field in WRITABLE_CARD_FIELDS if field in item}
+
+    if not partial and not values.get('title'):
+        raise APIError(f'Card {index}: a title is required')
+    if 'title' in values and not (isinstance(values['title'], str) and 0 < len(values['title']) <= 150):
+        raise APIError(f'Card {index}: the title must be a string of 1 to 150 characters')
+    if 'description' in values and values['description'] is not None and not isinstance(values['description'], str):
+        raise APIError(f'Card {index}: the description must be a string')
+    if 'status' in values and values['status'] not in STATUS_VALUES:
+        raise APIError(f'Card {index}: invalid status')
+    if 'priority' in values and values['priority'] not in PRIORITY_VALUES:
+        raise APIError(f'Card {index}: invalid priority')
+    if 'color' in values and not (isinstance(values['color'], str) and COLOR_PATTERN.fullmatch(values['color'])):
+        raise APIError(f'Card {index}: the color must be a #RRGGBB color')
+
+    return values
+
+
+@api_view(['GET'])
+def boards(request):
+    """
+    Lists the boards the user owns or is a member of, ordered by ID.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+
+    Returns:
+        JsonResponse: A page of boards.
+    """
+
+    return _response(_paginate(request, accessible_boards(request.user), BOARD_FIELDS, ('id',)))
+
+
+@api_view(['GET'])
+def board(request, board_id):
+    """
+    Returns a board the user has access to.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+        board_id (int): The ID of the board.
+
+    Returns:
+        JsonResponse: The requested fields of the board.
+    """
+
+    columns = {field: BOARD_FIELDS[field] for field in _requested_fields(request, BOARD_FIELDS)}
+    row = accessible_boards(request.user).filter(id=board_id).values(*set(columns.values())).first()
+    if row is None:
+        raise APIError('Board not found', status=404)
+
+    return _response(_item(row, columns))
+
+
+@api_view(['GET'])
+def board_members(request, board_id):
+    """
+    Lists the owner and the members of a board, ordered by ID.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+        board_id (int): The ID of the board.
+
+    Returns:
+        JsonResponse: A page of users.
+    """
+
+    board = _board(request.user, board_id)
+    memberships = Board.users.through.objects.filter(board=board).values('customuser_id')
+    members = CustomUser.objects.filter(Q(id=board.owner_id) | Q(id__in=memberships))
+    return _response(_paginate(request, members, MEMBER_FIELDS, ('id',)))
+
+
+@api_view(['GET', 'POST', 'PATCH'])
+def board_cards(request, board_id):
+    """
+    Lists, creates or updates the cards of a board.
+
+    GET returns the cards ordered by creation, optionally filtered with ?status=. POST creates the cards of the
+    JSON body and PATCH updates them, each in a single query. The body is a list of cards, or {"cards": [...]};
+    the cards to update carry their "id".
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+        board_id (int): The ID of the board.
+
+    Returns:
+        JsonResponse: A page of cards, or the IDs of the created or updated cards.
+    """
+
+    board = _board(request.user, board_id)
+
+    if request.method == 'GET':
+        cards = Card.objects.filter(board=board)
+        status = request.GET.get('status')
+        if status:
+            if status not in STATUS_VALUES:
+                raise APIError('Invalid status')
+            cards = cards.filter(status=status)
+        return _response(_paginate(request, cards, CARD_FIELDS, ('create_datetime', 'id')))
+
+    items = _card_items(_json_body(request))
+
+    if request.method == 'POST':
+        cards = [
+            Card(board=board, creator=request.user, **_card_values(item, index, partial=False))
+            for index, item in enumerate(items)
+        ]
+
+        for card in cards:
+            card.update_done_datetime()
+
+        with transaction.atomic():
+            cards = Card.objects.bulk_create(cards)
+            index_cards(cards)
+            record_status_changes((board.id, None, card.status, None) for card in cards)
+            record_card_counts((board.id, None, card.status) for card in cards)
+            record_card_changes(cards, 'CREATED')
+
+            # Show the new cards to the users viewing the board
+            publish_card_events('created', cards)
+
+        return _response({'status': 'success', 'created': [card.id for card in cards]}, status=201)
+
+    # Validate every update before writing anything
+    updates = {}
+    for index, item in enumerate(items):
+        if not isinstance(item.get('id'), int):
+            raise APIError(f'Card {index}: an integer id is required')
+        updates[item['id']] = _card_values(item, index, partial=True)
+
+    with transaction.atomic():
+        cards = {card.id: card for card in Card.objects.select_for_update().filter(board=board, id__in=updates)}
+        missing = set(updates) - set(cards)
+        if missing:
+            raise APIError(f'Cards not found on this board: {", ".join(map(str, sorted(missing)))}', status=404)
+
+        changes = []
+        updated_fields = {'update_datetime', 'done_datetime'}
+        top_ranks = {}
+        for card_id, values in updates.items():
+            card = cards[card_id]
+            changes.append((board.id, card.status, values.get('status', card.status), card.done_datetime))
+            if values.get('status', card.status) != card.status:
+                # A card moved to another column goes to its top
+                status = values['status']
+                if status in top_ranks:
+                    card.rank = rank_between(None, top_ranks[status])
+                else:
+                    card.rank = free_rank(board.id, status, exclude_ids=updates)
+                top_ranks[status] = card.rank
+                updated_fields.add('rank')
+            for field, value in values.items():
+                setattr(card, field, value)
+            # bulk_update() runs neither the auto_now of the update datetime nor Card.save()
+            card.update_datetime = Card._meta.get_field('update_datetime').pre_save(card, add=False)
+            card.update_done_datetime(card.update_datetime)
+            updated_fields.update(values)
+
+        Card.objects.bulk_update(cards.values(), sorted(updated_fields))
+        index_cards(cards.values())
+        record_status_changes(changes)
+        record_card_counts((board_id, old_status, new_status) for board_id, old_status, new_status, _ in changes)
+        record_card_changes(cards.values(), 'UPDATED')
+
+        # Show the changes, including the new columns and ranks, to the users viewing the board
+        publish_card_events('edited', cards.values())
+
+    return _response({'status': 'success', 'updated': sorted(cards)})
+
+
+@api_view(['GET'])
+def board_changes(request, board_id):
+    """
+    Returns what changed on a board since a client last synced it.
+
+    The 'since' query parameter is the 'next_since' value of the previous response, or the 'version' of the board
+    for a client that has just loaded it. Created, updated and moved objects come with their current data and
+    should be stored as is, deleted or archived cards and removed members only with their ID. A rebalanced
+    column comes with the new ranks of all its cards by card ID. A 410 response means the changes have been
+    compacted away and the board must be loaded again.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+        board_id (int): The ID of the board.
+
+    Returns:
+        JsonResponse: The 'changes', the 'next_since' sequence number and whether more changes are waiting.
+    """
+
+    board = _board(request.user, board_id)
+
+    try:
+        since = int(request.GET['since'])
+        limit = min(int(request.GET.get('limit', API_MAX_PAGE_SIZE)), API_MAX_PAGE_SIZE)
+    except (KeyError, ValueError):
+        raise APIError('Expected integer since and limit parameters')
+    if since < 0 or limit < 1:
+        raise APIError('Expected integer since and limit parameters')
+    if since < board.change_log_floor:
+        raise APIError('The changes since this version are no longer available, reload the board', status=410)
+
+    changes, next_since, has_more = get_changes(board, since, limit)
+
+    # Read the current data of the changed objects with one query per object type
+    resources = {
+        'BOARD': (Board.objects.all(), BOARD_FIELDS),
+        'CARD': (Card.objects.filter(board=board), {
+            field: CARD_FIELDS[field] for field in _requested_fields(request, CARD_FIELDS)
+        }),
+        'MEMBER': (CustomUser.objects.all(), MEMBER_FIELDS),
+    }
+    data = {}
+    for object_type, (queryset, columns) in resources.items():
+        ids = [object_id for _, changed_type, object_id, action in changes
+               if changed_type == object_type and action not in REMOVAL_ACTIONS]
+        if ids:
+            rows = queryset.filter(id__in=ids).values('id', *set(columns.values()))
+            data.update({(object_type, row['id']): _item(row, columns) for row in rows})
+
+    # A rebalanced column comes with the ranks of all its cards, read with one query
+    statuses = [status for status, _ in Card.STATUS_CHOICES]
+    columns = {statuses[object_id] for _, changed_type, object_id, _ in changes if changed_type == 'COLUMN'}
+    if columns:
+        for status in columns:
+            data['COLUMN', statuses.index(status)] = {'status': status, 'ranks': {}}
+        rows = Card.objects.filter(board=board, status__in=columns).values_list('id', 'status', 'rank')
+        for card_id, status, rank in rows:
+            data['COLUMN', statuses.index(status)]['ranks'][card_id] = rank
+
+    results = []
+    for seq, object_type, object_id, action in changes:
+        change = {'seq': seq, 'type': object_type.lower(), 'action': action.lower(), 'id': object_id}
+        if action not in REMOVAL_ACTIONS:
+            change['data'] = data.get((object_type, object_id))
+            if change['data'] is None:
+                # The object has been deleted since, which a change after this page tells
+                continue
+        results.append(change)
+
+    return _response({'changes': results, 'next_since': next_since, 'has_more': has_more})
+
+
+@api_view(['GET'])
+def card(request, card_id):
+    """
+    Returns a card of a board the user has access to.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+        card_id (int): The ID of the card.
+
+    Returns:
+        JsonResponse: The requested fields of the card.
+    """
+
+    columns = {field: CARD_FIELDS[field] for field in _requested_fields(request, CARD_FIELDS)}
+    row = Card.objects.filter(
+        id=card_id, board__in=accessible_boards(request.user)
+    ).values(*set(columns.values())).first()
+    if row is None:
+        raise APIError('Card not found', status=404)
+
+    return _response(_item(row, columns))
@@ -0,0 +1,13 @@
+from django.apps import AppConfig
+from django.db.models.signals import post_migrate
+
+
+class BusyboardAppConfig(AppConfig):
+    name = 'busyboard_app'
+
+    def ready(self):
+        from . import signals
+        from .search import create_search_index
+
+        # Create the full-text search index of the cards once the tables exist
+        post_migrate.connect(create_search_index, sender=self)
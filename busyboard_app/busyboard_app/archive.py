@@ -0,0 +1,129 @@
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .changes import record_changes
+from .counters import record_card_counts
+from .models import ArchivedCard, Board, Card
+from .search import unindex_cards
+
+# Number of cards moved to the archive per transaction
+CARD_ARCHIVE_BATCH_SIZE = 500
+
+# Number of archived cards shown per page of the archive of a board
+ARCHIVE_PAGE_SIZE = 50
+
+
+def archive_board_cards(board_id, cutoff, batch_size=CARD_ARCHIVE_BATCH_SIZE):
+    """
+    Moves the cards of a board done before a datetime from the Card table to the ArchivedCard table.
+
+    Every batch is copied and deleted in its own transaction. The cards are deleted without the signals of a card
+    deletion: their attachments now belong to the archived cards, and their removal is recorded once per batch in
+    the search index and the change log of the board. The daily statistics are not touched, they keep counting the
+    archived cards.
+
+    Args:
+        board_id (int): The ID of the board.
+        cutoff (datetime): The cards done before this datetime are archived.
+        batch_size (int): The number of cards moved per transaction.
+
+    Returns:
+        int: The number of archived cards.
+    """
+
+    archived = 0
+    while True:
+        with transaction.atomic():
+            cards = list(
+                Card.objects.select_for_update()
+                .filter(board_id=board_id, status='DONE', done_datetime__lt=cutoff)
+                .order_by('done_datetime', 'id')[:batch_size]
+            )
+            if not cards:
+                return archived
+
+            ArchivedCard.objects.bulk_create([
+                ArchivedCard(
+                    id=card.id, board_id=card.board_id, title=card.title, description=card.description,
+                    creator_id=card.creator_id, priority=card.priority, attachment=card.attachment.name,
+                    attachment_filename=card.attachment_filename, color=card.color,
+                    create_datetime=card.create_datetime, update_datetime=card.update_datetime,
+                    done_datetime=card.done_datetime,
+                )
+                for card in cards
+            ])
+
+            card_ids = [card.id for card in cards]
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f'DELETE FROM {Card._meta.db_table} WHERE id IN ({", ".join(["%s"] * len(card_ids))})',
+                    card_ids,
+                )
+            unindex_cards(card_ids)
+            record_changes((board_id, 'CARD', card_id, 'ARCHIVED') for card_id in card_ids)
+            record_card_counts((board_id, 'DONE', None) for _ in card_ids)
+
+        archived += len(cards)
+
+
+def archive_done_cards(age_days=None, batch_size=CARD_ARCHIVE_BATCH_SIZE):
+    """
+    Moves the cards done for longer than an age to the archive, board by board.
+
+    Args:
+        age_days (int): The number of days a card has to be done for, settings.CARD_ARCHIVE_AFTER_DAYS by default.
+        batch_size (int): The number of cards moved per transaction.
+
+    Returns:
+        int: The number of archived cards.
+    """
+
+    if age_days is None:
+        age_days = settings.CARD_ARCHIVE_AFTER_DAYS
+    cutoff = timezone.now() - timedelta(days=age_days)
+
+    # The cards are read board by board, so that every query uses the board, status and done datetime index
+    return sum(
+        archive_board_cards(board_id, cutoff, batch_size)
+        for board_id in Board.objects.order_by('id').values_list('id', flat=True).iterator()
+    )
+
+
+def archived_cards_page(board, query=None, cursor=None, limit=ARCHIVE_PAGE_SIZE):
+    """
+    Returns a page of the archived cards of a board, the most recently completed first.
+
+    Args:
+        board (Board): The board.
+        query (str): Words that the title or the description of the cards must all contain, or None.
+        cursor (str): The cursor returned with the previous page, or None for the first page.
+        limit (int): The maximum number of cards of the page.
+
+    Returns:
+        tuple: The archived cards with their creators, and the cursor of the next page or None.
+
+    Raises:
+        ValueError: If the cursor is invalid.
+    """
+
+    cards = ArchivedCard.objects.filter(board=board).select_related('creator')
+
+    # The archive is not in the full-text index, its cards are searched by scanning the cards of the board
+    for word in (query or '').split():
+        cards = cards.filter(Q(title__icontains=word) | Q(description__icontains=word))
+
+    if cursor:
+        timestamp, card_id = cursor.rsplit(':', 1)
+        done_datetime, card_id = datetime.fromisoformat(timestamp), int(card_id)
+        cards = cards.filter(Q(done_datetime__lt=done_datetime) | Q(done_datetime=done_datetime, id__lt=card_id))
+
+    # Read by keyset on the board, done datetime and ID index, one card more to know whether there is a next page
+    cards = list(cards.order_by('-done_datetime', '-id')[:limit + 1])
+    if len(cards) > limit:
+        cards = cards[:limit]
+        return cards, f'{cards[-1].done_datetime.isoformat()}:{cards[-1].id}'
+    return cards, None
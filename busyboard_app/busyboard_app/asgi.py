@@ -2,6 +2,8 @@
 ASGI config for busyboard_app project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Serve it with an ASGI server (e.g. ``uvicorn busyboard_app.asgi:application``) to enable the real-time
+board updates, which need long-lived event streams.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
@@ -0,0 +1,332 @@
+import hashlib
+import os
+
+from django.conf import settings
+from django.core.files import File
+from django.core.exceptions import ValidationError
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, models as db_models, transaction
+from django.db.models.fields.files import FieldFile
+
+from . import models
+
+# Storage directory of the content-addressed attachment blobs
+BLOB_DIRECTORY = 'busyboard_app/blobs'
+
+# Number of bytes read at once while hashing a file
+HASH_READ_SIZE = 1024 * 1024
+
+# Number of times storing a blob is attempted when a concurrent upload or deletion of the same content conflicts
+STORE_ATTACHMENT_ATTEMPTS = 3
+
+# Largest chunk of a resumable upload, below the DATA_UPLOAD_MAX_MEMORY_SIZE limit of a request body
+ATTACHMENT_CHUNK_SIZE = 2 * 1024 * 1024
+
+
+def blob_name(digest, filename):
+    """
+    Returns the storage name of the blob of a file, derived from its content.
+
+    Args:
+        digest (str): The SHA-256 hex digest of the file content.
+        filename (str): The original name of the file, whose extension is kept so that the blob is served
+            with the right content type.
+
+    Returns:
+        str: The storage name of the blob.
+    """
+
+    extension = os.path.splitext(filename)[1].lower()[:10]
+    return f'{BLOB_DIRECTORY}/{digest[:2]}/{digest}{extension}'
+
+
+def file_digest(content):
+    """
+    Returns the SHA-256 hex digest of a file, reading it in chunks.
+
+    Args:
+        content (File): The file.
+
+    Returns:
+        str: The hex digest.
+    """
+
+    digest = hashlib.sha256()
+    content.seek(0)
+    for chunk in content.chunks(HASH_READ_SIZE):
+        digest.update(chunk)
+    content.seek(0)
+    return digest.hexdigest()
+
+
+def store_attachment(content, filename):
+    """
+    Stores a file as a content-addressed blob and takes a reference to it.
+
+    A file whose content is already stored is not written again, the existing blob gets one more reference. Only
+    the transaction that creates the blob row writes the file, concurrent uploads of the same content wait for it
+    on the unique digest and take a reference to it.
+
+    Args:
+        content (File): The file.
+        filename (str): The original name of the file.
+
+    Returns:
+        str: The storage name of the blob, to be saved in Card.attachment.
+    """
+
+    digest = file_digest(content)
+    name = blob_name(digest, filename)
+
+    for attempt in range(STORE_ATTACHMENT_ATTEMPTS):
+        try:
+            with transaction.atomic():
+                blob, created = models.AttachmentBlob.objects.select_for_update().get_or_create(
+                    sha256=digest, defaults={'name': name, 'size': content.size, 'ref_count': 1},
+                )
+                if not created:
+                    models.AttachmentBlob.objects.filter(id=blob.id).update(ref_count=db_models.F('ref_count') + 1)
+                    return blob.name
+
+                # A file left under the name, e.g. by a deleted blob whose file is about to be removed, is not
+                # overwritten, the storage picks a free name instead
+                blob.name = default_storage.save(name, content)
+                if blob.name != name:
+                    blob.save(update_fields=['name'])
+                return blob.name
+        except IntegrityError:
+            # The blob that prevented the insert has been deleted before it could be read, try again
+            if attempt == STORE_ATTACHMENT_ATTEMPTS - 1:
+                raise
+
+
+def release_attachment(name, blob_only=False):
+    """
+    Drops a reference to an attachment, deleting its file once no card uses it any more.
+
+    Attachments uploaded before the blob storage existed are not shared and are deleted right away.
+
+    Args:
+        name (str): The storage name of the attachment.
+        blob_only (bool): Whether the name always refers to a blob, so that a name without one is left alone
+            instead of being deleted from the storage.
+    """
+
+    if not name:
+        return
+
+    with transaction.atomic():
+        blob = models.AttachmentBlob.objects.select_for_update().filter(name=name).first()
+        if blob is None:
+            if not blob_only:
+                transaction.on_commit(lambda: default_storage.delete(name))
+            return
+
+        if blob.ref_count > 1:
+            models.AttachmentBlob.objects.filter(id=blob.id).update(ref_count=db_models.F('ref_count') - 1)
+            return
+
+        blob.delete()
+        transaction.on_commit(lambda: _delete_unused_blob_file(name))
+
+
+def _delete_unused_blob_file(name):
+    # The same content may have been stored again under the same name since the blob was deleted
+    if not models.AttachmentBlob.objects.filter(name=name).exists():
+        default_storage.delete(name)
+
+
+class BlobFieldFile(FieldFile):
+    """
+    File of a BlobFileField, stored as a shared content-addressed blob.
+    """
+
+    def save(self, name, content, save=True):
+        self.name = store_attachment(content, name)
+        setattr(self.instance, self.field.attname, self.name)
+        self._committed = True
+
+        # Remember the name the file was uploaded with, the blob name is made of its digest
+        if self.field.filename_field:
+            setattr(self.instance, self.field.filename_field, os.path.basename(name)[:255])
+
+        if save:
+            self.instance.save()
+
+    save.alters_data = True
+
+    def delete(self, save=True):
+        if not self:
+            return
+
+        release_attachment(self.name)
+        self.name = None
+        setattr(self.instance, self.field.attname, self.name)
+        self._committed = False
+
+        if self.field.filename_field:
+            setattr(self.instance, self.field.filename_field, '')
+
+        if save:
+            self.instance.save()
+
+    delete.alters_data = True
+
+
+class BlobFileField(db_models.FileField):
+    """
+    File field storing its files as content-addressed blobs, so that identical files share one stored copy.
+
+    Args:
+        filename_field (str): The name of the model field receiving the original name of the uploaded file.
+    """
+
+    attr_class = BlobFieldFile
+
+    def __init__(self, *args, filename_field=None, **kwargs):
+        self.filename_field = filename_field
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        if self.filename_field:
+            kwargs['filename_field'] = self.filename_field
+        return name, path, args, kwargs
+
+
+def start_upload(user, filename, size):
+    """
+    Starts a resumable attachment upload.
+
+    Args:
+        user (CustomUser): The uploading user.
+        filename (str): The name of the uploaded file.
+        size (int): The size of the file in bytes.
+
+    Returns:
+        AttachmentUpload: The upload, or None if the file name or size is not accepted.
+    """
+
+    filename = os.path.basename(filename or '').strip()[:255]
+    if not filename or not 0 < size <= settings.ATTACHMENT_MAX_SIZE:
+        return None
+    return models.AttachmentUpload.objects.create(user=user, filename=filename, size=size)
+
+
+def get_upload(user, upload_id, completed=False):
+    """
+    Returns an upload of a user.
+
+    Args:
+        user (CustomUser): The uploading user.
+        upload_id (str): The ID of the upload.
+        completed (bool): Whether only a completed upload is returned.
+
+    Returns:
+        AttachmentUpload: The upload, or None if the user has no such upload.
+    """
+
+    uploads = models.AttachmentUpload.objects.filter(user=user)
+    if completed:
+        uploads = uploads.exclude(attachment='')
+    try:
+        return uploads.filter(id=upload_id).first()
+    except ValidationError:
+        return None
+
+
+def upload_path(upload):
+    """
+    Returns the path of the temporary file receiving the chunks of an upload.
+
+    Args:
+        upload (AttachmentUpload): The upload.
+
+    Returns:
+        str: The path of the temporary file.
+    """
+
+    return os.path.join(settings.ATTACHMENT_UPLOAD_DIR, f'{upload.id}.part')
+
+
+def append_upload_chunk(upload, offset, stream, length):
+    """
+    Appends a chunk to an upload, if it starts where the received data ends.
+
+    Args:
+        upload (AttachmentUpload): The upload, locked for update.
+        offset (int): The position of the chunk in the file.
+        stream: The readable stream of the chunk.
+        length (int): The number of bytes of the chunk.
+
+    Returns:
+        bool: True if the chunk was appended, False if the offset does not match the received data.
+    """
+
+    if offset != upload.received or upload.received + length > upload.size:
+        return False
+
+    os.makedirs(settings.ATTACHMENT_UPLOAD_DIR, exist_ok=True)
+    with open(upload_path(upload), 'r+b' if upload.received else 'wb') as file:
+        # Drop the end of a chunk whose request was interrupted
+        file.seek(upload.received)
+        file.truncate()
+
+        remaining = length
+        while remaining:
+            data = stream.read(min(remaining, HASH_READ_SIZE))
+            if not data:
+                return False
+            file.write(data)
+            remaining -= len(data)
+
+    upload.received += length
+    upload.save(update_fields=['received', 'update_datetime'])
+    return True
+
+
+def complete_upload(upload):
+    """
+    Stores a fully received upload as a blob. The upload keeps the reference to the blob until a card takes it.
+
+    Args:
+        upload (AttachmentUpload): The upload, with every byte received.
+    """
+
+    with open(upload_path(upload), 'rb') as file:
+        upload.attachment = store_attachment(File(file), upload.filename)
+    upload.save(update_fields=['attachment', 'update_datetime'])
+    os.remove(upload_path(upload))
+
+
+def attach_upload(card, upload):
+    """
+    Attaches a completed upload to a card, replacing its previous attachment. The reference held by the upload
+    is handed over to the card.
+
+    Args:
+        card (Card): The card, saved by the caller.
+        upload (AttachmentUpload): The completed upload.
+    """
+
+    card.attachment.delete(save=False)
+    card.attachment = upload.attachment
+    card.attachment_filename = upload.filename
+    upload.delete()
+
+
+def discard_upload(upload):
+    """
+    Deletes an upload that will not be used, with its temporary file and its reference to a blob.
+
+    Only the paths generated for the upload are deleted: the temporary file, and the blob once no card uses it.
+
+    Args:
+        upload (AttachmentUpload): The upload.
+    """
+
+    if upload.attachment:
+        release_attachment(upload.attachment, blob_only=True)
+    if os.path.exists(upload_path(upload)):
+        os.remove(upload_path(upload))
+    upload.delete()
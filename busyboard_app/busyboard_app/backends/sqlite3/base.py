@@ -0,0 +1,35 @@
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.sqlite3 import base
+
+# Modes a transaction may be started in, see https://www.sqlite.org/lang_transaction.html
+TRANSACTION_MODES = ('DEFERRED', 'IMMEDIATE', 'EXCLUSIVE')
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    The SQLite backend of Django with the 'init_command' and 'transaction_mode' options of Django 5.1.
+
+    'init_command' holds SQL statements, separated by semicolons, run on every new connection, typically PRAGMA
+    statements. 'transaction_mode' is the mode atomic blocks start their transaction in. With 'IMMEDIATE', a
+    transaction takes the write lock when it begins, so concurrent writers wait for each other for the busy timeout
+    instead of failing with "database is locked" when a read turns into a write.
+    """
+
+    def get_connection_params(self):
+        kwargs = super().get_connection_params()
+        self.init_command = kwargs.pop('init_command', None)
+        self.transaction_mode = (kwargs.pop('transaction_mode', None) or 'DEFERRED').upper()
+        if self.transaction_mode not in TRANSACTION_MODES:
+            raise ImproperlyConfigured(f'The SQLite transaction_mode must be one of {", ".join(TRANSACTION_MODES)}.')
+        return kwargs
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        if self.init_command:
+            for statement in self.init_command.split(';'):
+                if statement.strip():
+                    conn.execute(statement)
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        self.cursor().execute(f'BEGIN {self.transaction_mode}')
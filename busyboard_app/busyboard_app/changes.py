@@ -0,0 +1,177 @@
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Exists, F, Max, OuterRef
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import Board, BoardChange
+
+# Number of days the changes of a board are kept once a newer change of the same object has not replaced them
+CHANGE_LOG_RETENTION_DAYS = 30
+
+# Number of change log entries deleted per query when compacting
+CHANGE_LOG_COMPACTION_BATCH_SIZE = 10000
+
+# Changes collected by the batched_changes() block being run, None outside of one
+_batched_changes = ContextVar('batched_changes', default=None)
+
+
+def record_changes(changes):
+    """
+    Appends changes to the change logs of their boards.
+
+    Every change brings its board to the next version, which is the sequence number of the change. The version is
+    incremented with an UPDATE that locks the board row until the transaction ends, so the changes of a board are
+    committed in the order of their sequence numbers and a client that synced up to a number never misses an
+    earlier one. Recording a change also invalidates the ETag of the board page, like etags.touch_boards().
+
+    Inside a batched_changes() block, the changes are only collected and appended when the block ends.
+
+    Args:
+        changes (Iterable[tuple]): (board_id, object_type, object_id, action) tuples, e.g.
+            (1, 'CARD', 42, 'UPDATED').
+    """
+
+    batch = _batched_changes.get()
+    if batch is not None:
+        batch.extend(changes)
+        return
+
+    changes_by_board = defaultdict(list)
+    for board_id, object_type, object_id, action in changes:
+        changes_by_board[board_id].append((object_type, object_id, action))
+
+    with transaction.atomic():
+        for board_id, board_changes in changes_by_board.items():
+            Board.objects.filter(id=board_id).update(version=F('version') + len(board_changes))
+            version = Board.objects.filter(id=board_id).values_list('version', flat=True).first()
+            if version is None:
+                # The board has been deleted
+                continue
+
+            first_seq = version - len(board_changes) + 1
+            BoardChange.objects.bulk_create([
+                BoardChange(board_id=board_id, seq=first_seq + index, object_type=object_type, object_id=object_id,
+                            action=action)
+                for index, (object_type, object_id, action) in enumerate(board_changes)
+            ])
+
+
+@contextmanager
+def batched_changes():
+    """
+    Collects the changes recorded inside the block, including those of the card signals, and appends them to the
+    change logs when it ends.
+
+    Every board of the batch gets one version UPDATE, one SELECT and one INSERT, instead of three queries per card
+    saved or per call. The block must run inside the transaction of the changes. Nested blocks add their changes to
+    the outermost one, and the changes of a block left with an exception are dropped along with its transaction.
+    """
+
+    if _batched_changes.get() is not None:
+        yield
+        return
+
+    changes = []
+    token = _batched_changes.set(changes)
+    try:
+        yield
+    finally:
+        _batched_changes.reset(token)
+    record_changes(changes)
+
+
+def record_card_changes(cards, action):
+    """
+    Appends the same change of several cards to the change logs of their boards.
+
+    Args:
+        cards (Iterable[Card]): The changed cards.
+        action (str): 'CREATED', 'UPDATED', 'MOVED' or 'DELETED'.
+    """
+
+    record_changes((card.board_id, 'CARD', card.id, action) for card in cards)
+
+
+def get_changes(board, since, limit):
+    """
+    Returns the changes of a board after a sequence number.
+
+    Only the last change of every object is returned, as the earlier ones are superseded by it.
+
+    Args:
+        board (Board): The board.
+        since (int): The sequence number of the last change the client knows of.
+        limit (int): The maximum number of change log entries to read.
+
+    Returns:
+        tuple: The changes as (seq, object_type, object_id, action) tuples ordered by sequence number, the sequence
+            number to sync from next time, and whether more changes are waiting.
+    """
+
+    entries = list(
+        BoardChange.objects.filter(board=board, seq__gt=since)
+        .order_by('seq')
+        .values_list('seq', 'object_type', 'object_id', 'action')[:limit + 1]
+    )
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+
+    latest = {}
+    for entry in entries:
+        latest.pop((entry[1], entry[2]), None)
+        latest[entry[1], entry[2]] = entry
+
+    return list(latest.values()), entries[-1][0] if entries else since, has_more
+
+
+def compact_changes(retention_days=CHANGE_LOG_RETENTION_DAYS):
+    """
+    Shrinks the change logs of all boards.
+
+    Changes replaced by a newer change of the same object are deleted, as a client syncing from before them gets
+    the newer one anyway. Changes older than the retention period are deleted too, and the change log floor of
+    their board is raised so that clients that last synced before them are told to reload the whole board.
+
+    Args:
+        retention_days (int): The number of days changes are kept.
+
+    Returns:
+        int: The number of deleted changes.
+    """
+
+    deleted = 0
+
+    newer = BoardChange.objects.filter(
+        board_id=OuterRef('board_id'), object_type=OuterRef('object_type'), object_id=OuterRef('object_id'),
+        seq__gt=OuterRef('seq'),
+    )
+    deleted += _delete_in_batches(BoardChange.objects.filter(Exists(newer)))
+
+    cutoff = timezone.now() - timedelta(days=retention_days)
+    expired = BoardChange.objects.filter(create_datetime__lt=cutoff)
+
+    # Raise the floors before deleting, so that no client syncs past a gap
+    floors = expired.values('board_id').annotate(last_seq=Max('seq')).values_list('board_id', 'last_seq')
+    for board_id, last_seq in floors:
+        Board.objects.filter(id=board_id).update(change_log_floor=Greatest('change_log_floor', last_seq))
+    deleted += _delete_in_batches(expired)
+
+    return deleted
+
+
+def _delete_in_batches(changes):
+    """
+    Deletes change log entries a batch at a time, so that a large compaction does not hold long locks.
+    """
+
+    deleted = 0
+    while True:
+        ids = list(changes.values_list('id', flat=True)[:CHANGE_LOG_COMPACTION_BATCH_SIZE])
+        if not ids:
+            return deleted
+        deleted += BoardChange.objects.filter(id__in=ids).delete()[0]
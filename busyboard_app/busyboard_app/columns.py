@@ -0,0 +1,84 @@
+from django.db.models import Q
+
+from .counters import CARD_COUNT_FIELDS
+from .models import Card
+from .search import add_search_highlights, filter_cards
+
+# Number of cards rendered per column on the board page and sent per page of a column afterwards
+COLUMN_PAGE_SIZE = 50
+
+
+def column_counts(board):
+    """
+    Returns the number of cards in every column of a board, read from the counters of the board.
+
+    Args:
+        board (Board): The board.
+
+    Returns:
+        dict: The number of cards by status.
+    """
+
+    return {status: getattr(board, field) for status, field in CARD_COUNT_FIELDS.items()}
+
+
+def encode_column_cursor(card):
+    """
+    Returns the cursor of the page of a column following a card.
+
+    The cursor holds the search rank of the card instead of its rank in the column when the card was read from
+    search results ranked by relevance.
+    """
+
+    if getattr(card, 'search_rank', None) is not None:
+        return f'{card.search_rank!r}:{card.id}'
+    return f'{card.rank}:{card.id}'
+
+
+def column_page(board, status, cursor=None, limit=COLUMN_PAGE_SIZE, query=None):
+    """
+    Returns a page of the cards of a board column, in the order of the column.
+
+    The cards are read by keyset on (rank, id) with the board, status and rank index, so every page costs the same
+    whatever its position in the column. With a search query, only the matching cards are read and they get their
+    search highlights. When the database ranks the results, they are ordered from the most to the least relevant
+    and paged by keyset on (search_rank, id) instead.
+
+    Args:
+        board (Board): The board.
+        status (str): The status of the column.
+        cursor (str): The cursor returned with the previous page, or None for the first page.
+        limit (int): The maximum number of cards of the page.
+        query (str): The search query the cards have to match, or None for every card of the column.
+
+    Returns:
+        tuple: The cards with their creators, and the cursor of the next page or None if this is the last one.
+
+    Raises:
+        ValueError: If the cursor is invalid.
+    """
+
+    cards = Card.objects.filter(board=board, status=status).select_related('creator')
+    if query:
+        cards = filter_cards(cards, query)
+
+    if 'search_rank' in cards.query.annotations:
+        # Keep the relevance order of the search, a lower search rank is more relevant
+        if cursor:
+            search_rank, card_id = cursor.split(':')
+            search_rank, card_id = float(search_rank), int(card_id)
+            cards = cards.filter(Q(search_rank__gt=search_rank) | Q(search_rank=search_rank, id__gt=card_id))
+        cards = cards.order_by('search_rank', 'id')
+    else:
+        if cursor:
+            rank, card_id = map(int, cursor.split(':'))
+            cards = cards.filter(Q(rank__gt=rank) | Q(rank=rank, id__gt=card_id))
+        cards = cards.order_by('rank', 'id')
+
+    # Read one card more than the page size to know whether there is a next page
+    cards = list(cards[:limit + 1])
+    add_search_highlights(cards)
+    if len(cards) > limit:
+        cards = cards[:limit]
+        return cards, encode_column_cursor(cards[-1])
+    return cards, None
@@ -0,0 +1,111 @@
+from collections import defaultdict
+
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from .models import Board, Card
+
+# Counter column of the board holding the number of its cards of every status
+CARD_COUNT_FIELDS = {
+    'TO_DO': 'todo_card_count',
+    'IN_PROGRESS': 'in_progress_card_count',
+    'DONE': 'done_card_count',
+}
+
+# Number of boards whose counters are repaired per query
+COUNTER_RECONCILE_BATCH_SIZE = 500
+
+
+def record_card_counts(changes):
+    """
+    Updates the card counters of the boards after cards have been created, moved or removed.
+
+    The changes are combined per board, so every board row is written once, with F() expressions that apply the
+    deltas in the database. The UPDATE locks the board row until the transaction ends, so concurrent changes never
+    overwrite each other's counts.
+
+    Args:
+        changes (Iterable[tuple]): (board_id, old_status, new_status) tuples, one per card. The old status is None
+            for a created card and the new status is None for a deleted or archived one.
+    """
+
+    deltas = defaultdict(lambda: defaultdict(int))
+    for board_id, old_status, new_status in changes:
+        if old_status == new_status:
+            continue
+        if old_status in CARD_COUNT_FIELDS:
+            deltas[board_id][CARD_COUNT_FIELDS[old_status]] -= 1
+        if new_status in CARD_COUNT_FIELDS:
+            deltas[board_id][CARD_COUNT_FIELDS[new_status]] += 1
+
+    for board_id, fields in deltas.items():
+        updates = {field: F(field) + delta for field, delta in fields.items() if delta}
+        if updates:
+            Board.objects.filter(id=board_id).update(**updates)
+
+
+def _member_count():
+    # Number of members of the board of the outer query
+    return Coalesce(
+        Subquery(
+            Board.users.through.objects.filter(board_id=OuterRef('id'))
+            .order_by().values('board_id').annotate(count=Count('*')).values('count'),
+            output_field=IntegerField(),
+        ),
+        Value(0),
+    )
+
+
+def _card_count(status):
+    # Number of cards of a status on the board of the outer query
+    return Coalesce(
+        Subquery(
+            Card.objects.filter(board_id=OuterRef('id'), status=status)
+            .order_by().values('board_id').annotate(count=Count('*')).values('count'),
+            output_field=IntegerField(),
+        ),
+        Value(0),
+    )
+
+
+def count_board_members(board_ids):
+    """
+    Recounts the members of boards after their memberships have changed.
+
+    The members are counted by the UPDATE itself on the index of the membership table, rather than adjusted by a
+    delta: the users passed to a removal are not necessarily members, so the number of removed rows is not known.
+
+    Args:
+        board_ids (Iterable[int]): The IDs of the boards.
+    """
+
+    Board.objects.filter(id__in=list(board_ids)).update(member_count=_member_count())
+
+
+def reconcile_board_counters(boards):
+    """
+    Recounts the members and the cards of boards, repairing counters that drifted, for example after cards were
+    written with raw SQL.
+
+    Args:
+        boards (QuerySet): The boards to recount.
+
+    Returns:
+        int: The number of boards whose counters were wrong.
+    """
+
+    counts = {
+        'member_count': _member_count(),
+        **{field: _card_count(status) for status, field in CARD_COUNT_FIELDS.items()},
+    }
+    fields = list(counts)
+
+    drifted = boards.annotate(**{f'actual_{field}': count for field, count in counts.items()})
+    drifted_ids = [
+        row[0] for row in drifted.values_list('id', *fields, *(f'actual_{field}' for field in fields)).iterator()
+        if row[1:len(fields) + 1] != row[len(fields) + 1:]
+    ]
+
+    for start in range(0, len(drifted_ids), COUNTER_RECONCILE_BATCH_SIZE):
+        Board.objects.filter(id__in=drifted_ids[start:start + COUNTER_RECONCILE_BATCH_SIZE]).update(**counts)
+    return len(drifted_ids)
@@ -0,0 +1,212 @@
+import random
+
+from django.core.cache import cache
+from django.db.models import Q
+
+from .models import Board
+
+# Prefixes of the cache keys used by the "My Boards" dashboard
+DASHBOARD_KEY = 'dashboard:{user_id}:{version}'
+USER_VERSION_KEY = 'dashboard:user_version:{user_id}'
+BOARD_VERSION_KEY = 'dashboard:board_version:{board_id}'
+HITS_KEY = 'dashboard:hits'
+MISSES_KEY = 'dashboard:misses'
+
+# Number of seconds a dashboard payload and the version counters are kept in the cache
+DASHBOARD_TIMEOUT = 24 * 60 * 60
+
+
+def _increment(key):
+    """
+    Increments a counter in the cache, creating it if needed.
+
+    Args:
+        key (str): The cache key of the counter.
+
+    Returns:
+        int: The new value of the counter.
+    """
+
+    if cache.add(key, 1, timeout=None):
+        return 1
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # The counter has been evicted between the two calls
+        cache.set(key, 1, timeout=None)
+        return 1
+
+
+def _new_version():
+    # A random version, so that a version key recreated after an eviction does not take a value seen before
+    return random.getrandbits(62)
+
+
+def _bump_version(key):
+    """
+    Changes a version key, seeding it with a fresh version if it is missing.
+
+    Args:
+        key (str): The cache key of the version.
+    """
+
+    if cache.add(key, _new_version(), timeout=None):
+        return
+    try:
+        cache.incr(key)
+    except ValueError:
+        # The version has been evicted between the two calls
+        cache.set(key, _new_version(), timeout=None)
+
+
+def _versions(keys):
+    """
+    Returns the current values of version keys, seeding the missing ones with a fresh version.
+
+    A missing key is never read as a default value, which a dashboard cached before the key was evicted could
+    still match.
+
+    Args:
+        keys (Iterable[str]): The cache keys of the versions.
+
+    Returns:
+        dict: The versions by key.
+    """
+
+    keys = list(keys)
+    versions = cache.get_many(keys)
+    missing = [key for key in keys if key not in versions]
+    if missing:
+        for key in missing:
+            cache.add(key, _new_version(), timeout=None)
+        versions.update(cache.get_many(missing))
+        # A version that could not be stored only has to differ from every cached one
+        for key in missing:
+            versions.setdefault(key, _new_version())
+    return versions
+
+
+def invalidate_user(user_id):
+    """
+    Invalidates the dashboard of a user, for example when a board is created for or shared with them.
+
+    Args:
+        user_id (int): The ID of the user.
+    """
+
+    _bump_version(USER_VERSION_KEY.format(user_id=user_id))
+
+
+def invalidate_boards(board_ids):
+    """
+    Invalidates the dashboards of every user that sees one of the boards.
+
+    Args:
+        board_ids (Iterable[int]): The IDs of the changed boards.
+    """
+
+    for board_id in board_ids:
+        _bump_version(BOARD_VERSION_KEY.format(board_id=board_id))
+
+
+def _board_versions(board_ids):
+    """
+    Returns the current cache versions of the given boards.
+
+    Args:
+        board_ids (Iterable[int]): The IDs of the boards.
+
+    Returns:
+        dict: The versions by board ID, boards without a version yet get a fresh one.
+    """
+
+    keys = {BOARD_VERSION_KEY.format(board_id=board_id): board_id for board_id in board_ids}
+    versions = _versions(keys)
+    return {board_id: versions[key] for key, board_id in keys.items()}
+
+
+def _board_payload(board):
+    """
+    Returns the part of a board shown on the dashboard.
+
+    Args:
+        board (Board): The board, with prefetched invited users.
+
+    Returns:
+        dict: The plain data of the board.
+    """
+
+    return {
+        'id': board.id,
+        'title': board.title,
+        'description': board.description,
+        'slug': board.slug,
+        'color': board.color,
+        'users_count': board.member_count,
+        'invited_usernames': [user.username for user in board.invited_users.all()],
+    }
+
+
+def build_dashboard(user):
+    """
+    Reads the boards owned by and shared with a user from the database.
+
+    Args:
+        user (CustomUser): The user whose dashboard is built.
+
+    Returns:
+        dict: The 'owned_boards' and 'invited_boards' lists of board payloads.
+    """
+
+    boards = Board.objects.prefetch_related('invited_users')
+
+    return {
+        'owned_boards': [_board_payload(board) for board in boards.filter(owner=user).order_by('id')],
+        'invited_boards': [_board_payload(board) for board in boards.filter(invited_users=user).order_by('id')],
+    }
+
+
+def get_dashboard(user):
+    """
+    Returns the "My Boards" dashboard of a user from the cache, rebuilding it if it is missing or outdated.
+
+    The cached payload remembers the version of every board it shows. It is outdated when the user's own version
+    changed (a board was created for or shared with them) or when one of its boards changed.
+
+    Args:
+        user (CustomUser): The user whose dashboard is returned.
+
+    Returns:
+        dict: The 'owned_boards' and 'invited_boards' lists of board payloads.
+    """
+
+    user_version_key = USER_VERSION_KEY.format(user_id=user.id)
+    user_version = _versions([user_version_key])[user_version_key]
+    key = DASHBOARD_KEY.format(user_id=user.id, version=user_version)
+
+    entry = cache.get(key)
+    if entry is not None and _board_versions(entry['board_versions']) == entry['board_versions']:
+        _increment(HITS_KEY)
+        return entry['dashboard']
+
+    _increment(MISSES_KEY)
+
+    # Read the board versions before the boards, so that a change committed meanwhile is never hidden by the cache
+    board_ids = Board.objects.filter(Q(owner=user) | Q(invited_users=user)).values_list('id', flat=True)
+    board_versions = _board_versions(set(board_ids))
+    dashboard = build_dashboard(user)
+
+    cache.set(key, {'dashboard': dashboard, 'board_versions': board_versions}, timeout=DASHBOARD_TIMEOUT)
+    return dashboard
+
+
+def dashboard_cache_stats():
+    """
+    Returns the hit and miss counters of the dashboard cache.
+
+    Returns:
+        dict: The 'hits' and 'misses' counters.
+    """
+
+    counters = cache.get_many([HITS_KEY, MISSES_KEY])
+    return {'hits': counters.get(HITS_KEY, 0), 'misses': counters.get(MISSES_KEY, 0)}
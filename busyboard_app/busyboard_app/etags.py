@@ -0,0 +1,94 @@
+import hashlib
+
+from django.db.models import F
+from django.middleware.csrf import get_token
+from django.utils import timezone
+
+from .models import Board, Card
+
+
+def touch_boards(board_ids):
+    """
+    Increments the version of boards whose page content has changed, invalidating the ETags of their pages.
+
+    Args:
+        board_ids (Iterable[int]): The IDs of the changed boards.
+    """
+
+    board_ids = set(board_ids)
+    if board_ids:
+        Board.objects.filter(id__in=board_ids).update(version=F('version') + 1)
+
+
+def _etag(*parts):
+    """
+    Returns a strong ETag hashing the given parts.
+    """
+
+    return '"' + hashlib.sha1(repr(parts).encode()).hexdigest() + '"'
+
+
+def card_last_modified(request, card_id):
+    """
+    Returns the last modification datetime of a card, read with a single indexed query.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+        card_id (int): The ID of the card.
+
+    Returns:
+        datetime: The update datetime of the card, or None if it does not exist.
+    """
+
+    return Card.objects.filter(pk=card_id).values_list('update_datetime', flat=True).first()
+
+
+def card_etag(request, card_id):
+    """
+    Returns the ETag of the details of a card, derived from its update datetime.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+        card_id (int): The ID of the card.
+
+    Returns:
+        str: The ETag, or None if the card does not exist.
+    """
+
+    update_datetime = card_last_modified(request, card_id)
+    if update_datetime is None:
+        return None
+    return _etag('card', card_id, update_datetime.isoformat())
+
+
+def board_etag(request, board_id, slug):
+    """
+    Returns the ETag of the board details page as seen by the requesting user.
+
+    It is built from the board version, read from the board row by primary key. The version is bumped by the
+    change log whenever the board, its members or any of its cards are created, edited, moved, archived or deleted,
+    so it covers the cards and the column counters without reading them. The parts of the page that belong to the
+    user, the day the statistics are computed for and the query string are added.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+        board_id (int): The ID of the board.
+        slug (str): The slug of the board.
+
+    Returns:
+        str: The ETag, or None if the board does not exist.
+    """
+
+    board = Board.objects.filter(id=board_id).values_list('slug', 'version').first()
+    if board is None:
+        return None
+
+    # The page embeds the CSRF token, make sure the secret it is derived from exists before it is hashed
+    get_token(request)
+
+    user = request.user
+    return _etag(
+        'board', board_id, slug, board, request.GET.urlencode(), timezone.localdate().isoformat(),
+        user.id, user.username, user.profile_photo.name, user.profile_photo_thumbnails,
+        request.META.get('CSRF_COOKIE'),
+    )
@@ -0,0 +1,174 @@
+import json
+import zlib
+
+from .models import Card
+
+# Number of cards fetched from the database per round trip while exporting a board
+EXPORT_CHUNK_SIZE = 2000
+
+# Number of characters collected from the JSON fragments before they are sent as one response chunk
+EXPORT_BUFFER_SIZE = 16 * 1024
+
+# Card fields written to the export, in output order
+EXPORT_CARD_FIELDS = ('title', 'description', 'status', 'color')
+
+# Human-readable names of the card statuses, as shown in the export
+STATUS_DISPLAY = dict(Card.STATUS_CHOICES)
+
+
+def board_export_data(board):
+    """
+    Returns the exported representation of a board without its cards.
+
+    Args:
+        board (Board): The board to export.
+
+    Returns:
+        dict: The title, description, owner username, slug and color of the board.
+    """
+
+    return {
+        'title': board.title,
+        'description': board.description,
+        'owner': board.owner.username,
+        'slug': board.slug,
+        'color': board.color
+    }
+
+
+def iter_card_export_data(board, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Yields the exported representation of every card of a board.
+
+    The cards are read as plain dictionaries in chunks, so the memory used does not depend on the number of cards.
+    They are ordered column by column in the order of the board, which an import of the file keeps.
+
+    Args:
+        board (Board): The board whose cards are exported.
+        chunk_size (int): The number of cards fetched from the database at once.
+
+    Yields:
+        dict: The title, description, status and color of a card.
+    """
+
+    cards = Card.objects.filter(board=board).values(*EXPORT_CARD_FIELDS).order_by('status', 'rank', 'id')
+    for card in cards.iterator(chunk_size=chunk_size):
+        card['status'] = STATUS_DISPLAY.get(card['status'], card['status'])
+        yield card
+
+
+def _indent(text, level):
+    """
+    Indents every line but the first one of a JSON fragment.
+
+    Args:
+        text (str): The JSON fragment.
+        level (int): The number of spaces to add.
+
+    Returns:
+        str: The indented fragment.
+    """
+
+    return text.replace('\n', '\n' + ' ' * level)
+
+
+def iter_board_json(board, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Yields a board and its cards as an indented JSON document, one card at a time.
+
+    Args:
+        board (Board): The board to export.
+        chunk_size (int): The number of cards fetched from the database at once.
+
+    Yields:
+        str: Consecutive fragments of the JSON document.
+    """
+
+    board_json = _indent(json.dumps(board_export_data(board), indent=4), 4)
+    yield '{\n    "board": ' + board_json + ',\n    "cards": ['
+
+    separator = '\n        '
+    empty = True
+    for card in iter_card_export_data(board, chunk_size):
+        yield separator + _indent(json.dumps(card, indent=4), 8)
+        separator = ',\n        '
+        empty = False
+
+    yield ']\n}' if empty else '\n    ]\n}'
+
+
+def iter_board_ndjson(board, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Yields a board and its cards as newline-delimited JSON.
+
+    The first line holds the board under the "board" key, every following line holds one card.
+
+    Args:
+        board (Board): The board to export.
+        chunk_size (int): The number of cards fetched from the database at once.
+
+    Yields:
+        str: One JSON line per board or card.
+    """
+
+    yield json.dumps({'board': board_export_data(board)}) + '\n'
+    for card in iter_card_export_data(board, chunk_size):
+        yield json.dumps(card) + '\n'
+
+
+def iter_buffered(chunks, buffer_size=EXPORT_BUFFER_SIZE):
+    """
+    Joins a stream of small text chunks into chunks of about the buffer size, so that a response is not written
+    one card at a time.
+
+    Args:
+        chunks (Iterable[str]): The text chunks.
+        buffer_size (int): The number of characters collected before they are yielded.
+
+    Yields:
+        str: The joined chunks.
+    """
+
+    buffer = []
+    buffered = 0
+
+    for chunk in chunks:
+        buffer.append(chunk)
+        buffered += len(chunk)
+        if buffered >= buffer_size:
+            yield ''.join(buffer)
+            buffer, buffered = [], 0
+
+    if buffer:
+        yield ''.join(buffer)
+
+
+def iter_gzip(chunks, buffer_size=64 * 1024):
+    """
+    Compresses a stream of text chunks into a gzip stream.
+
+    Args:
+        chunks (Iterable[str]): The text chunks to compress.
+        buffer_size (int): The number of uncompressed bytes collected before compressing them.
+
+    Yields:
+        bytes: Consecutive pieces of the gzip stream.
+    """
+
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+    buffer = []
+    buffered = 0
+
+    for chunk in chunks:
+        data = chunk.encode('utf-8')
+        buffer.append(data)
+        buffered += len(data)
+
+        # Compress in larger blocks to keep the number of response chunks low
+        if buffered >= buffer_size:
+            compressed = compressor.compress(b''.join(buffer))
+            buffer, buffered = [], 0
+            if compressed:
+                yield compressed
+
+    yield compressor.compress(b''.join(buffer)) + compressor.flush()
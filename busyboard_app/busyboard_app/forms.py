@@ -34,6 +34,10 @@ class CustomUserCreationForm(UserCreationForm):
         return user
 
 
+class ProfilePhotoForm(forms.Form):
+    new_photo = forms.ImageField()
+
+
 class UserProfileUpdateForm(forms.ModelForm):
     email = forms.EmailField()
 
@@ -0,0 +1,75 @@
+import hashlib
+
+from django.core.cache import caches
+from django.template.loader import get_template
+from django.utils.safestring import mark_safe
+
+# Cache holding the rendered card tiles, see settings.CACHES
+CARD_TILE_CACHE = 'template_fragments'
+
+# Template of a card tile, and its version in the cache keys to increment whenever the template changes
+CARD_TILE_TEMPLATE = 'busyboard_boards/card.html'
+CARD_TILE_VERSION = 1
+
+# Number of seconds a rendered card tile is kept in the cache
+CARD_TILE_TIMEOUT = 7 * 24 * 60 * 60
+
+
+def card_tile_key(card):
+    """
+    Returns the cache key of the rendered tile of a card.
+
+    The key changes whenever something shown on the tile changes: the card itself, whose update datetime is bumped
+    by every edit and status change, its position, the search highlight and the name and photo of its creator.
+
+    Args:
+        card (Card): The card, with its creator loaded.
+
+    Returns:
+        str: The cache key.
+    """
+
+    creator = card.creator
+    parts = (
+        card.update_datetime.isoformat(), card.status, card.rank, getattr(card, 'search_highlight', ''),
+        creator.username if creator else '',
+        creator.profile_photo.name if creator else '',
+        creator.profile_photo_thumbnails if creator else '',
+    )
+    digest = hashlib.md5(repr(parts).encode(), usedforsecurity=False).hexdigest()
+    return f'card_tile:{CARD_TILE_VERSION}:{card.id}:{digest}'
+
+
+def render_card_tiles(cards):
+    """
+    Sets the 'tile' attribute of the cards to their rendered HTML, rendering only the tiles missing from the cache.
+
+    The tiles hold nothing specific to the user viewing them, the board page fills in the CSRF token of their
+    forms when they are submitted. All tiles are read from the cache at once and the missing ones are written at
+    once.
+
+    Args:
+        cards (Iterable[Card]): The cards, with their creators loaded.
+
+    Returns:
+        list: The cards.
+    """
+
+    cards = list(cards)
+    cache = caches[CARD_TILE_CACHE]
+
+    keys = {card.id: card_tile_key(card) for card in cards}
+    tiles = cache.get_many(keys.values())
+
+    missing = {}
+    template = get_template(CARD_TILE_TEMPLATE)
+    for card in cards:
+        tile = tiles.get(keys[card.id])
+        if tile is None:
+            tile = missing[keys[card.id]] = template.render({'card': card})
+        card.tile = mark_safe(tile)
+
+    if missing:
+        cache.set_many(missing, timeout=CARD_TILE_TIMEOUT)
+
+    return cards
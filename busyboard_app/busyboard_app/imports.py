@@ -0,0 +1,331 @@
+import codecs
+import gzip
+import json
+import random
+import re
+import zlib
+
+from django.db import transaction
+from django.utils.text import slugify
+
+from .changes import record_card_changes
+from .counters import record_card_counts
+from .models import Board, Card
+from .ranking import rank_between
+from .search import index_cards
+from .statistics import rebuild_board_statistics
+
+# Number of cards inserted into the database per INSERT statement while importing a board
+IMPORT_BATCH_SIZE = 1000
+
+# Number of characters read from the uploaded file at once
+IMPORT_READ_SIZE = 64 * 1024
+
+# Card statuses accepted in an import, by code and by human-readable name
+STATUS_CODES = {
+    **{code: code for code, _ in Card.STATUS_CHOICES},
+    **{name: code for code, name in Card.STATUS_CHOICES},
+}
+
+# Format of the board and card colors
+COLOR_PATTERN = re.compile(r'#[0-9A-Fa-f]{6}')
+
+# Colors assigned to imported boards, the same palette as for boards created in the application
+BOARD_COLORS = ['#4C5251', '#323232', '#034649', '#2B3C4A', '#494E13', '#544545', '#430405', '#250E2A', '#343B51',
+                '#1F4239', '#403E1C', '#2C1618', '#142E32', '#1B1B23']
+
+
+class BoardImportError(ValueError):
+    """
+    Raised when an uploaded board export cannot be parsed.
+    """
+
+
+class _JSONStream:
+    """
+    Incrementally decodes JSON values from a text stream without reading it into memory at once.
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.decoder = json.JSONDecoder()
+        self.buffer = ''
+        self.position = 0
+        self.exhausted = False
+
+    def _read(self):
+        """
+        Appends the next part of the stream to the buffer.
+
+        Returns:
+            bool: False if the end of the stream has been reached.
+        """
+
+        if self.exhausted:
+            return False
+
+        try:
+            data = self.stream.read(IMPORT_READ_SIZE)
+        except UnicodeDecodeError as error:
+            raise BoardImportError('The file is not UTF-8 encoded text.') from error
+        except (OSError, EOFError, zlib.error) as error:
+            # Corrupt or truncated gzip files, gzip.BadGzipFile is an OSError
+            raise BoardImportError(f'The file could not be decompressed: {error}') from error
+        if not data:
+            self.exhausted = True
+            return False
+
+        # Drop the part of the buffer that has already been decoded
+        self.buffer = self.buffer[self.position:] + data
+        self.position = 0
+        return True
+
+    def _skip_whitespace(self):
+        while True:
+            while self.position < len(self.buffer) and self.buffer[self.position].isspace():
+                self.position += 1
+            if self.position < len(self.buffer) or not self._read():
+                return
+
+    def peek(self):
+        """
+        Returns the next non-whitespace character without consuming it, or an empty string at the end of the stream.
+        """
+
+        self._skip_whitespace()
+        return self.buffer[self.position:self.position + 1]
+
+    def expect(self, characters):
+        """
+        Consumes the next non-whitespace character, which has to be one of the given characters.
+
+        Returns:
+            str: The consumed character.
+        """
+
+        character = self.peek()
+        if not character or character not in characters:
+            raise BoardImportError(f'Expected one of {characters!r} but found {character!r}.')
+        self.position += 1
+        return character
+
+    def value(self):
+        """
+        Decodes the next JSON value, reading more of the stream until the value is complete.
+
+        Returns:
+            object: The decoded value.
+        """
+
+        self._skip_whitespace()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.position)
+            except json.JSONDecodeError as error:
+                if not self._read():
+                    raise BoardImportError(f'Invalid JSON: {error}') from error
+                continue
+
+            # A value at the very end of the buffer may continue in the next part of the stream
+            if end == len(self.buffer) and not isinstance(value, (dict, list, str)) and self._read():
+                continue
+
+            self.position = end
+            return value
+
+
+def _iter_records(stream):
+    """
+    Yields the board and the cards of a JSON or NDJSON export, decoding one card at a time.
+
+    The first object of both formats is read key by key. In a JSON export it holds the board and the list of cards,
+    in an NDJSON export only the board, and every following object is a card.
+
+    Args:
+        stream (TextIO): The export file.
+
+    Yields:
+        tuple: ('board', dict) followed by one ('card', dict) per card.
+    """
+
+    parser = _JSONStream(stream)
+    parser.expect('{')
+
+    if parser.peek() != '}':
+        while True:
+            key = parser.value()
+            if not isinstance(key, str):
+                raise BoardImportError(f'Expected a key but found {key!r}.')
+            parser.expect(':')
+
+            if key == 'cards':
+                # Decode the cards one by one instead of the whole list
+                parser.expect('[')
+                if parser.peek() != ']':
+                    while True:
+                        yield 'card', parser.value()
+                        if parser.expect(',]') == ']':
+                            break
+                else:
+                    parser.expect(']')
+            elif key == 'board':
+                yield 'board', parser.value()
+            else:
+                parser.value()
+
+            if parser.expect(',}') == '}':
+                break
+    else:
+        parser.expect('}')
+
+    # The values following the first object are the lines of an NDJSON export
+    while parser.peek():
+        record = parser.value()
+        if isinstance(record, dict) and set(record) == {'board'}:
+            yield 'board', record['board']
+        else:
+            yield 'card', record
+
+
+def iter_board_import(file):
+    """
+    Parses an exported board file record by record.
+
+    JSON and NDJSON exports are both accepted, and gzip-compressed files are decompressed on the fly. Files that are
+    not valid UTF-8, gzip or JSON raise BoardImportError.
+
+    Args:
+        file (BinaryIO): The exported board file, it has to be seekable.
+
+    Yields:
+        tuple: ('board', dict) followed by one ('card', dict) per card.
+    """
+
+    # Decompress gzip files transparently
+    compressed = file.read(2) == b'\x1f\x8b'
+    file.seek(0)
+    if compressed:
+        file = gzip.GzipFile(fileobj=file)
+
+    yield from _iter_records(codecs.getreader('utf-8')(file))
+
+
+def _text(data, name, kind, max_length=None):
+    """
+    Returns a text field of an imported board or card.
+
+    Args:
+        data (dict): The imported board or card.
+        name (str): The name of the field.
+        kind (str): 'board' or 'card', for the error message.
+        max_length (int): The length the text is truncated to, if any.
+
+    Returns:
+        str: The text, or None if the field is missing or null.
+    """
+
+    value = data.get(name)
+    if value is None:
+        return None
+    if not isinstance(value, str):
+        raise BoardImportError(f'The {name} of a {kind} has to be a string, not {value!r}.')
+    return value[:max_length] if max_length else value
+
+
+def _color(data, kind):
+    """
+    Returns the color of an imported board or card.
+
+    Args:
+        data (dict): The imported board or card.
+        kind (str): 'board' or 'card', for the error message.
+
+    Returns:
+        str: The color, or None if the field is missing, null or empty.
+    """
+
+    color = _text(data, 'color', kind)
+    if color and not COLOR_PATTERN.fullmatch(color):
+        raise BoardImportError(f'The color of a {kind} has to be a #RRGGBB color, not {color!r}.')
+    return color or None
+
+
+def import_board(file, owner, batch_size=IMPORT_BATCH_SIZE, progress=None):
+    """
+    Creates a new board owned by the given user from an exported board file.
+
+    The cards are parsed incrementally and inserted with bulk_create in batches, all inside one transaction.
+
+    Args:
+        file (BinaryIO): The exported board file (JSON or NDJSON, optionally gzip-compressed).
+        owner (CustomUser): The owner and card creator of the imported board.
+        batch_size (int): The number of cards inserted per batch.
+        progress (callable): An optional function called with the number of cards imported after every batch.
+
+    Returns:
+        tuple: The imported Board and the number of imported cards.
+    """
+
+    records = iter_board_import(file)
+    imported = 0
+    batch = []
+
+    with transaction.atomic():
+        # The export starts with the board data
+        kind, board_data = next(records, (None, None))
+        if kind != 'board' or not isinstance(board_data, dict):
+            raise BoardImportError('The file does not start with a board.')
+
+        title = _text(board_data, 'title', 'board', max_length=200) or 'Imported board'
+        board = Board.objects.create(
+            title=title,
+            description=_text(board_data, 'description', 'board', max_length=500) or '',
+            owner=owner,
+            slug=slugify(title),
+            color=_color(board_data, 'board') or random.choice(BOARD_COLORS),
+        )
+
+        # The cards are placed in every column in the order of the file, with evenly spaced ranks
+        last_ranks = {}
+
+        def flush():
+            nonlocal imported, batch
+            # bulk_create() does not call save(), which stamps the done cards, nor the card signals, whose
+            # changes are recorded with one version update for the batch
+            for card in batch:
+                card.update_done_datetime()
+            cards = Card.objects.bulk_create(batch)
+            index_cards(cards)
+            record_card_counts((board.id, None, card.status) for card in cards)
+            record_card_changes(cards, 'CREATED')
+            imported += len(cards)
+            batch = []
+            if progress:
+                progress(imported)
+
+        for kind, card_data in records:
+            if kind != 'card' or not isinstance(card_data, dict):
+                raise BoardImportError('Only cards may follow the board.')
+
+            status = STATUS_CODES.get(_text(card_data, 'status', 'card'), 'TO_DO')
+            last_ranks[status] = rank_between(last_ranks.get(status), None)
+            batch.append(Card(
+                board=board,
+                title=_text(card_data, 'title', 'card', max_length=150) or '',
+                description=_text(card_data, 'description', 'card'),
+                creator=owner,
+                status=status,
+                color=_color(card_data, 'card') or '#FFFFFF',
+                rank=last_ranks[status],
+            ))
+
+            if len(batch) >= batch_size:
+                flush()
+
+        if batch:
+            flush()
+
+        # Count the imported done cards in the board statistics
+        rebuild_board_statistics(board)
+
+    return board, imported
@@ -0,0 +1,177 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+from django.db import transaction
+from django.utils import timezone
+
+from .models import OutgoingEmail
+
+# Number of messages claimed and sent over one connection by the worker
+OUTBOX_BATCH_SIZE = 50
+
+# Number of failed attempts after which a message is given up
+OUTBOX_MAX_ATTEMPTS = 5
+
+# Number of seconds a claimed batch is reserved for a worker before another worker may pick it up again
+OUTBOX_CLAIM_TIMEOUT = 5 * 60
+
+
+class OutboxEmailBackend(BaseEmailBackend):
+    """
+    Email backend queuing messages in the outbox table instead of sending them.
+
+    The messages are delivered later by the send_queued_mail management command, through the backend set in
+    OUTBOX_DELIVERY_BACKEND.
+    """
+
+    def send_messages(self, email_messages):
+        emails = []
+        for message in email_messages:
+            if message.attachments:
+                if not self.fail_silently:
+                    raise ValueError('Messages with attachments cannot be queued in the outbox.')
+                continue
+
+            emails.append(OutgoingEmail(
+                subject=message.subject,
+                body=message.body,
+                from_email=message.from_email,
+                to=list(message.to),
+                cc=list(message.cc),
+                bcc=list(message.bcc),
+                reply_to=list(message.reply_to),
+                headers=dict(message.extra_headers),
+                alternatives=[list(alternative) for alternative in getattr(message, 'alternatives', [])],
+            ))
+
+        OutgoingEmail.objects.bulk_create(emails)
+        return len(emails)
+
+
+def _retry_delay(attempts):
+    """
+    Returns how long to wait before retrying a message, doubling the delay after every failed attempt.
+
+    Args:
+        attempts (int): The number of failed attempts so far.
+
+    Returns:
+        timedelta: The delay before the next attempt.
+    """
+
+    delay = settings.OUTBOX_RETRY_DELAY * 2 ** (attempts - 1)
+    return timedelta(seconds=min(delay, settings.OUTBOX_MAX_RETRY_DELAY))
+
+
+def _email_message(email, connection):
+    """
+    Rebuilds the message to send from a queued email.
+
+    Args:
+        email (OutgoingEmail): The queued email.
+        connection: The delivery backend the message is sent through.
+
+    Returns:
+        EmailMultiAlternatives: The message.
+    """
+
+    return EmailMultiAlternatives(
+        subject=email.subject,
+        body=email.body,
+        from_email=email.from_email,
+        to=email.to,
+        cc=email.cc,
+        bcc=email.bcc,
+        reply_to=email.reply_to,
+        headers=email.headers,
+        alternatives=[tuple(alternative) for alternative in email.alternatives],
+        connection=connection,
+    )
+
+
+def claim_due_emails(batch_size=OUTBOX_BATCH_SIZE):
+    """
+    Reserves a batch of queued emails that are due for delivery, so that concurrent workers do not send them twice.
+
+    Args:
+        batch_size (int): The maximum number of emails to claim.
+
+    Returns:
+        list: The claimed emails, oldest first.
+    """
+
+    now = timezone.now()
+
+    with transaction.atomic():
+        emails = list(
+            OutgoingEmail.objects.select_for_update(skip_locked=True)
+            .filter(status='PENDING', next_attempt_datetime__lte=now)
+            .order_by('next_attempt_datetime', 'id')[:batch_size]
+        )
+
+        # Push the claimed emails out of the due window until the batch has been processed
+        OutgoingEmail.objects.filter(
+            id__in=[email.id for email in emails], next_attempt_datetime__lte=now
+        ).update(next_attempt_datetime=now + timedelta(seconds=OUTBOX_CLAIM_TIMEOUT))
+
+    return emails
+
+
+def deliver_queued_emails(batch_size=OUTBOX_BATCH_SIZE, max_attempts=OUTBOX_MAX_ATTEMPTS):
+    """
+    Sends one batch of due emails over a single connection of the delivery backend.
+
+    An email that fails is retried with an exponential backoff, and marked as failed after max_attempts attempts.
+
+    Args:
+        batch_size (int): The maximum number of emails to send.
+        max_attempts (int): The number of attempts after which an email is given up.
+
+    Returns:
+        tuple: The number of emails sent and the number of failed attempts.
+    """
+
+    emails = claim_due_emails(batch_size)
+    if not emails:
+        return 0, 0
+
+    sent = []
+    failed = []
+    connection = get_connection(settings.OUTBOX_DELIVERY_BACKEND, fail_silently=False)
+
+    try:
+        # Open the connection once for the whole batch, the backend keeps it open between messages
+        connection.open()
+        for email in emails:
+            try:
+                connection.send_messages([_email_message(email, connection)])
+            except Exception as error:
+                failed.append((email, error))
+            else:
+                sent.append(email)
+    except Exception as error:
+        # The connection could not be opened, retry every email of the batch that was not sent
+        failed.extend((email, error) for email in emails[len(sent) + len(failed):])
+    finally:
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    now = timezone.now()
+    OutgoingEmail.objects.filter(id__in=[email.id for email in sent]).update(
+        status='SENT', sent_datetime=now, last_error=''
+    )
+
+    for email, error in failed:
+        email.attempts += 1
+        email.last_error = f'{type(error).__name__}: {error}'
+        email.next_attempt_datetime = now + _retry_delay(email.attempts)
+        email.status = 'FAILED' if email.attempts >= max_attempts else 'PENDING'
+    OutgoingEmail.objects.bulk_update(
+        [email for email, _ in failed], ['attempts', 'last_error', 'next_attempt_datetime', 'status']
+    )
+
+    return len(sent), len(failed)
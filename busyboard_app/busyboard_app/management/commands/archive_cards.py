@@ -0,0 +1,29 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from busyboard_app.archive import CARD_ARCHIVE_BATCH_SIZE, archive_done_cards
+
+
+class Command(BaseCommand):
+    help = 'Moves the cards done for longer than CARD_ARCHIVE_AFTER_DAYS days to the archive, in batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=settings.CARD_ARCHIVE_AFTER_DAYS,
+                            help='Number of days a card has to be done for to be archived.')
+        parser.add_argument('--batch-size', type=int, default=CARD_ARCHIVE_BATCH_SIZE,
+                            help='Number of cards moved per transaction.')
+        parser.add_argument('--loop', action='store_true',
+                            help='Keep archiving periodically instead of exiting after one pass.')
+        parser.add_argument('--interval', type=float, default=60 * 60,
+                            help='Number of seconds to wait between two passes.')
+
+    def handle(self, *args, **options):
+        while True:
+            archived = archive_done_cards(options['days'], options['batch_size'])
+            self.stdout.write(f'{archived} cards archived')
+
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,101 @@
+import json
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+
+from busyboard_app.models import Board, Card, CustomUser
+
+
+class Command(BaseCommand):
+    help = ('Measures the throughput of the JSON API endpoints on a board with sample cards, created in a '
+            'transaction that is rolled back at the end.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--cards', type=int, default=10000, help='Number of cards on the sample board.')
+        parser.add_argument('--requests', type=int, default=200, help='Number of requests sent to every endpoint.')
+        parser.add_argument('--page-size', type=int, default=100, help='Number of cards per page.')
+
+    def handle(self, *args, **options):
+        with transaction.atomic(), override_settings(ALLOWED_HOSTS=['*']):
+            for endpoint, durations, queries in self._run(options['cards'], options['requests'],
+                                                          options['page_size']):
+                durations.sort()
+                self.stdout.write(
+                    f'{endpoint:<28} {len(durations) / sum(durations):8.0f} req/s   '
+                    f'median {statistics.median(durations) * 1000:6.2f} ms   '
+                    f'p99 {durations[int(len(durations) * 0.99) - 1] * 1000:6.2f} ms   '
+                    f'{queries} queries'
+                )
+
+            transaction.set_rollback(True)
+
+    def _run(self, card_count, request_count, page_size):
+        """
+        Sends the requests of every endpoint and yields their durations and the number of queries of the last one.
+        """
+
+        owner = CustomUser.objects.create(username='__api_benchmark', email='owner@api-benchmark.invalid',
+                                          password='__api_benchmark')
+        board = Board.objects.create(title='API benchmark', description='API benchmark', owner=owner)
+        statuses = [status for status, _ in Card.STATUS_CHOICES]
+        Card.objects.bulk_create(
+            [Card(board=board, title=f'Card {index}', description='API benchmark', creator=owner,
+                  status=statuses[index % len(statuses)]) for index in range(card_count)],
+            batch_size=1000,
+        )
+        card_ids = list(Card.objects.filter(board=board).values_list('id', flat=True)[:page_size])
+
+        client = Client()
+        client.force_login(owner)
+
+        cards_url = reverse('api_board_cards', args=[board.id])
+        pages = self._cursors(client, cards_url, page_size)
+
+        endpoints = [
+            ('GET boards', lambda index: client.get(reverse('api_boards'))),
+            ('GET board', lambda index: client.get(reverse('api_board', args=[board.id]))),
+            ('GET members', lambda index: client.get(reverse('api_board_members', args=[board.id]))),
+            ('GET card', lambda index: client.get(reverse('api_card', args=[card_ids[index % len(card_ids)]]))),
+            ('GET cards (page)', lambda index: client.get(cards_url, {
+                'limit': page_size, **({'cursor': pages[index % len(pages)]} if pages[index % len(pages)] else {}),
+            })),
+            ('GET cards (sparse fields)', lambda index: client.get(cards_url, {
+                'limit': page_size, 'fields': 'id,status,rank',
+                **({'cursor': pages[index % len(pages)]} if pages[index % len(pages)] else {}),
+            })),
+            ('POST cards (bulk)', lambda index: client.post(cards_url, json.dumps([
+                {'title': f'Bulk {index} {number}'} for number in range(page_size)
+            ]), content_type='application/json')),
+            ('PATCH cards (bulk)', lambda index: client.patch(cards_url, json.dumps([
+                {'id': card_id, 'priority': ('LOW', 'HIGH')[index % 2]} for card_id in card_ids
+            ]), content_type='application/json')),
+        ]
+
+        for endpoint, send in endpoints:
+            durations = []
+            for index in range(request_count):
+                started = time.perf_counter()
+                response = send(index)
+                durations.append(time.perf_counter() - started)
+                assert response.status_code in (200, 201), (endpoint, response.status_code, response.content)
+
+            with CaptureQueriesContext(connection) as context:
+                send(0)
+            yield endpoint, durations, len(context.captured_queries)
+
+    def _cursors(self, client, url, page_size):
+        """
+        Walks through every page of cards and returns their cursors, None standing for the first page.
+        """
+
+        cursors = [None]
+        while True:
+            data = client.get(url, {'limit': page_size, **({'cursor': cursors[-1]} if cursors[-1] else {})}).json()
+            if data['next_cursor'] is None:
+                return cursors
+            cursors.append(data['next_cursor'])
@@ -0,0 +1,59 @@
+import statistics
+import time
+
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from busyboard_app.fragments import CARD_TILE_CACHE, card_tile_key
+from busyboard_app.models import Board, Card, CustomUser
+
+
+class Command(BaseCommand):
+    help = ('Measures the board page of a board with sample cards, with the card tiles rendered and read from the '
+            'fragment cache. The sample data is created in a transaction that is rolled back at the end.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--cards', type=int, default=3000, help='Number of cards on the sample board.')
+        parser.add_argument('--repeat', type=int, default=5, help='Number of measured requests per case.')
+
+    def handle(self, *args, **options):
+        with transaction.atomic(), override_settings(ALLOWED_HOSTS=['*']):
+            owner = CustomUser.objects.create(username='__render_benchmark', email='owner@render-benchmark.invalid',
+                                              password='__render_benchmark')
+            board = Board.objects.create(title='Render benchmark', description='Render benchmark', owner=owner)
+            statuses = [status for status, _ in Card.STATUS_CHOICES]
+            Card.objects.bulk_create(
+                [Card(board=board, title=f'Card {index}', description='Render benchmark ' * 4, creator=owner,
+                      status=statuses[index % len(statuses)]) for index in range(options['cards'])],
+                batch_size=1000,
+            )
+            cards = list(Card.objects.filter(board=board).select_related('creator'))
+            keys = [card_tile_key(card) for card in cards]
+
+            client = Client()
+            client.force_login(owner)
+            url = reverse('board_details', args=[board.id, board.slug])
+
+            def request(cold):
+                if cold:
+                    caches[CARD_TILE_CACHE].delete_many(keys)
+                started = time.perf_counter()
+                response = client.get(url)
+                assert response.status_code == 200, response.status_code
+                return time.perf_counter() - started
+
+            # Warm up the templates and the URL resolver
+            request(cold=True)
+
+            for case, cold in (('cold cache (every tile rendered)', True), ('warm cache (every tile cached)', False)):
+                durations = sorted(request(cold) for _ in range(options['repeat']))
+                self.stdout.write(f'{options["cards"]} cards, {case}: '
+                                  f'median {statistics.median(durations) * 1000:.0f} ms, '
+                                  f'min {durations[0] * 1000:.0f} ms')
+
+            caches[CARD_TILE_CACHE].delete_many(keys)
+            transaction.set_rollback(True)
@@ -0,0 +1,92 @@
+import statistics
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from busyboard_app.models import Board, Card, CustomUser
+
+
+class Command(BaseCommand):
+    help = ('Moves cards with parallel update_card_status requests against the configured database and reports the '
+            'write throughput, latency and failures. Run it once per database profile (BUSYBOARD_DB_ENGINE) to '
+            'compare them. The sample data is committed, as the writers use their own connections, and deleted at '
+            'the end.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=8, help='Number of parallel writer threads.')
+        parser.add_argument('--moves', type=int, default=200, help='Number of card moves per writer.')
+        parser.add_argument('--cards', type=int, default=100, help='Number of cards shared by the writers.')
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'{connection.vendor} database {connection.settings_dict["NAME"]}, '
+                          f'{options["writers"]} writers x {options["moves"]} moves')
+
+        owner = CustomUser.objects.create(username='__write_benchmark', email='owner@write-benchmark.invalid',
+                                          password='__write_benchmark')
+        try:
+            board = Board.objects.create(title='Write benchmark', description='Write benchmark', owner=owner)
+            card_ids = [card.id for card in Card.objects.bulk_create(
+                [Card(board=board, title=f'Card {index}', creator=owner) for index in range(options['cards'])]
+            )]
+
+            durations, failures, elapsed = self._run(owner, card_ids, options['writers'], options['moves'])
+        finally:
+            owner.delete()
+
+        durations.sort()
+        self.stdout.write(f'{len(durations)} moves in {elapsed:.2f} s: {len(durations) / elapsed:.0f} moves/s, '
+                          f'{len(failures)} failed')
+        if durations:
+            self.stdout.write(
+                f'latency: median {statistics.median(durations) * 1000:.2f} ms, '
+                f'p99 {durations[max(int(len(durations) * 0.99) - 1, 0)] * 1000:.2f} ms, '
+                f'max {durations[-1] * 1000:.2f} ms'
+            )
+        for error in sorted(set(failures)):
+            self.stdout.write(self.style.ERROR(f'{failures.count(error)} x {error}'))
+
+    def _run(self, owner, card_ids, writer_count, move_count):
+        """
+        Sends the moves from parallel threads and returns their durations, the failures and the elapsed time.
+        """
+
+        statuses = [status for status, _ in Card.STATUS_CHOICES]
+        durations = []
+        failures = []
+        start = threading.Barrier(writer_count + 1)
+
+        def write(writer):
+            client = Client()
+            client.force_login(owner)
+            start.wait()
+            try:
+                for index in range(move_count):
+                    data = {'card_id': card_ids[(writer * move_count + index) % len(card_ids)],
+                            'status': statuses[index % len(statuses)]}
+                    started = time.perf_counter()
+                    try:
+                        response = client.post(reverse('update_card_status'), data)
+                        if response.status_code != 200:
+                            raise RuntimeError(f'HTTP {response.status_code}')
+                    except Exception as error:
+                        failures.append(f'{type(error).__name__}: {error}')
+                    else:
+                        durations.append(time.perf_counter() - started)
+            finally:
+                connections.close_all()
+
+        with override_settings(ALLOWED_HOSTS=['*']):
+            threads = [threading.Thread(target=write, args=(writer,)) for writer in range(writer_count)]
+            for thread in threads:
+                thread.start()
+            start.wait()
+            started = time.perf_counter()
+            for thread in threads:
+                thread.join()
+
+        return durations, failures, time.perf_counter() - started
@@ -0,0 +1,63 @@
+import asyncio
+import statistics
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+
+from busyboard_app.realtime import InProcessBroker, _CLOSED
+
+
+class Command(BaseCommand):
+    help = ('Measures the fan-out of the in-process real-time broker: publishes card events from a worker thread, '
+            'as the views do, to simulated subscribers of one board and reports the delivery latency.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--subscribers', type=int, default=1000, help='Number of simulated clients.')
+        parser.add_argument('--events', type=int, default=100, help='Number of events published.')
+        parser.add_argument('--interval', type=float, default=0.01,
+                            help='Number of seconds between two published events.')
+
+    def handle(self, *args, **options):
+        latencies, elapsed = asyncio.run(self._run(options['subscribers'], options['events'], options['interval']))
+
+        expected = options['subscribers'] * options['events']
+        latencies.sort()
+        self.stdout.write(f'{len(latencies)} of {expected} events delivered in {elapsed:.2f} s')
+        self.stdout.write(
+            f'latency: median {statistics.median(latencies) * 1000:.2f} ms, '
+            f'p99 {latencies[int(len(latencies) * 0.99) - 1] * 1000:.2f} ms, '
+            f'max {latencies[-1] * 1000:.2f} ms'
+        )
+
+    async def _run(self, subscriber_count, event_count, interval):
+        broker = InProcessBroker(max_queue_size=event_count + 1)
+        board_id = 1
+        latencies = []
+        sent = []
+
+        async def subscriber(subscription):
+            for index in range(event_count):
+                frame = await subscription.get(timeout=30)
+                if frame is None or frame is _CLOSED:
+                    return
+                # Events are delivered in order, so the n-th frame is the n-th published event
+                latencies.append(time.perf_counter() - sent[index])
+            subscription.close()
+
+        subscriptions = [broker.subscribe(board_id) for _ in range(subscriber_count)]
+
+        def publish():
+            for index in range(event_count):
+                sent.append(time.perf_counter())
+                broker.publish(board_id, {'type': 'moved', 'cards': [{'id': index, 'status': 'DONE', 'rank': index}]})
+                time.sleep(interval)
+
+        started = time.perf_counter()
+        publisher = threading.Thread(target=publish)
+        publisher.start()
+        await asyncio.gather(*(subscriber(subscription) for subscription in subscriptions))
+        elapsed = time.perf_counter() - started
+        await asyncio.get_running_loop().run_in_executor(None, publisher.join)
+
+        return latencies, elapsed
@@ -0,0 +1,67 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from busyboard_app.models import Board, Card, CustomUser
+from busyboard_app.ranking import RANK_GAP, move_cards
+
+# Number of cards inserted per query
+BENCHMARK_BATCH_SIZE = 5000
+
+
+class Command(BaseCommand):
+    help = ('Measures moving a card to a random position of its column for columns of growing length, showing that '
+            'the cost of a move does not depend on the number of cards in the column. The sample data is created '
+            'in a transaction that is rolled back at the end.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000, 100000],
+                            help='Numbers of cards in the measured columns.')
+        parser.add_argument('--moves', type=int, default=200, help='Number of measured moves per column.')
+        parser.add_argument('--seed', type=int, default=0, help='Seed of the random generator.')
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+
+        with transaction.atomic():
+            owner = CustomUser.objects.create(username='__reorder_benchmark', email='owner@reorder-benchmark.invalid',
+                                              password='__reorder_benchmark')
+
+            for size in options['sizes']:
+                board = Board.objects.create(title=f'Reorder benchmark {size}', description='Reorder benchmark',
+                                             owner=owner)
+                for offset in range(0, size, BENCHMARK_BATCH_SIZE):
+                    Card.objects.bulk_create([
+                        Card(board=board, title=f'Card {index}', creator=owner, rank=index * RANK_GAP)
+                        for index in range(offset, min(offset + BENCHMARK_BATCH_SIZE, size))
+                    ])
+                card_ids = list(Card.objects.filter(board=board).order_by('rank').values_list('id', flat=True))
+
+                durations = []
+                query_counts = []
+                for _ in range(options['moves']):
+                    # Move a random card between two other neighbouring cards, as the drag and drop does
+                    card_id = card_ids.pop(rng.randrange(len(card_ids)))
+                    position = rng.randrange(len(card_ids) + 1)
+                    previous_id = card_ids[position - 1] if position > 0 else None
+                    next_id = card_ids[position] if position < len(card_ids) else None
+                    card_ids.insert(position, card_id)
+
+                    with CaptureQueriesContext(connection) as queries:
+                        started = time.perf_counter()
+                        move_cards([(card_id, 'TO_DO', previous_id, next_id)])
+                        durations.append(time.perf_counter() - started)
+                    query_counts.append(len(queries))
+
+                durations.sort()
+                self.stdout.write(
+                    f'{size:>7} cards: median {statistics.median(durations) * 1000:.2f} ms, '
+                    f'p99 {durations[max(int(len(durations) * 0.99) - 1, 0)] * 1000:.2f} ms, '
+                    f'{statistics.median(query_counts):.0f} queries per move'
+                )
+
+            transaction.set_rollback(True)
@@ -0,0 +1,82 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from busyboard_app.columns import column_page
+from busyboard_app.models import Board, Card, CustomUser
+from busyboard_app.search import index_cards, like_condition, search_cards, search_terms
+
+WORDS = ('release', 'bug', 'design', 'review', 'deploy', 'database', 'login', 'page', 'report', 'search', 'mobile',
+         'payment', 'email', 'export', 'import', 'cache', 'test', 'docs', 'customer', 'invoice', 'upload', 'api',
+         'dashboard', 'profile', 'settings', 'security', 'performance', 'migration', 'backup', 'onboarding')
+
+# Searched queries: a common word, a prefix, two words and a word no card contains
+QUERIES = ('release', 'pay', 'design review', 'zeppelin')
+
+# Number of cards inserted per query
+BENCHMARK_BATCH_SIZE = 5000
+
+
+class Command(BaseCommand):
+    help = ('Measures card search with the full-text search index against the LIKE search it replaced, on sample '
+            'cards spread over several boards, and the first and last pages of a board column searched by '
+            'relevance. The sample data is created in a transaction that is rolled back at the end.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--cards', type=int, default=500000, help='Total number of sample cards.')
+        parser.add_argument('--boards', type=int, default=10, help='Number of boards the cards are spread over.')
+        parser.add_argument('--repeat', type=int, default=5, help='Number of measured searches per case.')
+        parser.add_argument('--seed', type=int, default=0, help='Seed of the random generator.')
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+
+        with transaction.atomic():
+            owner = CustomUser.objects.create(username='__search_benchmark', email='owner@search-benchmark.invalid',
+                                              password='__search_benchmark')
+            boards = [
+                Board.objects.create(title=f'Search benchmark {index}', description='Search benchmark', owner=owner)
+                for index in range(options['boards'])
+            ]
+
+            started = time.perf_counter()
+            statuses = [status for status, _ in Card.STATUS_CHOICES]
+            for offset in range(0, options['cards'], BENCHMARK_BATCH_SIZE):
+                cards = Card.objects.bulk_create([
+                    Card(board=boards[index % len(boards)], creator=owner, status=rng.choice(statuses),
+                         title=' '.join(rng.choices(WORDS, k=rng.randint(2, 6))).capitalize(),
+                         description=' '.join(rng.choices(WORDS, k=rng.randint(0, 40))) or None)
+                    for index in range(offset, min(offset + BENCHMARK_BATCH_SIZE, options['cards']))
+                ])
+                index_cards(cards)
+            self.stdout.write(f'{options["cards"]} cards created and indexed in {time.perf_counter() - started:.1f} s')
+
+            board = boards[0]
+            status = statuses[0]
+            for query in QUERIES:
+                # Walk the pages of the searched column once to find the cursor of its last page
+                last_cursor = None
+                cursor = column_page(board, status, query=query)[1]
+                while cursor:
+                    last_cursor = cursor
+                    cursor = column_page(board, status, cursor, query=query)[1]
+
+                for case, search in (
+                    ('full-text', lambda: search_cards(Card.objects.filter(board=board), query)),
+                    ('LIKE', lambda: list(Card.objects.filter(board=board).filter(like_condition(search_terms(query))))),
+                    ('column', lambda: column_page(board, status, query=query)[0]),
+                    ('last page', lambda: column_page(board, status, last_cursor, query=query)[0]),
+                ):
+                    durations = []
+                    for _ in range(options['repeat']):
+                        started = time.perf_counter()
+                        results = search()
+                        durations.append(time.perf_counter() - started)
+                    self.stdout.write(f'{query!r:<16} {case:<10} {len(results):>7} cards: '
+                                      f'median {statistics.median(durations) * 1000:.0f} ms, '
+                                      f'min {min(durations) * 1000:.0f} ms')
+
+            transaction.set_rollback(True)
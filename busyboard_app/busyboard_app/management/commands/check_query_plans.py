@@ -0,0 +1,130 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+
+from busyboard_app.models import Board, Card, CustomUser
+
+
+class Command(BaseCommand):
+    help = ('Requests every board and card view with sample data, runs EXPLAIN on the queries they issue '
+            'and fails if any of them scans a whole table.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verbose-plans', action='store_true', help='Print the query plan of every query.')
+
+    def handle(self, *args, **options):
+        if connection.vendor not in ('sqlite', 'postgresql'):
+            raise CommandError(f'Query plans cannot be checked on {connection.vendor}.')
+
+        full_scans = []
+        checked = 0
+
+        # Create the sample data in a transaction that is rolled back at the end
+        with transaction.atomic(), override_settings(ALLOWED_HOSTS=['*']):
+            for view, queries in self._capture_view_queries():
+                for sql in queries:
+                    plan = self._explain(sql)
+                    checked += 1
+
+                    if options['verbose_plans']:
+                        self.stdout.write(f'{view}: {sql}\n    ' + '\n    '.join(plan))
+
+                    scans = [line for line in plan if self._is_full_scan(line)]
+                    if scans:
+                        full_scans.append((view, sql, scans))
+
+            transaction.set_rollback(True)
+
+        for view, sql, scans in full_scans:
+            self.stdout.write(self.style.ERROR(f'{view}: full scan in {sql}'))
+            for line in scans:
+                self.stdout.write(f'    {line}')
+
+        if full_scans:
+            raise CommandError(f'{len(full_scans)} of {checked} queries scan a whole table.')
+
+        self.stdout.write(self.style.SUCCESS(f'{checked} queries checked, no full table scans.'))
+
+    def _capture_view_queries(self):
+        """
+        Requests the board and card views as a board owner and yields the SELECT queries each of them issues.
+        """
+
+        owner = CustomUser.objects.create(username='__query_plan_owner', email='owner@query-plan.invalid',
+                                          password='__query_plan')
+        member = CustomUser.objects.create(username='__query_plan_member', email='member@query-plan.invalid',
+                                           password='__query_plan')
+        board = Board.objects.create(title='Query plan', description='Query plan', owner=owner)
+        board.users.add(member)
+        board.invited_users.add(member)
+        cards = [
+            Card.objects.create(board=board, title=f'Card {status}', description='Query plan', creator=owner,
+                                status=status)
+            for status, _ in Card.STATUS_CHOICES
+        ]
+
+        client = Client()
+        client.force_login(owner)
+        next_cursor = client.get(reverse('api_board_cards', args=[board.id]), {'limit': 1}).json()['next_cursor']
+
+        requests = [
+            ('my_boards', 'get', reverse('my_boards'), None),
+            ('board_details', 'get', reverse('board_details', args=[board.id, board.slug]), None),
+            ('board_details search', 'get', reverse('board_details', args=[board.id, board.slug]), {'search': 'query'}),
+            ('board_column', 'get', reverse('board_column', args=[board.id, board.slug, 'TO_DO']),
+             {'cursor': f'{cards[0].rank}:{cards[0].id}'}),
+            ('board_archive', 'get', reverse('board_archive', args=[board.id, board.slug]), None),
+            ('board_archive search', 'get', reverse('board_archive', args=[board.id, board.slug]), {'search': 'query'}),
+            ('get_card_details', 'get', reverse('get_card_details', args=[cards[0].id]), None),
+            ('edit_board', 'get', reverse('edit_board', args=[board.id]), None),
+            ('invite_to_board', 'get', reverse('invite_to_board', args=[board.id, board.slug]), None),
+            ('update_card_statuses', 'post', reverse('update_card_statuses'), {'moves': json.dumps([
+                {'card_id': cards[0].id, 'status': 'DONE', 'previous_id': cards[2].id},
+            ])}),
+            ('export_board_to_json', 'get', reverse('export_board_to_json', args=[board.id]), None),
+            ('api_boards', 'get', reverse('api_boards'), None),
+            ('api_board_members', 'get', reverse('api_board_members', args=[board.id]), None),
+            ('api_board_cards', 'get', reverse('api_board_cards', args=[board.id]), {'limit': 1}),
+            ('api_board_cards next page', 'get', reverse('api_board_cards', args=[board.id]),
+             {'limit': 1, 'cursor': next_cursor}),
+            ('api_card', 'get', reverse('api_card', args=[cards[0].id]), None),
+        ]
+
+        for view, method, url, data in requests:
+            with CaptureQueriesContext(connection) as context:
+                response = getattr(client, method)(url, data)
+                if response.streaming:
+                    b''.join(response.streaming_content)
+
+            yield view, [
+                query['sql'] for query in context.captured_queries
+                if query['sql'].lstrip().upper().startswith('SELECT')
+            ]
+
+    def _explain(self, sql):
+        """
+        Returns the query plan of a query as a list of lines.
+        """
+
+        with connection.cursor() as cursor:
+            if connection.vendor == 'sqlite':
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+                return [row[-1] for row in cursor.fetchall()]
+
+            # Make the planner use an index whenever one exists, whatever the size of the sample tables
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            cursor.execute(f'EXPLAIN {sql}')
+            return [row[0] for row in cursor.fetchall()]
+
+    def _is_full_scan(self, line):
+        """
+        Tells whether a line of a query plan reads a whole table.
+        """
+
+        if connection.vendor == 'sqlite':
+            return line.startswith('SCAN ') and 'INDEX' not in line
+        return 'Seq Scan' in line
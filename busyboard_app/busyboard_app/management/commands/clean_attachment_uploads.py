@@ -0,0 +1,25 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from busyboard_app.attachments import discard_upload
+from busyboard_app.models import AttachmentUpload
+
+
+class Command(BaseCommand):
+    help = 'Deletes the resumable attachment uploads that were abandoned or never attached to a card.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--max-age-hours', type=float, default=24,
+                            help='Number of hours without progress after which an upload is deleted.')
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(hours=options['max_age_hours'])
+
+        deleted = 0
+        for upload in AttachmentUpload.objects.filter(update_datetime__lt=cutoff).iterator():
+            discard_upload(upload)
+            deleted += 1
+
+        self.stdout.write(self.style.SUCCESS(f'{deleted} uploads deleted.'))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from busyboard_app.changes import CHANGE_LOG_RETENTION_DAYS, compact_changes
+
+
+class Command(BaseCommand):
+    help = ('Deletes the board change log entries replaced by a newer change of the same object, and those '
+            'older than the retention period.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--retention-days', type=int, default=CHANGE_LOG_RETENTION_DAYS,
+                            help='Number of days the changes are kept.')
+
+    def handle(self, *args, **options):
+        deleted = compact_changes(options['retention_days'])
+
+        self.stdout.write(self.style.SUCCESS(f'{deleted} changes deleted.'))
@@ -0,0 +1,194 @@
+import random
+import time
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from busyboard_app.attachments import store_attachment
+from busyboard_app.counters import reconcile_board_counters
+from busyboard_app.models import Board, Card, CustomUser
+from busyboard_app.search import index_cards
+from busyboard_app.statistics import rebuild_board_statistics
+
+# Share of the cards in every column and of the cards of every priority
+STATUS_WEIGHTS = {'TO_DO': 3, 'IN_PROGRESS': 1, 'DONE': 6}
+PRIORITY_WEIGHTS = {'LOW': 2, 'MEDIUM': 5, 'HIGH': 1}
+
+# Number of distinct attachment files, shared by the cards like repeated uploads of the same documents
+ATTACHMENT_FILES = 20
+
+# Number of cards inserted per query
+GENERATE_BATCH_SIZE = 1000
+
+WORDS = ('release', 'bug', 'design', 'review', 'deploy', 'database', 'login', 'page', 'report', 'search', 'mobile',
+         'payment', 'email', 'export', 'import', 'cache', 'test', 'docs', 'customer', 'invoice', 'upload', 'api',
+         'dashboard', 'profile', 'settings', 'security', 'performance', 'migration', 'backup', 'onboarding')
+
+
+class Command(BaseCommand):
+    help = ('Generates a synthetic dataset for load tests: users sharing one password, boards whose sizes follow '
+            'a long-tailed distribution, cards across statuses updated over the past year, and attachments. '
+            'The users are named <prefix>0, <prefix>1, ... and can sign in to the load_test command.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100, help='Number of users.')
+        parser.add_argument('--boards', type=int, default=200, help='Number of boards.')
+        parser.add_argument('--cards', type=int, default=50000, help='Total number of cards.')
+        parser.add_argument('--members', type=int, default=5, help='Average number of members invited to a board.')
+        parser.add_argument('--skew', type=float, default=1.2,
+                            help='Shape of the board size distribution, lower values make the largest boards '
+                                 'larger.')
+        parser.add_argument('--attachments', type=float, default=0.05, help='Share of the cards with an attachment.')
+        parser.add_argument('--days', type=int, default=365, help='Number of days the card updates are spread over.')
+        parser.add_argument('--prefix', default='loaduser', help='Prefix of the usernames.')
+        parser.add_argument('--password', default='busyboard-load', help='Password of every user.')
+        parser.add_argument('--seed', type=int, default=0, help='Seed of the random generator.')
+        parser.add_argument('--clear', action='store_true',
+                            help='Delete the users with the prefix and their boards before generating.')
+
+    def handle(self, *args, **options):
+        if options['users'] < 1 or options['boards'] < 1:
+            raise CommandError('At least one user and one board are required.')
+
+        rng = random.Random(options['seed'])
+        users = CustomUser.objects.filter(username__startswith=options['prefix'])
+        if options['clear']:
+            # The boards are deleted first, so that their cards are removed along with them rather than one by one
+            for board in Board.objects.filter(owner__in=users).iterator():
+                board.delete()
+            deleted = users.count()
+            users.delete()
+            self.stdout.write(f'{deleted} existing users deleted')
+        elif users.exists():
+            raise CommandError(f'Users named {options["prefix"]}* already exist, pass --clear to replace them.')
+
+        started = time.perf_counter()
+        with transaction.atomic():
+            users = self._create_users(options['users'], options['prefix'], options['password'])
+            boards = self._create_boards(rng, users, options['boards'], options['members'])
+            card_count = self._create_cards(rng, boards, options)
+
+            for board in boards:
+                rebuild_board_statistics(board)
+            reconcile_board_counters(Board.objects.filter(id__in=[board.id for board in boards]))
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(users)} users, {len(boards)} boards and {card_count} cards generated in '
+            f'{time.perf_counter() - started:.1f} s, password {options["password"]!r}.'
+        ))
+
+    def _create_users(self, count, prefix, password):
+        # The password is hashed once, hashing it per user would take most of the time
+        password = make_password(password)
+        return CustomUser.objects.bulk_create([
+            CustomUser(username=f'{prefix}{index}', email=f'{prefix}{index}@load-test.invalid', password=password,
+                       first_name='Load', last_name=f'User {index}')
+            for index in range(count)
+        ])
+
+    def _create_boards(self, rng, users, count, members):
+        boards = Board.objects.bulk_create([
+            Board(title=f'{rng.choice(WORDS).capitalize()} board {index}', description='Generated for load tests',
+                  owner=users[index % len(users)], slug=f'load-board-{index}',
+                  color=f'#{rng.randrange(0x1000000):06X}')
+            for index in range(count)
+        ])
+
+        # The invitations fill both membership relations, as the invite view does
+        memberships = set()
+        for board in boards:
+            for user in rng.sample(users, min(len(users), rng.randint(0, 2 * members))):
+                if user.id != board.owner_id:
+                    memberships.add((board.id, user.id))
+        Board.users.through.objects.bulk_create(
+            [Board.users.through(board_id=board_id, customuser_id=user_id) for board_id, user_id in memberships],
+            batch_size=GENERATE_BATCH_SIZE,
+        )
+        CustomUser.boards.through.objects.bulk_create(
+            [CustomUser.boards.through(board_id=board_id, customuser_id=user_id) for board_id, user_id in memberships],
+            batch_size=GENERATE_BATCH_SIZE,
+        )
+
+        return boards
+
+    def _board_sizes(self, rng, board_count, card_count, skew):
+        # Pareto weights give a few large boards and a long tail of small ones
+        weights = [rng.paretovariate(skew) for _ in range(board_count)]
+        total = sum(weights)
+        sizes = [int(card_count * weight / total) for weight in weights]
+        for index in rng.sample(range(board_count), card_count - sum(sizes)):
+            sizes[index] += 1
+        return sizes
+
+    def _attachment_files(self, rng):
+        return [
+            (f'{rng.choice(WORDS)}-{index}.txt', ContentFile(rng.randbytes(rng.randint(1024, 64 * 1024))))
+            for index in range(ATTACHMENT_FILES)
+        ]
+
+    def _create_cards(self, rng, boards, options):
+        now = timezone.now()
+        statuses, status_weights = zip(*STATUS_WEIGHTS.items())
+        priorities, priority_weights = zip(*PRIORITY_WEIGHTS.items())
+        members = {board.id: [board.owner_id] for board in boards}
+        for board_id, user_id in Board.users.through.objects.filter(
+            board_id__in=members
+        ).values_list('board_id', 'customuser_id'):
+            members[board_id].append(user_id)
+        files = self._attachment_files(rng) if options['attachments'] > 0 else []
+
+        sizes = self._board_sizes(rng, len(boards), options['cards'], options['skew'])
+        self.stdout.write(f'board sizes: largest {max(sizes)}, median {sorted(sizes)[len(sizes) // 2]} cards')
+
+        created = 0
+        batch = []
+
+        def flush():
+            nonlocal batch
+            # bulk_create() sets the automatic datetimes to now, the generated ones are written afterwards
+            datetimes = [(card.create_datetime, card.update_datetime) for card in batch]
+            cards = Card.objects.bulk_create(batch)
+            for card, (create_datetime, update_datetime) in zip(cards, datetimes):
+                card.create_datetime, card.update_datetime = create_datetime, update_datetime
+                # The done cards were completed on their last update
+                card.update_done_datetime(update_datetime)
+            Card.objects.bulk_update(cards, ['create_datetime', 'update_datetime', 'done_datetime'])
+            index_cards(cards)
+            batch = []
+
+        for board, size in zip(boards, sizes):
+            for index in range(size):
+                update_datetime = now - timedelta(seconds=rng.randrange(options['days'] * 24 * 60 * 60))
+                attachment, attachment_filename = None, ''
+                if files and rng.random() < options['attachments']:
+                    attachment_filename, content = rng.choice(files)
+                    attachment = store_attachment(content, attachment_filename)
+
+                batch.append(Card(
+                    board=board,
+                    title=' '.join(rng.choices(WORDS, k=rng.randint(2, 6))).capitalize(),
+                    description=' '.join(rng.choices(WORDS, k=rng.randint(0, 40))) or None,
+                    creator_id=rng.choice(members[board.id]),
+                    priority=rng.choices(priorities, priority_weights)[0],
+                    status=rng.choices(statuses, status_weights)[0],
+                    attachment=attachment,
+                    attachment_filename=attachment_filename,
+                    color=rng.choice(('#4C5251', '#323232', '#034649', '#2B3C4A', '#494E13', '#544545')),
+                    create_datetime=update_datetime - timedelta(seconds=rng.randrange(30 * 24 * 60 * 60)),
+                    update_datetime=update_datetime,
+                    rank=rng.randrange(-2 ** 50, 2 ** 50),
+                ))
+
+                if len(batch) >= GENERATE_BATCH_SIZE:
+                    created += len(batch)
+                    flush()
+
+        if batch:
+            created += len(batch)
+            flush()
+
+        return created
@@ -0,0 +1,51 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from busyboard_app.models import CustomUser
+from busyboard_app.thumbnails import (
+    THUMBNAIL_BATCH_SIZE, generate_pending_thumbnails, generate_profile_photo_thumbnails,
+)
+
+
+class Command(BaseCommand):
+    help = ('Generates the thumbnails of the profile photos uploaded since their thumbnails were last generated. '
+            'Run it with --loop as a worker, the uploads only queue their photo.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Regenerate the thumbnails of every profile photo.')
+        parser.add_argument('--batch-size', type=int, default=THUMBNAIL_BATCH_SIZE,
+                            help='Number of users processed per batch.')
+        parser.add_argument('--loop', action='store_true',
+                            help='Keep polling for new photos instead of exiting once they all have thumbnails.')
+        parser.add_argument('--interval', type=float, default=5,
+                            help='Number of seconds to wait between polls when no photo is waiting.')
+
+    def handle(self, *args, **options):
+        if options['all']:
+            self._generate_all()
+            return
+
+        # Photos that cannot be read are reported once and not retried until they are replaced
+        while True:
+            generated, failed = generate_pending_thumbnails(options['batch_size'])
+            for user in failed:
+                self.stdout.write(self.style.WARNING(f'The profile photo of "{user}" could not be read.'))
+
+            if generated or failed:
+                self.stdout.write(f'Thumbnails generated for {generated} users, {len(failed)} failed.')
+            elif options['loop']:
+                time.sleep(options['interval'])
+            else:
+                break
+
+    def _generate_all(self):
+        generated = failed = 0
+        for user in CustomUser.objects.exclude(profile_photo='').only('id', 'username', 'profile_photo').iterator():
+            if generate_profile_photo_thumbnails(user):
+                generated += 1
+            else:
+                failed += 1
+                self.stdout.write(self.style.WARNING(f'The profile photo of "{user}" could not be read.'))
+
+        self.stdout.write(self.style.SUCCESS(f'Thumbnails generated for {generated} users, {failed} failed.'))
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from busyboard_app.imports import IMPORT_BATCH_SIZE, BoardImportError, import_board
+from busyboard_app.models import CustomUser
+
+
+class Command(BaseCommand):
+    help = 'Imports a board from a JSON or NDJSON board export (optionally gzip-compressed).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('file', help='Path of the exported board file.')
+        parser.add_argument('owner', help='Username of the owner of the imported board.')
+        parser.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE,
+                            help='Number of cards inserted per batch.')
+
+    def handle(self, *args, **options):
+        try:
+            owner = CustomUser.objects.get(username=options['owner'])
+        except CustomUser.DoesNotExist:
+            raise CommandError(f'User "{options["owner"]}" does not exist.')
+
+        def progress(imported):
+            self.stdout.write(f'{imported} cards imported')
+
+        try:
+            with open(options['file'], 'rb') as file:
+                board, imported = import_board(file, owner, batch_size=options['batch_size'], progress=progress)
+        except (OSError, BoardImportError) as error:
+            raise CommandError(f'The board could not be imported: {error}')
+
+        self.stdout.write(self.style.SUCCESS(f'Imported board "{board}" (#{board.id}) with {imported} cards.'))
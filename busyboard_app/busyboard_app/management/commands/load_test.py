@@ -0,0 +1,223 @@
+import html
+import http.cookiejar
+import json
+import math
+import random
+import re
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+
+from busyboard_app.models import Card, CustomUser
+from busyboard_app.permissions import accessible_boards
+
+# Words searched on the boards, found in the titles of the generated cards
+SEARCH_WORDS = ('release', 'bug', 'design', 'review', 'deploy', 'database', 'search', 'payment', 'export', 'cache')
+
+# Number of cards moved per drag and drop
+CARDS_PER_DRAG = 2
+
+# Seconds a request may take before it counts as an error
+REQUEST_TIMEOUT = 60
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    # Redirects are measured as responses of their own, like the browser's first request
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class _Session:
+    """
+    A signed-in user browsing the server, recording the duration of every request by endpoint.
+    """
+
+    def __init__(self, base_url, results):
+        self.base_url = base_url.rstrip('/')
+        self.results = results
+        self.cookies = http.cookiejar.CookieJar()
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(self.cookies), _NoRedirect)
+
+    def request(self, endpoint, path, data=None, params=None):
+        """
+        Sends a request and records its duration under the endpoint name.
+
+        Args:
+            endpoint (str): The name the request is reported under.
+            path (str): The path of the URL.
+            data (dict): The form fields of a POST request, or None for a GET request.
+            params (dict): The query string parameters.
+
+        Returns:
+            tuple: The status code and the body of the response, or None and an empty body if it failed.
+        """
+
+        url = self.base_url + path
+        if params:
+            url += '?' + urllib.parse.urlencode(params)
+        body = urllib.parse.urlencode(data).encode() if data is not None else None
+        request = urllib.request.Request(url, data=body, headers={'Referer': url})
+
+        started = time.perf_counter()
+        try:
+            with self.opener.open(request, timeout=REQUEST_TIMEOUT) as response:
+                status, content = response.status, response.read()
+        except urllib.error.HTTPError as error:
+            status, content = error.code, error.read()
+        except OSError:
+            status, content = None, b''
+        self.results.record(endpoint, time.perf_counter() - started, status is None or status >= 400)
+
+        return status, content.decode(errors='replace')
+
+    def csrf_token(self):
+        # The token of the CSRF cookie set by the server, sent back with the POST requests of the pages
+        return next((cookie.value for cookie in self.cookies if cookie.name == 'csrftoken'), '')
+
+    def sign_in(self, username, password):
+        _, page = self.request('sign_in (form)', reverse('sign_in'))
+        token = re.search(r'name="csrfmiddlewaretoken" value="([^"]+)"', page)
+        status, _ = self.request('sign_in', reverse('sign_in'), {
+            'csrfmiddlewaretoken': token.group(1) if token else '',
+            'username': username,
+            'password': password,
+        })
+        # A successful sign in redirects to the boards of the user
+        return status == 302
+
+
+class _Results:
+    """
+    The durations and errors of the requests of all sessions, by endpoint.
+    """
+
+    def __init__(self):
+        self.durations = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.lock = threading.Lock()
+
+    def record(self, endpoint, duration, error):
+        with self.lock:
+            self.durations[endpoint].append(duration)
+            if error:
+                self.errors[endpoint] += 1
+
+
+def _percentile(durations, fraction):
+    # Nearest-rank percentile of sorted durations
+    return durations[max(math.ceil(len(durations) * fraction) - 1, 0)]
+
+
+class Command(BaseCommand):
+    help = ('Runs scripted user sessions against a running server, e.g. "manage.py runserver --noreload" or a '
+            'production-like server, and reports the latency percentiles and the throughput of every endpoint. '
+            'Every session signs in as one of the users created by generate_dataset and repeatedly opens its '
+            'boards, opens a board, searches it, scrolls a column, drags cards, opens a card and exports the board.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000', help='Base URL of the server.')
+        parser.add_argument('--sessions', type=int, default=10, help='Number of concurrent user sessions.')
+        parser.add_argument('--duration', type=float, default=60, help='Number of seconds the sessions run for.')
+        parser.add_argument('--think-time', type=float, default=0,
+                            help='Number of seconds a session waits between two requests.')
+        parser.add_argument('--prefix', default='loaduser', help='Prefix of the usernames of the sessions.')
+        parser.add_argument('--password', default='busyboard-load', help='Password of the users.')
+        parser.add_argument('--seed', type=int, default=0, help='Seed of the random generator.')
+
+    def handle(self, *args, **options):
+        # Read the boards each user can open, the sessions only talk to the server afterwards
+        users = []
+        for user in CustomUser.objects.filter(username__startswith=options['prefix']).order_by('id'):
+            boards = list(accessible_boards(user).values_list('id', 'slug'))
+            if boards:
+                users.append((user.username, boards))
+        if not users:
+            raise CommandError(f'No user named {options["prefix"]}* has a board, run generate_dataset first.')
+
+        results = _Results()
+        deadline = time.perf_counter() + options['duration']
+        started = time.perf_counter()
+
+        with ThreadPoolExecutor(max_workers=options['sessions']) as executor:
+            sessions = [
+                executor.submit(self._run_session, options, results, deadline, random.Random(options['seed'] + index),
+                                *users[index % len(users)])
+                for index in range(options['sessions'])
+            ]
+            iterations = sum(session.result() for session in sessions)
+
+        elapsed = time.perf_counter() - started
+        self._report(results, elapsed, iterations)
+
+    def _run_session(self, options, results, deadline, rng, username, boards):
+        """
+        Signs in and runs the scripted session until the deadline, returning the number of completed iterations.
+        """
+
+        session = _Session(options['url'], results)
+        if not session.sign_in(username, options['password']):
+            self.stderr.write(f'{username} could not sign in to {options["url"]}')
+            return 0
+
+        def step(endpoint, path, data=None, params=None):
+            if options['think_time']:
+                time.sleep(options['think_time'])
+            return session.request(endpoint, path, data, params)
+
+        iterations = 0
+        while time.perf_counter() < deadline:
+            board_id, slug = rng.choice(boards)
+
+            step('my_boards', reverse('my_boards'))
+            _, page = step('board_details', reverse('board_details', args=[board_id, slug]))
+            step('board_details (search)', reverse('board_details', args=[board_id, slug]),
+                 params={'search': rng.choice(SEARCH_WORDS)})
+
+            # Scroll one of the columns that have more cards than the page shows
+            cursors = re.findall(r'data-next-cursor="([^"]+)"\s+data-page-url="([^"]+)"', page)
+            if cursors:
+                cursor, url = rng.choice(cursors)
+                step('board_column', html.unescape(url), params={'cursor': html.unescape(cursor)})
+
+            card_ids = [int(card_id) for card_id in re.findall(r'data-card-id="(\d+)"', page)]
+            if card_ids:
+                moves = [
+                    {'card_id': card_id, 'status': rng.choice(Card.STATUS_CHOICES)[0]}
+                    for card_id in rng.sample(card_ids, min(CARDS_PER_DRAG, len(card_ids)))
+                ]
+                step('update_card_statuses', reverse('update_card_statuses'),
+                     {'moves': json.dumps(moves), 'csrfmiddlewaretoken': session.csrf_token()})
+                step('get_card_details', reverse('get_card_details', args=[rng.choice(card_ids)]))
+
+            step('export_board_to_json', reverse('export_board_to_json', args=[board_id]))
+            iterations += 1
+
+        return iterations
+
+    def _report(self, results, elapsed, iterations):
+        self.stdout.write(f'{iterations} session iterations in {elapsed:.1f} s')
+        self.stdout.write(
+            f'{"endpoint":<26} {"requests":>8} {"errors":>6} {"req/s":>8} '
+            f'{"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8} {"max ms":>8}'
+        )
+
+        total = 0
+        for endpoint, durations in sorted(results.durations.items()):
+            durations.sort()
+            total += len(durations)
+            self.stdout.write(
+                f'{endpoint:<26} {len(durations):>8} {results.errors[endpoint]:>6} {len(durations) / elapsed:>8.1f} '
+                f'{_percentile(durations, 0.5) * 1000:>8.1f} {_percentile(durations, 0.95) * 1000:>8.1f} '
+                f'{_percentile(durations, 0.99) * 1000:>8.1f} {durations[-1] * 1000:>8.1f}'
+            )
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{total} requests, {sum(results.errors.values())} errors, {total / elapsed:.1f} req/s'
+        ))
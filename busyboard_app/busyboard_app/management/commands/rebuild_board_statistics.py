@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from busyboard_app.models import Board
+from busyboard_app.statistics import rebuild_board_statistics
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the daily completion statistics of boards from their done cards.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('board_ids', nargs='*', type=int, help='IDs of the boards to rebuild (all by default).')
+
+    def handle(self, *args, **options):
+        boards = Board.objects.all()
+        if options['board_ids']:
+            boards = boards.filter(id__in=options['board_ids'])
+
+        for board in boards.iterator():
+            # Recompute the rollup rows of the board from its cards
+            rows = rebuild_board_statistics(board)
+            self.stdout.write(f'{board} (#{board.id}): {rows} daily rows rebuilt')
+
+        self.stdout.write(self.style.SUCCESS('Board statistics rebuilt.'))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from busyboard_app.search import rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the full-text search index of the cards.'
+
+    def handle(self, *args, **options):
+        rebuild_search_index()
+        self.stdout.write(self.style.SUCCESS('Card search index rebuilt.'))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from busyboard_app.counters import reconcile_board_counters
+from busyboard_app.models import Board
+
+
+class Command(BaseCommand):
+    help = 'Recounts the members and the cards of boards, repairing the counters that drifted.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('board_ids', nargs='*', type=int, help='IDs of the boards to recount (all by default).')
+
+    def handle(self, *args, **options):
+        boards = Board.objects.all()
+        if options['board_ids']:
+            boards = boards.filter(id__in=options['board_ids'])
+
+        repaired = reconcile_board_counters(boards)
+        self.stdout.write(self.style.SUCCESS(f'{repaired} board counters repaired.'))
@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from busyboard_app.mail import OUTBOX_BATCH_SIZE, OUTBOX_MAX_ATTEMPTS, deliver_queued_emails
+
+
+class Command(BaseCommand):
+    help = 'Sends the emails queued in the outbox, retrying failed ones with an exponential backoff.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=OUTBOX_BATCH_SIZE,
+                            help='Number of emails sent over one connection.')
+        parser.add_argument('--max-attempts', type=int, default=OUTBOX_MAX_ATTEMPTS,
+                            help='Number of attempts after which an email is marked as failed.')
+        parser.add_argument('--loop', action='store_true',
+                            help='Keep polling the outbox instead of exiting once it is empty.')
+        parser.add_argument('--interval', type=float, default=5,
+                            help='Number of seconds to wait between polls when the outbox is empty.')
+
+    def handle(self, *args, **options):
+        while True:
+            sent, failed = deliver_queued_emails(options['batch_size'], options['max_attempts'])
+
+            if sent or failed:
+                self.stdout.write(f'{sent} emails sent, {failed} failed')
+            elif options['loop']:
+                time.sleep(options['interval'])
+            else:
+                break
@@ -0,0 +1,105 @@
+# Generated by Django 4.2.2 on 2026-10-16 23:39
+
+import busyboard_app.models
+from django.conf import settings
+import django.contrib.auth.models
+import django.contrib.auth.validators
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CustomUser',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('password', models.CharField(max_length=128, verbose_name='password')),
+                ('last_login', models.DateTimeField(blank=True, null=True, verbose_name='last login')),
+                ('is_superuser', models.BooleanField(default=False, help_text='Designates that this user has all permissions without explicitly assigning them.', verbose_name='superuser status')),
+                ('username', models.CharField(error_messages={'unique': 'A user with that username already exists.'}, help_text='Required. 150 characters or fewer. Letters, digits and @/./+/-/_ only.', max_length=150, unique=True, validators=[django.contrib.auth.validators.UnicodeUsernameValidator()], verbose_name='username')),
+                ('is_staff', models.BooleanField(default=False, help_text='Designates whether the user can log into this admin site.', verbose_name='staff status')),
+                ('is_active', models.BooleanField(default=True, help_text='Designates whether this user should be treated as active. Unselect this instead of deleting accounts.', verbose_name='active')),
+                ('date_joined', models.DateTimeField(default=django.utils.timezone.now, verbose_name='date joined')),
+                ('first_name', models.CharField(max_length=50)),
+                ('last_name', models.CharField(max_length=50)),
+                ('email', models.EmailField(max_length=254, unique=True)),
+                ('profile_photo', models.ImageField(upload_to='busyboard_app/profile_photos/')),
+            ],
+            options={
+                'verbose_name': 'user',
+                'verbose_name_plural': 'users',
+                'abstract': False,
+            },
+            managers=[
+                ('objects', django.contrib.auth.models.UserManager()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Board',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=200)),
+                ('description', models.CharField(max_length=500)),
+                ('slug', models.SlugField()),
+                ('color', models.CharField(default='#FFFFFF', max_length=7)),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+                ('users', models.ManyToManyField(related_name='invited_boards', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='customuser',
+            name='boards',
+            field=models.ManyToManyField(related_name='invited_users', to='busyboard_app.board'),
+        ),
+        migrations.AddField(
+            model_name='customuser',
+            name='groups',
+            field=models.ManyToManyField(blank=True, related_name='customuser_set', to='auth.group', verbose_name='groups'),
+        ),
+        migrations.AddField(
+            model_name='customuser',
+            name='user_permissions',
+            field=models.ManyToManyField(blank=True, related_name='customuser_set', to='auth.permission', verbose_name='user permissions'),
+        ),
+        migrations.CreateModel(
+            name='Card',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=150)),
+                ('description', models.TextField(null=True)),
+                ('priority', models.CharField(choices=[('LOW', 'Low'), ('MEDIUM', 'Medium'), ('HIGH', 'High')], default='MEDIUM', max_length=6, null=True)),
+                ('attachment', models.FileField(null=True, upload_to='busyboard_app/files/')),
+                ('create_datetime', models.DateTimeField(auto_now_add=True)),
+                ('update_datetime', models.DateTimeField(auto_now=True)),
+                ('status', models.CharField(choices=[('TO_DO', 'To Do'), ('IN_PROGRESS', 'In Progress'), ('DONE', 'Done')], default='TO_DO', max_length=12)),
+                ('color', models.CharField(default='#FFFFFF', max_length=7, null=True)),
+                ('rank', models.BigIntegerField(default=busyboard_app.models.default_card_rank)),
+                ('board', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='busyboard_app.board')),
+                ('creator', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['board', 'status', 'rank'], name='card_board_status_rank_idx'), models.Index(fields=['board', 'status', 'create_datetime'], name='card_board_status_created_idx'), models.Index(fields=['board', 'status', 'update_datetime'], name='card_board_status_updated_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='BoardDailyStatistics',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('done_count', models.PositiveIntegerField(default=0)),
+                ('board', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_statistics', to='busyboard_app.board')),
+            ],
+            options={
+                'unique_together': {('board', 'date')},
+            },
+        ),
+    ]
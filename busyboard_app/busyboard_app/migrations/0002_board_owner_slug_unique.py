@@ -0,0 +1,43 @@
+# Generated by Django 4.2.2 on 2026-10-16 23:40
+
+from django.db import migrations, models
+
+
+def deduplicate_board_slugs(apps, schema_editor):
+    """
+    Appends a numeric suffix to the slugs that an owner uses for more than one board.
+    """
+
+    Board = apps.get_model('busyboard_app', 'Board')
+
+    taken = set()
+    duplicates = []
+    for board in Board.objects.order_by('owner_id', 'id').only('id', 'owner_id', 'slug'):
+        if (board.owner_id, board.slug) in taken:
+            duplicates.append(board)
+        taken.add((board.owner_id, board.slug))
+
+    for board in duplicates:
+        base = board.slug[:46]
+        suffix = 2
+        while (board.owner_id, f'{base}-{suffix}') in taken:
+            suffix += 1
+        board.slug = f'{base}-{suffix}'
+        taken.add((board.owner_id, board.slug))
+
+    Board.objects.bulk_update(duplicates, ['slug'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('busyboard_app', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(deduplicate_board_slugs, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='board',
+            constraint=models.UniqueConstraint(fields=('owner', 'slug'), name='board_owner_slug_unique'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.2 on 2026-10-16 23:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('busyboard_app', '0003_outgoing_email'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='profile_photo_thumbnails',
+            field=models.CharField(blank=True, editable=False, max_length=100),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.2 on 2026-10-16 23:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('busyboard_app', '0005_content_addressed_attachments'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='board',
+            name='version',
+            field=models.PositiveBigIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.2 on 2026-10-16 23:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('busyboard_app', '0006_board_version'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='card',
+            index=models.Index(fields=['board', 'create_datetime', 'id'], name='card_board_created_idx'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.2 on 2026-10-16 23:58
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('busyboard_app', '0007_card_board_created_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='board',
+            name='change_log_floor',
+            field=models.PositiveBigIntegerField(default=0, editable=False),
+        ),
+        migrations.CreateModel(
+            name='BoardChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('seq', models.PositiveBigIntegerField()),
+                ('object_type', models.CharField(choices=[('BOARD', 'Board'), ('CARD', 'Card'), ('MEMBER', 'Member')], max_length=6)),
+                ('object_id', models.BigIntegerField()),
+                ('action', models.CharField(choices=[('CREATED', 'Created'), ('UPDATED', 'Updated'), ('MOVED', 'Moved'), ('DELETED', 'Deleted'), ('ADDED', 'Added'), ('REMOVED', 'Removed')], max_length=7)),
+                ('create_datetime', models.DateTimeField(auto_now_add=True)),
+                ('board', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='changes', to='busyboard_app.board')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['board', 'object_type', 'object_id', 'seq'], name='board_change_object_idx'), models.Index(fields=['create_datetime'], name='board_change_created_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='boardchange',
+            constraint=models.UniqueConstraint(fields=('board', 'seq'), name='board_change_seq_unique'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 4.2.2 on 2026-10-17 00:13
+
+import busyboard_app.attachments
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('busyboard_app', '0008_board_change_log'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='boardchange',
+            name='action',
+            field=models.CharField(choices=[('CREATED', 'Created'), ('UPDATED', 'Updated'), ('MOVED', 'Moved'), ('DELETED', 'Deleted'), ('ARCHIVED', 'Archived'), ('ADDED', 'Added'), ('REMOVED', 'Removed')], max_length=8),
+        ),
+        migrations.CreateModel(
+            name='ArchivedCard',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('title', models.CharField(max_length=150)),
+                ('description', models.TextField(null=True)),
+                ('priority', models.CharField(choices=[('LOW', 'Low'), ('MEDIUM', 'Medium'), ('HIGH', 'High')], max_length=6, null=True)),
+                ('attachment', busyboard_app.attachments.BlobFileField(filename_field='attachment_filename', null=True, upload_to='busyboard_app/files/')),
+                ('attachment_filename', models.CharField(blank=True, max_length=255)),
+                ('color', models.CharField(max_length=7, null=True)),
+                ('create_datetime', models.DateTimeField()),
+                ('update_datetime', models.DateTimeField()),
+                ('archive_datetime', models.DateTimeField(auto_now_add=True)),
+                ('board', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_cards', to='busyboard_app.board')),
+                ('creator', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['board', '-update_datetime', '-id'], name='archived_card_board_done_idx')],
+            },
+        ),
+    ]
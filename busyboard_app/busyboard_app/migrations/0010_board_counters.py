@@ -0,0 +1,60 @@
+# Generated by Django 4.2.2 on 2026-10-17 00:16
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def count_board_members_and_cards(apps, schema_editor):
+    """
+    Fills the counters of the existing boards with two grouped queries.
+    """
+
+    Board = apps.get_model('busyboard_app', 'Board')
+    Card = apps.get_model('busyboard_app', 'Card')
+    fields = {'TO_DO': 'todo_card_count', 'IN_PROGRESS': 'in_progress_card_count', 'DONE': 'done_card_count'}
+
+    counts = {}
+    for board_id, member_count in (
+        Board.users.through.objects.values('board_id').annotate(count=Count('*')).values_list('board_id', 'count')
+    ):
+        counts.setdefault(board_id, {})['member_count'] = member_count
+    for board_id, status, card_count in (
+        Card.objects.values('board_id', 'status').annotate(count=Count('*')).values_list('board_id', 'status', 'count')
+    ):
+        if status in fields:
+            counts.setdefault(board_id, {})[fields[status]] = card_count
+
+    # The boards without members or cards keep the default counts of 0
+    boards = [Board(id=board_id, **board_counts) for board_id, board_counts in counts.items()]
+    Board.objects.bulk_update(boards, ['member_count', *fields.values()], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('busyboard_app', '0009_archived_card'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='board',
+            name='done_card_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='board',
+            name='in_progress_card_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='board',
+            name='member_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='board',
+            name='todo_card_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(count_board_members_and_cards, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 4.2.2 on 2026-10-17 00:28
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def stamp_done_cards(apps, schema_editor):
+    """
+    Stamps the done and archived cards with their last update, the day the statistics counted them on.
+    """
+
+    apps.get_model('busyboard_app', 'Card').objects.filter(status='DONE').update(done_datetime=F('update_datetime'))
+    apps.get_model('busyboard_app', 'ArchivedCard').objects.update(done_datetime=F('update_datetime'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('busyboard_app', '0010_board_counters'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='card',
+            name='card_board_status_updated_idx',
+        ),
+        migrations.AddField(
+            model_name='archivedcard',
+            name='done_datetime',
+            field=models.DateTimeField(null=True),
+        ),
+        migrations.AddField(
+            model_name='card',
+            name='done_datetime',
+            field=models.DateTimeField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='card',
+            index=models.Index(fields=['board', 'status', 'done_datetime'], name='card_board_status_done_idx'),
+        ),
+        migrations.RunPython(stamp_done_cards, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.2 on 2026-10-17 00:35
+
+import busyboard_app.search
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('busyboard_app', '0011_card_done_datetime'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CardSearchEntry',
+            fields=[
+                ('card', models.OneToOneField(db_column='rowid', db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_entry', serialize=False, to='busyboard_app.card')),
+                ('title', models.TextField()),
+                ('description', models.TextField()),
+                ('document', busyboard_app.search.SearchDocumentField(db_column='busyboard_app_card_search')),
+            ],
+            options={
+                'db_table': 'busyboard_app_card_search',
+                'managed': False,
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.2 on 2026-10-17 00:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('busyboard_app', '0012_card_search_entry'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='boardchange',
+            name='object_type',
+            field=models.CharField(choices=[('BOARD', 'Board'), ('CARD', 'Card'), ('MEMBER', 'Member'), ('COLUMN', 'Column')], max_length=6),
+        ),
+    ]
@@ -0,0 +1,32 @@
+import os
+
+from django.core.files.storage import default_storage
+from django.db import migrations
+
+# Sizes and formats of the thumbnails when their names did not keep the extension of the photo
+OLD_THUMBNAIL_SIDES = (64, 128)
+OLD_THUMBNAIL_FORMATS = ('webp', 'jpeg')
+
+
+def queue_thumbnails(apps, schema_editor):
+    # The thumbnails are renamed by generating them again, the generate_thumbnails command picks up the users
+    CustomUser = apps.get_model('busyboard_app', 'CustomUser')
+    users = CustomUser.objects.exclude(profile_photo_thumbnails='')
+    for photo_name in users.values_list('profile_photo_thumbnails', flat=True).iterator():
+        directory, filename = os.path.split(photo_name)
+        stem = os.path.splitext(filename)[0]
+        for side in OLD_THUMBNAIL_SIDES:
+            for file_format in OLD_THUMBNAIL_FORMATS:
+                default_storage.delete(f'{directory}/thumbnails/{stem}_{side}.{file_format}')
+    users.update(profile_photo_thumbnails='')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('busyboard_app', '0013_board_change_column'),
+    ]
+
+    operations = [
+        migrations.RunPython(queue_thumbnails, migrations.RunPython.noop),
+    ]
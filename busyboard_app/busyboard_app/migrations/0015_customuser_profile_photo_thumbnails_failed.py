@@ -0,0 +1,18 @@
+# Generated by Django 4.2.2 on 2026-10-17 00:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('busyboard_app', '0014_thumbnail_names_with_extension'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='profile_photo_thumbnails_failed',
+            field=models.CharField(blank=True, editable=False, max_length=100),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.2 on 2026-10-17 01:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('busyboard_app', '0015_customuser_profile_photo_thumbnails_failed'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='archivedcard',
+            name='archived_card_board_done_idx',
+        ),
+        migrations.AddIndex(
+            model_name='archivedcard',
+            index=models.Index(fields=['board', '-done_datetime', '-id'], name='archived_card_board_done_idx'),
+        ),
+    ]
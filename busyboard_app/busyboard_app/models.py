@@ -1,15 +1,27 @@
+import time
+import uuid
+
 from django.contrib.auth.hashers import make_password
 from django.contrib.auth.models import AbstractUser
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.utils import timezone
 from django.conf import settings
 from django.utils.text import slugify
 
+from .attachments import BlobFileField
+from .search import SEARCH_TABLE, SearchDocumentField
+from .thumbnails import profile_photo_variant
+
 
 class CustomUser(AbstractUser):
     first_name = models.CharField(max_length=50)
     last_name = models.CharField(max_length=50)
     email = models.EmailField(unique=True)
     profile_photo = models.ImageField(upload_to='busyboard_app/profile_photos/')
+    # Name of the profile photo whose thumbnails have been generated
+    profile_photo_thumbnails = models.CharField(max_length=100, blank=True, editable=False)
+    # Name of the profile photo whose thumbnails could not be generated, so that it is not tried again
+    profile_photo_thumbnails_failed = models.CharField(max_length=100, blank=True, editable=False)
     boards = models.ManyToManyField('Board', related_name='invited_users')
 
     groups = models.ManyToManyField(
@@ -28,6 +40,22 @@ class CustomUser(AbstractUser):
     def __str__(self):
         return self.username
 
+    @property
+    def small_profile_photo(self):
+        """
+        Returns the URLs of the profile photo thumbnail shown on the cards.
+        """
+
+        return profile_photo_variant(self, 'small')
+
+    @property
+    def medium_profile_photo(self):
+        """
+        Returns the URLs of the profile photo thumbnail shown in the navigation bar.
+        """
+
+        return profile_photo_variant(self, 'medium')
+
     def save(self, *args, **kwargs):
         if self.pk is None:
             self.password = make_password(self.password)
@@ -35,22 +63,104 @@ class CustomUser(AbstractUser):
 
 
 class Board(models.Model):
+    # Columns maintained by UPDATE queries only
+    COUNTER_FIELDS = ('version', 'change_log_floor', 'member_count', 'todo_card_count', 'in_progress_card_count',
+                      'done_card_count')
+
     title = models.CharField(max_length=200)
     description = models.CharField(max_length=500)
     owner = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     users = models.ManyToManyField(settings.AUTH_USER_MODEL, related_name='invited_boards')
     slug = models.SlugField()
     color = models.CharField(max_length=7, default='#FFFFFF')
+    # Incremented whenever the content of the board page changes, see etags.touch_boards()
+    version = models.PositiveBigIntegerField(default=0, editable=False)
+    # Sequence number of the last change dropped from the change log, see changes.compact_changes()
+    change_log_floor = models.PositiveBigIntegerField(default=0, editable=False)
+    # Number of members and of cards in every column, kept up to date with the memberships and the cards, see
+    # counters.record_card_counts()
+    member_count = models.PositiveIntegerField(default=0, editable=False)
+    todo_card_count = models.PositiveIntegerField(default=0, editable=False)
+    in_progress_card_count = models.PositiveIntegerField(default=0, editable=False)
+    done_card_count = models.PositiveIntegerField(default=0, editable=False)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['owner', 'slug'], name='board_owner_slug_unique'),
+        ]
 
     def save(self, *args, **kwargs):
-        if not self.slug:
-            self.slug = slugify(self.title)
-        super().save(*args, **kwargs)
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            # The counters are only updated in the database, never written back from a possibly stale instance
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.COUNTER_FIELDS
+            ]
+        if self.slug and self.pk is not None:
+            super().save(*args, **kwargs)
+            return
+
+        text = self.slug or self.title
+        taken = set()
+        while True:
+            self.slug = self.unique_slug(text, taken)
+            try:
+                # The savepoint keeps the transaction of the caller usable if the insert fails
+                with transaction.atomic():
+                    super().save(*args, **kwargs)
+                return
+            except IntegrityError:
+                # Another board of the owner may have taken the slug since it was picked, then try the next one
+                if not Board.objects.filter(owner_id=self.owner_id, slug=self.slug).exclude(pk=self.pk).exists():
+                    raise
+                taken.add(self.slug)
+
+    def unique_slug(self, text, taken=()):
+        """
+        Returns a slug for the text that no other board of the owner uses.
+
+        The slugs that may collide are read with a single query and a free numeric suffix is picked from them.
+        Board.save() retries with the next free slug when a concurrent save takes it first.
+
+        Args:
+            text (str): The text to build the slug from.
+            taken (Iterable[str]): Slugs to avoid in addition to those read from the database.
+
+        Returns:
+            str: The unique slug.
+        """
+
+        max_length = self._meta.get_field('slug').max_length
+        base = slugify(text)[:max_length - 4].strip('-') or 'board'
+
+        taken = set(taken) | set(
+            Board.objects.filter(owner_id=self.owner_id, slug__startswith=base)
+            .exclude(pk=self.pk)
+            .values_list('slug', flat=True)
+        )
+        if base not in taken:
+            return base
+
+        suffix = 2
+        while f'{base}-{suffix}' in taken:
+            suffix += 1
+        return f'{base}-{suffix}'
 
     def __str__(self):
         return self.title
 
 
+def default_card_rank():
+    """
+    Returns the rank of a new card, which places it above every existing card of its column.
+
+    Returns:
+        int: The negated current time in microseconds.
+    """
+
+    return -time.time_ns() // 1000
+
+
 class Card(models.Model):
     PRIORITY_CHOICES = [
         ('LOW', 'Low'),
@@ -69,11 +179,205 @@ class Card(models.Model):
     description = models.TextField(null=True)
     creator = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, null=True)
     priority = models.CharField(max_length=6, choices=PRIORITY_CHOICES, default='MEDIUM', null=True)
-    attachment = models.FileField(upload_to='busyboard_app/files/', null=True)
+    attachment = BlobFileField(upload_to='busyboard_app/files/', null=True, filename_field='attachment_filename')
+    attachment_filename = models.CharField(max_length=255, blank=True)
     create_datetime = models.DateTimeField(auto_now_add=True)
     update_datetime = models.DateTimeField(auto_now=True)
     status = models.CharField(max_length=12, choices=STATUS_CHOICES, default='TO_DO')
     color = models.CharField(max_length=7, default='#FFFFFF', null=True)
+    rank = models.BigIntegerField(default=default_card_rank)
+    # Datetime the card was moved to 'DONE', None while it is not done, see update_done_datetime()
+    done_datetime = models.DateTimeField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            # Board columns ordered by rank
+            models.Index(fields=['board', 'status', 'rank'], name='card_board_status_rank_idx'),
+            # Board columns ordered by creation time
+            models.Index(fields=['board', 'status', 'create_datetime'], name='card_board_status_created_idx'),
+            # Board statistics and archiving of the cards done in a time window
+            models.Index(fields=['board', 'status', 'done_datetime'], name='card_board_status_done_idx'),
+            # API pages of the cards of a board, ordered by creation time
+            models.Index(fields=['board', 'create_datetime', 'id'], name='card_board_created_idx'),
+        ]
+
+    def update_done_datetime(self, now=None):
+        """
+        Stamps the datetime the card is completed when it enters 'DONE' and clears it when it leaves.
+
+        The statistics count a completion on the day it is stamped with, so editing a done card does not move it
+        to another day. Card.save() calls it, bulk writes have to call it themselves.
+
+        Args:
+            now (datetime): The datetime to stamp, the current one by default.
+        """
+
+        if self.status != 'DONE':
+            self.done_datetime = None
+        elif self.done_datetime is None:
+            self.done_datetime = now or timezone.now()
+
+    def save(self, *args, **kwargs):
+        self.update_done_datetime()
+        if kwargs.get('update_fields') is not None and 'status' in kwargs['update_fields']:
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'done_datetime'}
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return self.title
+
+
+class CardSearchEntry(models.Model):
+    # The row indexing a card in the SQLite FTS5 table, which is created and filled by search.py rather than by the
+    # migrations and does not exist on other databases. It is only read through joins from Card.search_entry.
+    card = models.OneToOneField(Card, primary_key=True, db_column='rowid', on_delete=models.DO_NOTHING,
+                                db_constraint=False, related_name='search_entry')
+    title = models.TextField()
+    description = models.TextField()
+    document = SearchDocumentField(db_column=SEARCH_TABLE)
+
+    class Meta:
+        managed = False
+        db_table = SEARCH_TABLE
+
+
+class ArchivedCard(models.Model):
+    # The ID of the card the archived card was moved from, see archive.archive_board_cards()
+    id = models.BigIntegerField(primary_key=True)
+    board = models.ForeignKey(Board, on_delete=models.CASCADE, related_name='archived_cards')
+    title = models.CharField(max_length=150)
+    description = models.TextField(null=True)
+    creator = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, null=True)
+    priority = models.CharField(max_length=6, choices=Card.PRIORITY_CHOICES, null=True)
+    attachment = BlobFileField(upload_to='busyboard_app/files/', null=True, filename_field='attachment_filename')
+    attachment_filename = models.CharField(max_length=255, blank=True)
+    color = models.CharField(max_length=7, null=True)
+    create_datetime = models.DateTimeField()
+    update_datetime = models.DateTimeField()
+    # Datetime the card was completed, counted by the board statistics. Only done cards are archived, so it is set
+    done_datetime = models.DateTimeField(null=True)
+    archive_datetime = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # Archive of a board, the most recently completed cards first
+            models.Index(fields=['board', '-done_datetime', '-id'], name='archived_card_board_done_idx'),
+        ]
 
     def __str__(self):
         return self.title
+
+
+class BoardChange(models.Model):
+    OBJECT_TYPE_CHOICES = [
+        ('BOARD', 'Board'),
+        ('CARD', 'Card'),
+        ('MEMBER', 'Member'),
+        # A whole column of cards, by the position of its status in Card.STATUS_CHOICES
+        ('COLUMN', 'Column')
+    ]
+
+    ACTION_CHOICES = [
+        ('CREATED', 'Created'),
+        ('UPDATED', 'Updated'),
+        ('MOVED', 'Moved'),
+        ('DELETED', 'Deleted'),
+        ('ARCHIVED', 'Archived'),
+        ('ADDED', 'Added'),
+        ('REMOVED', 'Removed')
+    ]
+
+    # Without a database constraint, so that changes recorded while the board is being deleted do not block it,
+    # the changes of a deleted board are removed by a signal instead
+    board = models.ForeignKey(Board, on_delete=models.DO_NOTHING, db_constraint=False, related_name='changes')
+    # Version of the board the change brought it to, increasing with every change of the board
+    seq = models.PositiveBigIntegerField()
+    object_type = models.CharField(max_length=6, choices=OBJECT_TYPE_CHOICES)
+    object_id = models.BigIntegerField()
+    action = models.CharField(max_length=8, choices=ACTION_CHOICES)
+    create_datetime = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['board', 'seq'], name='board_change_seq_unique'),
+        ]
+        indexes = [
+            # Compaction of the older changes of the same object
+            models.Index(fields=['board', 'object_type', 'object_id', 'seq'], name='board_change_object_idx'),
+            # Compaction of the changes past the retention period
+            models.Index(fields=['create_datetime'], name='board_change_created_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.board_id}#{self.seq}: {self.object_type} {self.object_id} {self.action}'
+
+
+class BoardDailyStatistics(models.Model):
+    board = models.ForeignKey(Board, on_delete=models.CASCADE, related_name='daily_statistics')
+    date = models.DateField()
+    done_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('board', 'date')
+
+    def __str__(self):
+        return f'{self.board} ({self.date}): {self.done_count} done'
+
+
+class AttachmentBlob(models.Model):
+    sha256 = models.CharField(max_length=64, unique=True)
+    name = models.CharField(max_length=100, unique=True)
+    size = models.BigIntegerField()
+    ref_count = models.PositiveIntegerField(default=0)
+    create_datetime = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f'{self.name} ({self.ref_count} references)'
+
+
+class AttachmentUpload(models.Model):
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='attachment_uploads')
+    filename = models.CharField(max_length=255)
+    size = models.BigIntegerField()
+    received = models.BigIntegerField(default=0)
+    # Name of the blob the upload has been stored as once complete
+    attachment = models.CharField(max_length=100, blank=True)
+    create_datetime = models.DateTimeField(auto_now_add=True)
+    update_datetime = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'{self.filename} ({self.received}/{self.size} bytes)'
+
+
+class OutgoingEmail(models.Model):
+    STATUS_CHOICES = [
+        ('PENDING', 'Pending'),
+        ('SENT', 'Sent'),
+        ('FAILED', 'Failed')
+    ]
+
+    subject = models.CharField(max_length=998)
+    body = models.TextField()
+    from_email = models.CharField(max_length=254)
+    to = models.JSONField(default=list)
+    cc = models.JSONField(default=list)
+    bcc = models.JSONField(default=list)
+    reply_to = models.JSONField(default=list)
+    headers = models.JSONField(default=dict)
+    alternatives = models.JSONField(default=list)
+    status = models.CharField(max_length=7, choices=STATUS_CHOICES, default='PENDING')
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    create_datetime = models.DateTimeField(auto_now_add=True)
+    next_attempt_datetime = models.DateTimeField(auto_now_add=True)
+    sent_datetime = models.DateTimeField(null=True)
+
+    class Meta:
+        indexes = [
+            # Messages due for delivery, in the order they were queued
+            models.Index(fields=['status', 'next_attempt_datetime'], name='outgoing_email_due_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.subject} ({self.get_status_display()})'
@@ -0,0 +1,183 @@
+import hmac
+from functools import wraps
+
+from django.conf import settings
+from django.db.models import Exists, OuterRef, Q
+from django.http import Http404, HttpResponseForbidden
+
+from .models import Board, Card
+
+# Roles of a user on a board
+BOARD_OWNER = 'OWNER'
+BOARD_MEMBER = 'MEMBER'
+
+
+def _membership(user_id, board_ref):
+    # Whether the user is a member of the board referenced by the outer query, on the unique membership index
+    return Exists(Board.users.through.objects.filter(board_id=OuterRef(board_ref), customuser_id=user_id))
+
+
+def _role(user_id, owner_id, is_member):
+    if owner_id == user_id:
+        return BOARD_OWNER
+    if is_member:
+        return BOARD_MEMBER
+    return None
+
+
+def _cached_roles(request):
+    # Roles of the requesting user by board ID, read at most once per request
+    if not hasattr(request, '_board_roles'):
+        request._board_roles = {}
+    return request._board_roles
+
+
+def board_roles(request, board_ids):
+    """
+    Returns the roles of the requesting user on boards.
+
+    The boards that are not cached yet are read with a single query, an indexed EXISTS on the membership table per
+    board, so the cost does not depend on the number of members. The roles are cached on the request.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+        board_ids (Iterable[int]): The IDs of the boards.
+
+    Returns:
+        dict: BOARD_OWNER, BOARD_MEMBER or None by board ID. Boards that do not exist are left out.
+    """
+
+    board_ids = {int(board_id) for board_id in board_ids}
+    roles = _cached_roles(request)
+    user_id = request.user.id
+
+    missing = board_ids - roles.keys()
+    if missing:
+        rows = Board.objects.filter(id__in=missing).values_list('id', 'owner_id', _membership(user_id, 'id'))
+        for board_id, owner_id, is_member in rows:
+            roles[board_id] = _role(user_id, owner_id, is_member)
+
+    return {board_id: roles[board_id] for board_id in board_ids if board_id in roles}
+
+
+def card_roles(request, card_ids):
+    """
+    Returns the boards of cards and the roles of the requesting user on them, with a single query.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+        card_ids (Iterable[int]): The IDs of the cards.
+
+    Returns:
+        dict: (board_id, role) tuples by card ID. Cards that do not exist are left out.
+    """
+
+    roles = _cached_roles(request)
+    user_id = request.user.id
+
+    rows = Card.objects.filter(id__in={int(card_id) for card_id in card_ids}).values_list(
+        'id', 'board_id', 'board__owner_id', _membership(user_id, 'board_id')
+    )
+
+    cards = {}
+    for card_id, board_id, owner_id, is_member in rows:
+        roles[board_id] = _role(user_id, owner_id, is_member)
+        cards[card_id] = (board_id, roles[board_id])
+    return cards
+
+
+def is_board_member(board_id, user_id):
+    """
+    Returns whether a user has been invited to a board, with an indexed EXISTS query.
+
+    Args:
+        board_id (int): The ID of the board.
+        user_id (int): The ID of the user.
+
+    Returns:
+        bool: True if the user is a member of the board.
+    """
+
+    return Board.users.through.objects.filter(board_id=board_id, customuser_id=user_id).exists()
+
+
+def accessible_boards(user):
+    """
+    Returns the boards a user owns or is a member of.
+
+    Args:
+        user (CustomUser): The user.
+
+    Returns:
+        QuerySet: The boards.
+    """
+
+    # A subquery instead of a join keeps both sides of the OR on an index and the rows free of duplicates
+    memberships = Board.users.through.objects.filter(customuser=user).values('board_id')
+    return Board.objects.filter(Q(owner=user) | Q(id__in=memberships))
+
+
+def board_permission_required(owner=False):
+    """
+    Restricts a view to the members of a board, or to its owner.
+
+    The board is the one named by the board_id argument of the view, or the board of the card named by its card_id
+    argument. Missing boards and cards are answered with 404 Not Found, users without the required role with
+    403 Forbidden.
+
+    Args:
+        owner (bool): Whether only the owner of the board may use the view.
+
+    Returns:
+        Callable: The decorator.
+    """
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if 'card_id' in kwargs:
+                card = card_roles(request, [kwargs['card_id']]).get(int(kwargs['card_id']))
+                if card is None:
+                    raise Http404('Card not found.')
+                role = card[1]
+            else:
+                roles = board_roles(request, [kwargs['board_id']])
+                if int(kwargs['board_id']) not in roles:
+                    raise Http404('Board not found.')
+                role = roles[int(kwargs['board_id'])]
+
+            if role is None:
+                return HttpResponseForbidden('You do not have access to this board.')
+            if owner and role != BOARD_OWNER:
+                return HttpResponseForbidden('Only the owner of the board can do this.')
+
+            return view(request, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def metrics_permission_required(view):
+    """
+    Restricts a metrics view to scrapers sending the METRICS_TOKEN setting as a bearer token and to signed-in staff
+    members. Other requests are answered with 403 Forbidden rather than redirected to the sign in page.
+
+    Args:
+        view (Callable): The view.
+
+    Returns:
+        Callable: The restricted view.
+    """
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        token = settings.METRICS_TOKEN
+        authorization = request.headers.get('Authorization', '')
+        if token and hmac.compare_digest(authorization.encode(), f'Bearer {token}'.encode()):
+            return view(request, *args, **kwargs)
+        if request.user.is_authenticated and request.user.is_staff:
+            return view(request, *args, **kwargs)
+        return HttpResponseForbidden('You do not have permission to view the metrics.')
+
+    return wrapper
@@ -0,0 +1,291 @@
+import random
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from django.template.backends.django import DjangoTemplates, Template
+
+# Upper bounds of the histogram buckets of durations in seconds and of query counts
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+# Metrics recorded for every view: (name, help text, buckets)
+PROFILE_METRICS = (
+    ('busyboard_request_duration_seconds', 'Wall time of the sampled requests.', DURATION_BUCKETS),
+    ('busyboard_request_db_duration_seconds', 'Time the sampled requests spent in database queries.',
+     DURATION_BUCKETS),
+    ('busyboard_request_template_duration_seconds', 'Time the sampled requests spent rendering templates.',
+     DURATION_BUCKETS),
+    ('busyboard_request_queries', 'Number of database queries of the sampled requests.', QUERY_COUNT_BUCKETS),
+    ('busyboard_request_duplicate_queries',
+     'Number of queries of the sampled requests repeating an earlier query with the same SQL and parameters.',
+     QUERY_COUNT_BUCKETS),
+)
+
+# Seconds a process keeps its measurements before adding them to the histograms shared through the cache
+PROFILING_FLUSH_INTERVAL = 30
+
+# Cache keys of the list of (metric name, view name) series and of the counters of every series. The field of a
+# counter is the index of a bucket, 'count' or 'sum'
+SERIES_KEY = 'profiling:series'
+COUNTER_KEY = 'profiling:{name}:{view_name}:{field}'
+
+# The sums are kept in the cache as integers, in millionths
+SUM_SCALE = 10 ** 6
+
+# Profile of the request being handled, None when it is not sampled
+_current_profile = ContextVar('request_profile', default=None)
+
+
+class Histogram:
+    """
+    A Prometheus histogram: cumulative counts of the observed values under every bucket bound, their sum and count.
+    """
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+        self.sum += value
+        self.count += 1
+
+
+class RequestProfile:
+    """
+    The measurements of one sampled request.
+    """
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0
+        self.template_time = 0
+        self.statements = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        # Database execute wrapper timing every query of the request
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - started
+            self.queries += 1
+            if not many:
+                self.statements[sql, repr(params)] += 1
+
+    @property
+    def duplicate_queries(self):
+        return sum(count - 1 for count in self.statements.values())
+
+
+# Measurements not yet added to the cache, as histograms by metric name and view name, shared by the threads of
+# the process. The series are every (metric name, view name) this process has measured
+_pending = {}
+_series = set()
+_flushed_at = time.monotonic()
+_pending_lock = threading.Lock()
+
+
+def _add(key, delta):
+    # Adds to a counter in the cache, creating it if needed
+    if cache.add(key, delta, timeout=None):
+        return
+    try:
+        cache.incr(key, delta)
+    except ValueError:
+        # The counter has been evicted between the two calls
+        cache.set(key, delta, timeout=None)
+
+
+def _counter_keys(name, view_name, buckets):
+    fields = [*range(len(buckets)), 'count', 'sum']
+    return [COUNTER_KEY.format(name=name, view_name=view_name, field=field) for field in fields]
+
+
+def record_profile(view_name, duration, profile):
+    """
+    Adds the measurements of a sampled request to the histograms of its view.
+
+    The measurements are added to the cache at most every PROFILING_FLUSH_INTERVAL seconds.
+
+    Args:
+        view_name (str): The URL name of the view.
+        duration (float): The wall time of the request in seconds.
+        profile (RequestProfile): The measurements of the request.
+    """
+
+    values = (duration, profile.db_time, profile.template_time, profile.queries, profile.duplicate_queries)
+
+    with _pending_lock:
+        for (name, _, buckets), value in zip(PROFILE_METRICS, values):
+            histogram = _pending.get((name, view_name))
+            if histogram is None:
+                histogram = _pending[name, view_name] = Histogram(buckets)
+            histogram.observe(value)
+        due = time.monotonic() - _flushed_at >= PROFILING_FLUSH_INTERVAL
+
+    if due:
+        flush_profile_metrics()
+
+
+def flush_profile_metrics():
+    """
+    Adds the measurements of this process to the histograms shared by all processes through the cache.
+    """
+
+    global _pending, _flushed_at
+
+    with _pending_lock:
+        pending, _pending = _pending, {}
+        _flushed_at = time.monotonic()
+        _series.update(pending)
+        series = set(_series)
+
+    # Every flush lists again all the series of the process, restoring those lost by concurrent updates of the list
+    listed = cache.get(SERIES_KEY, [])
+    if not series.issubset(listed):
+        cache.set(SERIES_KEY, sorted(series.union(listed)), timeout=None)
+
+    buckets = {name: buckets for name, _, buckets in PROFILE_METRICS}
+    for (name, view_name), histogram in pending.items():
+        deltas = [*histogram.counts, histogram.count, round(histogram.sum * SUM_SCALE)]
+        for key, delta in zip(_counter_keys(name, view_name, buckets[name]), deltas):
+            if delta:
+                _add(key, delta)
+
+
+def render_profile_metrics():
+    """
+    Returns the histograms of the sampled requests of all processes in the Prometheus text format.
+
+    The measurements of this process are flushed first. Those of the other processes are included up to their last
+    flush, at most PROFILING_FLUSH_INTERVAL seconds ago. With a cache local to the process, such as the default
+    LocMemCache, every process only reports its own requests.
+
+    Returns:
+        str: The metrics, one histogram per view and metric.
+    """
+
+    flush_profile_metrics()
+    series = cache.get(SERIES_KEY, [])
+    keys = [
+        key
+        for name, _, buckets in PROFILE_METRICS
+        for metric, view_name in series if metric == name
+        for key in _counter_keys(name, view_name, buckets)
+    ]
+    counters = cache.get_many(keys)
+
+    lines = []
+    for name, help_text, buckets in PROFILE_METRICS:
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} histogram']
+        for metric, view_name in sorted(series):
+            if metric != name:
+                continue
+            *counts, count, total = (counters.get(key, 0) for key in _counter_keys(name, view_name, buckets))
+            label = view_name.replace('\\', '\\\\').replace('"', '\\"')
+            for bound, bucket_count in zip(buckets, counts):
+                lines.append(f'{name}_bucket{{view="{label}",le="{bound}"}} {bucket_count}')
+            lines += [
+                f'{name}_bucket{{view="{label}",le="+Inf"}} {count}',
+                f'{name}_sum{{view="{label}"}} {total / SUM_SCALE:.6f}',
+                f'{name}_count{{view="{label}"}} {count}',
+            ]
+    return '\n'.join(lines) + '\n'
+
+
+def reset_profile_metrics():
+    """
+    Forgets the histograms recorded so far by all processes.
+    """
+
+    with _pending_lock:
+        _pending.clear()
+        _series.clear()
+
+    series = cache.get(SERIES_KEY, [])
+    buckets = {name: buckets for name, _, buckets in PROFILE_METRICS}
+    cache.delete_many([
+        key for name, view_name in series if name in buckets for key in _counter_keys(name, view_name, buckets[name])
+    ])
+    cache.delete(SERIES_KEY)
+
+
+class RequestProfilingMiddleware:
+    """
+    Measures a sample of the requests: wall time, database time, query count, duplicate queries and template
+    rendering time, aggregated in histograms per URL name.
+
+    The middleware is enabled by setting PROFILING_SAMPLE_RATE to the fraction of requests to measure, between
+    0 and 1. Requests that are not sampled only cost a random number. Every process adds its measurements to
+    histograms kept in the cache, shared by all the processes when the cache is, e.g. Redis, and exposed by the
+    profiling_metrics view.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = getattr(settings, 'PROFILING_SAMPLE_RATE', 0)
+        if self.sample_rate <= 0:
+            raise MiddlewareNotUsed
+
+    def __call__(self, request):
+        if random.random() >= self.sample_rate:
+            return self.get_response(request)
+
+        profile = RequestProfile()
+        token = _current_profile.set(profile)
+        started = time.perf_counter()
+        try:
+            with connection.execute_wrapper(profile):
+                response = self.get_response(request)
+        finally:
+            _current_profile.reset(token)
+
+        # Requests that matched no URL are grouped together, so that scanners cannot create a series per path
+        match = request.resolver_match
+        view_name = (match.view_name or match._func_path) if match else '<unresolved>'
+        record_profile(view_name, time.perf_counter() - started, profile)
+
+        return response
+
+
+class ProfiledTemplate(Template):
+    """
+    A Django template adding its rendering time to the profile of the request being handled, if it is sampled.
+    """
+
+    def render(self, context=None, request=None):
+        profile = _current_profile.get()
+        if profile is None:
+            return super().render(context, request)
+
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            profile.template_time += time.perf_counter() - started
+
+
+class ProfiledDjangoTemplates(DjangoTemplates):
+    """
+    The Django template backend, with the rendering time of the templates recorded by RequestProfilingMiddleware.
+
+    Only the templates rendered by views are timed, the templates they include are part of their rendering.
+    """
+
+    def from_string(self, template_code):
+        return ProfiledTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        template = super().get_template(template_name)
+        return ProfiledTemplate(template.template, self)
@@ -0,0 +1,210 @@
+from django.db import transaction
+from django.utils import timezone
+
+from .changes import record_changes
+from .models import Card
+from .realtime import publish_column_ranks
+
+# Distance between the ranks of neighbouring cards after a column has been rebalanced
+RANK_GAP = 1 << 16
+
+# Smallest gap left between two cards after a move before the column is rebalanced
+RANK_MIN_GAP = 16
+
+# Columns written for every moved card
+MOVED_FIELDS = ['status', 'rank', 'update_datetime', 'done_datetime']
+
+
+def rank_between(lower, upper):
+    """
+    Returns a rank placing a card between two neighbours.
+
+    Args:
+        lower (int): The rank of the card above, or None if the card is placed at the top.
+        upper (int): The rank of the card below, or None if the card is placed at the bottom.
+
+    Returns:
+        int: The new rank, or None if there is no free rank between the neighbours.
+    """
+
+    if lower is None and upper is None:
+        return 0
+    if lower is None:
+        return upper - RANK_GAP
+    if upper is None:
+        return lower + RANK_GAP
+    if upper - lower < 2:
+        return None
+    return (lower + upper) // 2
+
+
+def column_key(status):
+    """
+    Returns the ID a board column is recorded under in the change log of its board.
+
+    Args:
+        status (str): The status of the column.
+
+    Returns:
+        int: The position of the status in Card.STATUS_CHOICES.
+    """
+
+    return [code for code, _ in Card.STATUS_CHOICES].index(status)
+
+
+def rebalance_column(board_id, status):
+    """
+    Spreads the ranks of the cards in a board column evenly, keeping their order.
+
+    The column is locked until the surrounding transaction ends, and the rebalance is recorded as a single change of
+    the column in the change log of the board.
+
+    Args:
+        board_id (int): The ID of the board.
+        status (str): The status of the column.
+
+    Returns:
+        dict: The new ranks by card ID.
+    """
+
+    with transaction.atomic():
+        cards = list(
+            Card.objects.select_for_update()
+            .filter(board_id=board_id, status=status)
+            .only('id', 'rank')
+            .order_by('rank', 'id')
+        )
+        for position, card in enumerate(cards):
+            card.rank = position * RANK_GAP
+        Card.objects.bulk_update(cards, ['rank'], batch_size=1000)
+        record_changes([(board_id, 'COLUMN', column_key(status), 'MOVED')])
+
+    ranks = {card.id: card.rank for card in cards}
+    transaction.on_commit(lambda: publish_column_ranks(board_id, ranks))
+    return ranks
+
+
+def free_rank(board_id, status, lower=None, exclude_ids=()):
+    """
+    Returns a rank right below a rank of a column that no card of the column has, with one indexed query.
+
+    Args:
+        board_id (int): The ID of the board.
+        status (str): The status of the column.
+        lower (int): The rank to place the card below, or None to place it at the top of the column.
+        exclude_ids (Iterable[int]): The IDs of the cards being placed, whose current ranks do not count.
+
+    Returns:
+        int: The rank, or None if the card directly below leaves no free rank.
+    """
+
+    column = Card.objects.filter(board_id=board_id, status=status).exclude(id__in=exclude_ids)
+    if lower is None:
+        upper = column.order_by('rank').values_list('rank', flat=True).first()
+    else:
+        upper = column.filter(rank__gt=lower).order_by('rank').values_list('rank', flat=True).first()
+    return rank_between(lower, upper)
+
+
+def move_cards(moves):
+    """
+    Moves cards to new columns and positions, writing only the rows of the moved cards.
+
+    Every move is placed between the cards given as its neighbours, and a card moved to another column without
+    neighbours is placed at its top. Moves are applied in order, so a card may be placed next to a card moved
+    earlier in the same batch. When the gaps around a moved card get small, its column is rebalanced in the same
+    transaction, which rewrites every card of the column but only happens once in many moves.
+
+    Args:
+        moves (list): (card_id, status, previous_id, next_id) tuples, where previous_id and next_id are the IDs
+            of the cards directly above and below the new position, or None.
+
+    Returns:
+        list: (board_id, old_status, new_status, old_done_datetime) tuples for the moved cards.
+    """
+
+    referenced_ids = {card_id for move in moves for card_id in (move[0], move[2], move[3]) if card_id}
+
+    # Retrieve the state of the moved cards and of their neighbours in one query
+    cards = {
+        card_id: [board_id, status, rank, update_datetime, done_datetime]
+        for card_id, board_id, status, rank, update_datetime, done_datetime in Card.objects.filter(
+            id__in=referenced_ids
+        ).values_list('id', 'board_id', 'status', 'rank', 'update_datetime', 'done_datetime')
+    }
+
+    def rank_of(card_id):
+        return cards[card_id][2] if card_id in cards else None
+
+    def flush():
+        # Write the moves so far, before the column is read or rewritten
+        Card.objects.bulk_update(moved.values(), MOVED_FIELDS)
+        moved.clear()
+
+    def rebalance(board_id, status):
+        # Spread the column out and take over the new ranks of the known cards
+        flush()
+        for rebalanced_id, rebalanced_rank in rebalance_column(board_id, status).items():
+            if rebalanced_id in cards:
+                cards[rebalanced_id][2] = rebalanced_rank
+
+    def place(card_id, board_id, status, previous_id, next_id):
+        if previous_id or next_id:
+            rank = rank_between(rank_of(previous_id), rank_of(next_id))
+            if rank is not None:
+                return rank
+            # The neighbours are not next to each other any more, place the card right below the upper one
+            lower = rank_of(previous_id)
+        else:
+            # A card moved to another column without neighbours goes to the top of the column
+            lower = None
+        flush()
+        return free_rank(board_id, status, lower, [card_id])
+
+    now = timezone.now()
+    previous_state = {}
+    moved = {}
+    crowded_columns = set()
+
+    for card_id, status, previous_id, next_id in moves:
+        if card_id not in cards:
+            continue
+
+        board_id = cards[card_id][0]
+        previous_state.setdefault(card_id, (cards[card_id][1], cards[card_id][3], cards[card_id][4]))
+
+        rank = cards[card_id][2]
+        if previous_id or next_id or status != cards[card_id][1]:
+            rank = place(card_id, board_id, status, previous_id, next_id)
+            if rank is None:
+                # The column has run out of free ranks at this position
+                rebalance(board_id, status)
+                rank = place(card_id, board_id, status, previous_id, next_id)
+
+            # Rebalance the column at the end if the card is getting too close to its neighbours
+            gaps = [rank - rank_of(previous_id) if previous_id in cards else RANK_GAP,
+                    rank_of(next_id) - rank if next_id in cards else RANK_GAP]
+            if min(gaps) < RANK_MIN_GAP:
+                crowded_columns.add((board_id, status))
+
+        # Reordering a card within its column does not count as an update
+        old_status, old_update_datetime, old_done_datetime = previous_state[card_id]
+        update_datetime = now if status != old_status else old_update_datetime
+
+        card = Card(id=card_id, status=status, rank=rank, update_datetime=update_datetime,
+                    done_datetime=old_done_datetime)
+        card.update_done_datetime(now)
+        cards[card_id][1:5] = [status, rank, update_datetime, card.done_datetime]
+        moved[card_id] = card
+
+    # Write all moved cards with a single query
+    Card.objects.bulk_update(moved.values(), MOVED_FIELDS)
+    record_changes((cards[card_id][0], 'CARD', card_id, 'MOVED') for card_id in previous_state)
+
+    for board_id, status in crowded_columns:
+        rebalance_column(board_id, status)
+
+    return [
+        (cards[card_id][0], old_status, cards[card_id][1], old_done_datetime)
+        for card_id, (old_status, _, old_done_datetime) in previous_state.items()
+    ]
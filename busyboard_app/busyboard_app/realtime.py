@@ -0,0 +1,384 @@
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import defaultdict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.db.models import prefetch_related_objects
+from django.utils.module_loading import import_string
+
+from .fragments import render_card_tiles
+from .models import Card
+from .permissions import accessible_boards
+
+# Maximum number of events waiting for a subscriber, a subscriber falling further behind is disconnected
+REALTIME_QUEUE_SIZE = 256
+
+# Number of seconds between two heartbeats sent on an idle event stream
+REALTIME_HEARTBEAT_INTERVAL = 15
+
+# Number of seconds after which an event stream is closed, the browser opens a new one beforehand
+REALTIME_STREAM_TIMEOUT = 10 * 60
+
+# Number of milliseconds the browser waits before reconnecting to a closed event stream
+REALTIME_RETRY_DELAY = 3000
+
+# Number of seconds the Redis listener waits before reconnecting, doubled after every failed attempt up to the maximum
+REALTIME_RECONNECT_DELAY = 0.5
+REALTIME_MAX_RECONNECT_DELAY = 30
+
+logger = logging.getLogger(__name__)
+
+# Marker queued for a subscription that has been disconnected
+_CLOSED = object()
+
+
+class Subscription:
+    """
+    Queue of the events of one board for one connected client, living in the event loop of the client's stream.
+    """
+
+    def __init__(self, broker, board_id, loop, max_size):
+        self.broker = broker
+        self.board_id = board_id
+        self.loop = loop
+        self.queue = asyncio.Queue(max_size)
+        self.closed = False
+
+    def put(self, frame):
+        """
+        Queues an event frame, disconnecting the subscription if the client is too slow. Runs in the event loop.
+        """
+
+        if self.closed:
+            return
+        try:
+            self.queue.put_nowait(frame)
+        except asyncio.QueueFull:
+            self.closed = True
+            self.broker.unsubscribe(self)
+
+    async def get(self, timeout):
+        """
+        Waits for the next event frame.
+
+        Args:
+            timeout (float): The number of seconds to wait.
+
+        Returns:
+            str: The event frame, None if no event arrived in time, or _CLOSED if the subscription was closed.
+        """
+
+        if not self.queue.empty():
+            return self.queue.get_nowait()
+        if self.closed:
+            return _CLOSED
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return _CLOSED if self.closed else None
+
+    def close(self):
+        self.closed = True
+        self.broker.unsubscribe(self)
+
+
+class BoardBroker:
+    """
+    Interface of the brokers delivering the card events of a board to the clients connected to it.
+    """
+
+    def publish(self, board_id, event):
+        """
+        Sends an event to every client connected to a board. Safe to call from any thread.
+
+        Args:
+            board_id (int): The ID of the board.
+            event (dict): The JSON-serializable event.
+        """
+
+        raise NotImplementedError
+
+    def subscribe(self, board_id):
+        """
+        Connects a client to the events of a board. Must be called from the event loop of the client's stream.
+
+        Args:
+            board_id (int): The ID of the board.
+
+        Returns:
+            Subscription: The subscription to read the events from.
+        """
+
+        raise NotImplementedError
+
+    def unsubscribe(self, subscription):
+        """
+        Disconnects a client from the events of its board.
+
+        Args:
+            subscription (Subscription): The subscription returned by subscribe().
+        """
+
+        raise NotImplementedError
+
+
+class InProcessBroker(BoardBroker):
+    """
+    Broker delivering the events to the clients connected to the current process, for single-node deployments.
+    """
+
+    def __init__(self, max_queue_size=REALTIME_QUEUE_SIZE):
+        self.max_queue_size = max_queue_size
+        self._subscriptions = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def publish(self, board_id, event):
+        self.deliver(board_id, encode_event(event))
+
+    def deliver(self, board_id, frame):
+        """
+        Queues an encoded event frame for the local subscribers of a board.
+
+        The frame is encoded once whatever the number of subscribers, and handed over to every event loop with a
+        single callback.
+        """
+
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(board_id, ()))
+
+        by_loop = defaultdict(list)
+        for subscription in subscriptions:
+            by_loop[subscription.loop].append(subscription)
+
+        for loop, loop_subscriptions in by_loop.items():
+            try:
+                loop.call_soon_threadsafe(_deliver, loop_subscriptions, frame)
+            except RuntimeError:
+                # The event loop has been closed, forget its subscriptions
+                for subscription in loop_subscriptions:
+                    self.unsubscribe(subscription)
+
+    def subscribe(self, board_id):
+        subscription = Subscription(self, board_id, asyncio.get_running_loop(), self.max_queue_size)
+        with self._lock:
+            self._subscriptions[board_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.board_id)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.board_id]
+
+    def subscriber_count(self, board_id):
+        with self._lock:
+            return len(self._subscriptions.get(board_id, ()))
+
+
+class RedisBroker(InProcessBroker):
+    """
+    Broker relaying the events through Redis pub/sub, for deployments running several processes or nodes.
+
+    Every process publishes to Redis and listens to it in a background thread, then delivers the events to its own
+    clients like the in-process broker. The listener reconnects with an exponential backoff when the connection to
+    Redis drops, the events published in the meantime are lost.
+    """
+
+    CHANNEL_PREFIX = 'busyboard:board:'
+
+    def __init__(self, url=None, max_queue_size=REALTIME_QUEUE_SIZE):
+        import redis
+
+        super().__init__(max_queue_size)
+        self._redis = redis.Redis.from_url(url or settings.REDIS_URL)
+        self._pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+        self._pubsub.psubscribe(f'{self.CHANNEL_PREFIX}*')
+        # Errors after which the listener reconnects, redis-py subscribes the new connection to the pattern again
+        self._connection_errors = (redis.ConnectionError, redis.TimeoutError)
+        threading.Thread(target=self._listen, daemon=True).start()
+
+    def publish(self, board_id, event):
+        self._redis.publish(f'{self.CHANNEL_PREFIX}{board_id}', encode_event(event))
+
+    def _listen(self):
+        delay = REALTIME_RECONNECT_DELAY
+        while True:
+            try:
+                for message in self._pubsub.listen():
+                    delay = REALTIME_RECONNECT_DELAY
+                    board_id = int(message['channel'].decode()[len(self.CHANNEL_PREFIX):])
+                    self.deliver(board_id, message['data'].decode())
+                # The listener only stops once the pattern is unsubscribed
+                return
+            except self._connection_errors:
+                logger.warning('Lost the connection to Redis, reconnecting in %s s', delay, exc_info=True)
+                time.sleep(delay)
+                delay = min(delay * 2, REALTIME_MAX_RECONNECT_DELAY)
+
+
+def _deliver(subscriptions, frame):
+    for subscription in subscriptions:
+        subscription.put(frame)
+
+
+def encode_event(event):
+    """
+    Encodes an event as a server-sent event frame.
+
+    Args:
+        event (dict): The JSON-serializable event.
+
+    Returns:
+        str: The frame.
+    """
+
+    return f'data: {json.dumps(event, separators=(",", ":"))}\n\n'
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    """
+    Returns the broker configured in the REALTIME_BROKER setting, creating it on first use.
+
+    Returns:
+        BoardBroker: The broker of the process.
+    """
+
+    global _broker
+    with _broker_lock:
+        if _broker is None:
+            _broker = import_string(settings.REALTIME_BROKER)()
+        return _broker
+
+
+async def stream_board_events(board_id, user):
+    """
+    Yields the server-sent event frames of a board for one client, with heartbeats while the board is idle.
+
+    The access of the user to the board is checked again every heartbeat interval, the stream is closed once the
+    user has been removed from the board or the board has been deleted.
+
+    Args:
+        board_id (int): The ID of the board.
+        user (CustomUser): The user the stream is sent to.
+
+    Yields:
+        str: The frames to send to the client.
+    """
+
+    subscription = get_broker().subscribe(board_id)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + REALTIME_STREAM_TIMEOUT
+    has_access = sync_to_async(accessible_boards(user).filter(id=board_id).exists)
+    checked = loop.time()
+
+    try:
+        yield f'retry: {REALTIME_RETRY_DELAY}\n\n'
+        while loop.time() < deadline:
+            frame = await subscription.get(REALTIME_HEARTBEAT_INTERVAL)
+            if frame is _CLOSED:
+                break
+            if loop.time() - checked >= REALTIME_HEARTBEAT_INTERVAL:
+                # The browser reconnects to a closed stream and is then refused by the board_events view
+                if not await has_access():
+                    return
+                checked = loop.time()
+            # A comment line keeps the connection open and lets the server notice a gone client
+            yield frame if frame is not None else ': ping\n\n'
+        else:
+            # Ask the browser to open a new stream before this one is closed
+            yield encode_event({'type': 'reconnect'})
+    finally:
+        subscription.close()
+
+
+def _card_position(card):
+    return {'id': card.id, 'status': card.status, 'rank': card.rank}
+
+
+def publish_card_event(event_type, card):
+    """
+    Sends a created, edited or deleted card to the clients of its board once the transaction is committed.
+
+    Created and edited cards are sent with their rendered HTML, so the clients can insert them as they are.
+
+    Args:
+        event_type (str): 'created', 'edited' or 'deleted'.
+        card (Card): The card.
+    """
+
+    publish_card_events(event_type, [card])
+
+
+def publish_card_events(event_type, cards):
+    """
+    Sends created, edited or deleted cards to the clients of their boards once the transaction is committed.
+
+    The tiles of all the cards are rendered at once, with their creators read in a single query.
+
+    Args:
+        event_type (str): 'created', 'edited' or 'deleted'.
+        cards (Iterable[Card]): The cards.
+    """
+
+    cards = list(cards)
+    if event_type != 'deleted':
+        prefetch_related_objects(cards, 'creator')
+        # The tiles hold no CSRF token, the clients fill in their own when their forms are submitted
+        render_card_tiles(cards)
+
+    events = []
+    for card in cards:
+        event = {'type': event_type, 'card': _card_position(card)}
+        if event_type != 'deleted':
+            event['html'] = str(card.tile)
+        events.append((card.board_id, event))
+
+    def publish():
+        broker = get_broker()
+        for board_id, event in events:
+            broker.publish(board_id, event)
+
+    transaction.on_commit(publish)
+
+
+def publish_card_moves(card_ids):
+    """
+    Sends the new status and rank of moved cards to the clients of their boards once the transaction is committed.
+
+    Args:
+        card_ids (Iterable[int]): The IDs of the moved cards.
+    """
+
+    card_ids = list(card_ids)
+
+    def publish():
+        positions = defaultdict(list)
+        for card in Card.objects.filter(id__in=card_ids).only('id', 'board_id', 'status', 'rank'):
+            positions[card.board_id].append(_card_position(card))
+        for board_id, cards in positions.items():
+            get_broker().publish(board_id, {'type': 'moved', 'cards': cards})
+
+    transaction.on_commit(publish)
+
+
+def publish_column_ranks(board_id, ranks):
+    """
+    Sends the ranks of a rebalanced column to the clients of its board.
+
+    Args:
+        board_id (int): The ID of the board.
+        ranks (dict): The new ranks by card ID.
+    """
+
+    get_broker().publish(board_id, {'type': 'ranked', 'ranks': ranks})
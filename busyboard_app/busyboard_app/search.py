@@ -0,0 +1,280 @@
+import re
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models import BooleanField, FloatField, Lookup, Q, TextField
+from django.db.models.expressions import RawSQL
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+# Name of the SQLite FTS5 table and of the PostgreSQL GIN index used for card search
+SEARCH_TABLE = 'busyboard_app_card_search'
+SEARCH_INDEX = 'busyboard_app_card_search_gin'
+
+# Text search document of a card on PostgreSQL, the GIN index is built on the same expression
+POSTGRESQL_DOCUMENT = (
+    "to_tsvector('english', coalesce(busyboard_app_card.title, '') || ' ' || "
+    "coalesce(busyboard_app_card.description, ''))"
+)
+
+# Control characters marking the highlighted terms in the search snippets
+HIGHLIGHT_START = '\x02'
+HIGHLIGHT_END = '\x03'
+
+
+class SearchDocumentField(TextField):
+    """
+    The hidden column of an SQLite FTS5 table that is named after the table, matched against full-text queries with
+    the `match` lookup.
+    """
+
+
+@SearchDocumentField.register_lookup
+class FullTextMatch(Lookup):
+    """
+    Matches the rows of an SQLite FTS5 table against a full-text query, e.g. `document__match='"word"*'`.
+    """
+
+    lookup_name = 'match'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'{lhs} MATCH {rhs}', lhs_params + rhs_params
+
+
+def search_backend(using=DEFAULT_DB_ALIAS):
+    """
+    Returns the full-text search backend available for a database.
+
+    Args:
+        using (str): The alias of the database, the default one if not given.
+
+    Returns:
+        str: 'sqlite' for SQLite FTS5, 'postgresql' for PostgreSQL full-text search, or None for a plain LIKE search.
+    """
+
+    vendor = connections[using].vendor
+    if vendor in ('sqlite', 'postgresql'):
+        return vendor
+    return None
+
+
+def create_search_index(using=DEFAULT_DB_ALIAS, **kwargs):
+    """
+    Creates the full-text search index of the cards if it does not exist yet.
+
+    It is connected to the post_migrate signal. On SQLite a new FTS5 table is filled with the existing cards.
+
+    Args:
+        using (str): The alias of the database that has been migrated.
+    """
+
+    backend = search_backend(using)
+
+    with connections[using].cursor() as cursor:
+        if backend == 'sqlite':
+            # Check whether the FTS5 table has to be created and filled
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [SEARCH_TABLE])
+            if cursor.fetchone():
+                return
+
+            cursor.execute(f'CREATE VIRTUAL TABLE {SEARCH_TABLE} USING fts5(title, description)')
+            cursor.execute(
+                f'INSERT INTO {SEARCH_TABLE} (rowid, title, description) '
+                f'SELECT id, title, coalesce(description, \'\') FROM busyboard_app_card'
+            )
+        elif backend == 'postgresql':
+            cursor.execute(
+                f'CREATE INDEX IF NOT EXISTS {SEARCH_INDEX} ON busyboard_app_card USING GIN ({POSTGRESQL_DOCUMENT})'
+            )
+
+
+def index_cards(cards):
+    """
+    Adds or replaces the given cards in the full-text search index.
+
+    Saving a card indexes it automatically. This function is meant for cards written without signals,
+    for example with bulk_create.
+
+    Args:
+        cards (Iterable[Card]): The cards to index.
+    """
+
+    if search_backend() != 'sqlite':
+        # The PostgreSQL expression index is maintained by the database itself
+        return
+
+    with connections[DEFAULT_DB_ALIAS].cursor() as cursor:
+        cursor.executemany(
+            f'INSERT OR REPLACE INTO {SEARCH_TABLE} (rowid, title, description) VALUES (%s, %s, %s)',
+            [(card.id, card.title, card.description or '') for card in cards]
+        )
+
+
+def unindex_cards(card_ids):
+    """
+    Removes the cards with the given IDs from the full-text search index.
+
+    Args:
+        card_ids (Iterable[int]): The IDs of the cards to remove.
+    """
+
+    if search_backend() != 'sqlite':
+        return
+
+    with connections[DEFAULT_DB_ALIAS].cursor() as cursor:
+        cursor.executemany(f'DELETE FROM {SEARCH_TABLE} WHERE rowid = %s', [(card_id,) for card_id in card_ids])
+
+
+def rebuild_search_index(using=DEFAULT_DB_ALIAS):
+    """
+    Drops and recreates the full-text search index from the Card table.
+
+    Args:
+        using (str): The alias of the database, the default one if not given.
+    """
+
+    backend = search_backend(using)
+
+    with connections[using].cursor() as cursor:
+        if backend == 'sqlite':
+            cursor.execute(f'DROP TABLE IF EXISTS {SEARCH_TABLE}')
+        elif backend == 'postgresql':
+            cursor.execute(f'DROP INDEX IF EXISTS {SEARCH_INDEX}')
+
+    create_search_index(using)
+
+
+def search_terms(query):
+    """
+    Splits a search query into words.
+
+    Args:
+        query (str): The search query entered by the user.
+
+    Returns:
+        list: The words of the query.
+    """
+
+    return re.findall(r'\w+', query)
+
+
+def like_condition(terms):
+    """
+    Returns the condition of the plain LIKE search, matching the cards whose title or description contains every
+    word.
+
+    Args:
+        terms (list): The words of the search query.
+
+    Returns:
+        Q: The filter condition.
+    """
+
+    condition = Q()
+    for term in terms:
+        condition &= Q(title__icontains=term) | Q(description__icontains=term)
+    return condition
+
+
+def _highlight(snippet):
+    """
+    Converts a search snippet with highlight markers into safe HTML.
+
+    Args:
+        snippet (str): The snippet returned by the database.
+
+    Returns:
+        SafeString: The escaped snippet with the matched terms wrapped in <mark> tags.
+    """
+
+    if not snippet:
+        return ''
+    html = escape(snippet).replace(HIGHLIGHT_START, '<mark>').replace(HIGHLIGHT_END, '</mark>')
+    return mark_safe(html)
+
+
+def filter_cards(cards, query):
+    """
+    Filters a card queryset by a full-text search query, without running it.
+
+    Every word of the query is matched as a prefix, and all words have to match. With a full-text index the
+    matching cards are annotated with a `search_rank`, lower for more relevant cards on every database, and ordered
+    by (search_rank, id). They are also annotated with a `search_snippet` of the matched text, which
+    add_search_highlights() turns into HTML once the cards are read.
+
+    Args:
+        cards (QuerySet): The cards to search in.
+        query (str): The search query entered by the user.
+
+    Returns:
+        QuerySet: The matching cards, which may be ordered or sliced further.
+    """
+
+    terms = search_terms(query)
+    if not terms:
+        return cards.none()
+
+    backend = search_backend(cards.db)
+
+    if backend == 'sqlite':
+        # Match every word as a quoted prefix on the joined FTS5 table and rank the results with BM25
+        match = ' '.join(f'"{term}"*' for term in terms)
+        return cards.filter(search_entry__document__match=match).annotate(
+            search_rank=RawSQL(f'bm25({SEARCH_TABLE})', [], output_field=FloatField()),
+            search_snippet=RawSQL(
+                f"snippet({SEARCH_TABLE}, -1, char(2), char(3), '…', 12)", [], output_field=TextField()
+            ),
+        ).order_by('search_rank', 'id')
+    elif backend == 'postgresql':
+        # Match every word as a prefix and rank the results with ts_rank, negated to sort like BM25
+        tsquery = ' & '.join(f'{term}:*' for term in terms)
+        return cards.filter(
+            RawSQL(f"{POSTGRESQL_DOCUMENT} @@ to_tsquery('english', %s)", [tsquery], output_field=BooleanField())
+        ).annotate(
+            search_rank=RawSQL(
+                f"-ts_rank({POSTGRESQL_DOCUMENT}, to_tsquery('english', %s))", [tsquery], output_field=FloatField()
+            ),
+            search_snippet=RawSQL(
+                "ts_headline('english', coalesce(busyboard_app_card.title, '') || ' ' || "
+                "coalesce(busyboard_app_card.description, ''), to_tsquery('english', %s), "
+                "'StartSel=' || chr(2) || ', StopSel=' || chr(3) || ', MaxWords=12, MinWords=4')",
+                [tsquery], output_field=TextField(),
+            ),
+        ).order_by('search_rank', 'id')
+
+    # Fall back to a LIKE search on other databases
+    return cards.filter(like_condition(terms))
+
+
+def add_search_highlights(cards):
+    """
+    Sets the `search_highlight` attribute of cards read from filter_cards() to the HTML of their search snippet.
+
+    Args:
+        cards (Iterable[Card]): The cards.
+    """
+
+    for card in cards:
+        if hasattr(card, 'search_snippet'):
+            card.search_highlight = _highlight(card.search_snippet)
+
+
+def search_cards(cards, query):
+    """
+    Filters a card queryset by a full-text search query in a single database query.
+
+    The matching cards are ordered by relevance and get a `search_highlight` attribute with an HTML snippet of the
+    matched text.
+
+    Args:
+        cards (QuerySet): The cards to search in.
+        query (str): The search query entered by the user.
+
+    Returns:
+        list: The matching cards ordered from the most to the least relevant.
+    """
+
+    results = list(filter_cards(cards, query))
+    add_search_highlights(results)
+    return results
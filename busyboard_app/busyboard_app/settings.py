@@ -13,6 +13,8 @@ https://docs.djangoproject.com/en/4.2/ref/settings/
 from pathlib import Path
 import os.path
 
+from django.core.exceptions import ImproperlyConfigured
+
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -44,6 +46,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'busyboard_app.profiling.RequestProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -53,11 +56,21 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Fraction of the requests measured by the request profiling middleware, from 0 (disabled) to 1, set with
+# BUSYBOARD_PROFILING_SAMPLE_RATE. The measurements of all processes are added up in the cache and exposed at
+# profiling/metrics/
+PROFILING_SAMPLE_RATE = float(os.environ.get('BUSYBOARD_PROFILING_SAMPLE_RATE', 0))
+
+# Bearer token a Prometheus scraper sends to read profiling/metrics/ and my_boards/cache_metrics/, set with
+# BUSYBOARD_METRICS_TOKEN. Without it the metrics are only shown to signed-in staff members
+METRICS_TOKEN = os.environ.get('BUSYBOARD_METRICS_TOKEN', '')
+
 ROOT_URLCONF = 'busyboard_app.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # The Django template backend, with the rendering time recorded by the request profiling
+        'BACKEND': 'busyboard_app.profiling.ProfiledDjangoTemplates',
         'DIRS': ['templates'],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -76,12 +89,92 @@ WSGI_APPLICATION = 'busyboard_app.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# Set BUSYBOARD_DB_ENGINE to postgresql to use PostgreSQL (requires psycopg2), configured by the
+# BUSYBOARD_DB_NAME, BUSYBOARD_DB_USER, BUSYBOARD_DB_PASSWORD, BUSYBOARD_DB_HOST and BUSYBOARD_DB_PORT variables
+DB_ENGINE = os.environ.get('BUSYBOARD_DB_ENGINE', 'sqlite')
+
+if DB_ENGINE == 'postgresql':
+    # Set BUSYBOARD_DB_POOLED=1 when connecting through a transaction pooler such as PgBouncer, which cannot keep
+    # the server-side cursors of iterator() open across transactions
+    DB_POOLED = os.environ.get('BUSYBOARD_DB_POOLED') == '1'
+
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('BUSYBOARD_DB_NAME', 'busyboard'),
+            'USER': os.environ.get('BUSYBOARD_DB_USER', 'busyboard'),
+            'PASSWORD': os.environ.get('BUSYBOARD_DB_PASSWORD', ''),
+            'HOST': os.environ.get('BUSYBOARD_DB_HOST', 'localhost'),
+            'PORT': os.environ.get('BUSYBOARD_DB_PORT', '6432' if DB_POOLED else '5432'),
+            # Keep the connections open between requests, checking that they still work before reusing them
+            'CONN_MAX_AGE': int(os.environ.get('BUSYBOARD_DB_CONN_MAX_AGE', 600)),
+            'CONN_HEALTH_CHECKS': True,
+            'DISABLE_SERVER_SIDE_CURSORS': DB_POOLED,
+        }
     }
-}
+elif DB_ENGINE == 'sqlite':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'busyboard_app.backends.sqlite3',
+            'NAME': os.environ.get('BUSYBOARD_DB_NAME', BASE_DIR / 'db.sqlite3'),
+            'OPTIONS': {
+                # Seconds a connection waits for the write lock before failing with "database is locked"
+                'timeout': 20,
+                # Take the write lock when a transaction begins, so that waiting writers queue up on the timeout
+                'transaction_mode': 'IMMEDIATE',
+                # Let readers work alongside the writer, sync to disk on checkpoints only, and give every
+                # connection a 64 MB page cache and memory-mapped reads
+                'init_command': (
+                    'PRAGMA journal_mode = WAL;'
+                    'PRAGMA synchronous = NORMAL;'
+                    'PRAGMA cache_size = -65536;'
+                    'PRAGMA mmap_size = 268435456;'
+                    'PRAGMA temp_store = MEMORY'
+                ),
+            },
+        }
+    }
+else:
+    raise ImproperlyConfigured(f'Unknown BUSYBOARD_DB_ENGINE {DB_ENGINE!r}, expected sqlite or postgresql.')
+
+# Set BUSYBOARD_REDIS_URL (e.g. redis://localhost:6379/0) to share the cache and the real-time board events
+# between processes
+REDIS_URL = os.environ.get('BUSYBOARD_REDIS_URL')
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+
+# The template_fragments cache holds the rendered card tiles, see fragments.render_card_tiles()
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        },
+        'template_fragments': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+            'KEY_PREFIX': 'fragments',
+        },
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        },
+        'template_fragments': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'template_fragments',
+            # Room for the tiles of several large boards
+            'OPTIONS': {'MAX_ENTRIES': 50000},
+        },
+    }
+
+# Broker delivering the card events of a board to the browsers showing it (served over ASGI only)
+if REDIS_URL:
+    REALTIME_BROKER = 'busyboard_app.realtime.RedisBroker'
+else:
+    REALTIME_BROKER = 'busyboard_app.realtime.InProcessBroker'
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -121,12 +214,35 @@ STATIC_ROOT = os.path.join(BASE_DIR, STATIC_URL)
 MEDIA_URL = 'media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media/')
 
+# Directory receiving the chunks of resumable attachment uploads
+ATTACHMENT_UPLOAD_DIR = os.path.join(BASE_DIR, 'attachment_uploads/')
+
+# Largest attachment accepted by the resumable upload API, in bytes
+ATTACHMENT_MAX_SIZE = 2 * 1024 * 1024 * 1024
+
+# Number of days after which done cards are moved to the archive by the archive_cards command, set with
+# BUSYBOARD_CARD_ARCHIVE_AFTER_DAYS
+CARD_ARCHIVE_AFTER_DAYS = int(os.environ.get('BUSYBOARD_CARD_ARCHIVE_AFTER_DAYS', 90))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
-EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+# Emails are queued in the outbox table and delivered by the send_queued_mail command
+EMAIL_BACKEND = 'busyboard_app.mail.OutboxEmailBackend'
+
+# Backend the queued emails are delivered through. Set BUSYBOARD_MAIL_DELIVERY_BACKEND to
+# django.core.mail.backends.filebased.EmailBackend or django.core.mail.backends.console.EmailBackend
+# to write them to EMAIL_FILE_PATH or to the console instead of sending them
+OUTBOX_DELIVERY_BACKEND = os.environ.get('BUSYBOARD_MAIL_DELIVERY_BACKEND',
+                                         'django.core.mail.backends.smtp.EmailBackend')
+EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails/')
+
+# Delay in seconds before the first retry of a failed email, doubled after every attempt, and its upper bound
+OUTBOX_RETRY_DELAY = 60
+OUTBOX_MAX_RETRY_DELAY = 60 * 60
+
 EMAIL_HOST = 'smtp.gmail.com'
 EMAIL_PORT = 587
 EMAIL_USE_TLS = True
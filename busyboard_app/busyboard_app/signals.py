@@ -0,0 +1,255 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .attachments import release_attachment
+from .changes import record_changes
+from .counters import count_board_members, record_card_counts
+from .dashboard import invalidate_boards, invalidate_user
+from .etags import touch_boards
+from .models import ArchivedCard, Board, BoardChange, Card, CustomUser
+from .search import index_cards, unindex_cards
+from .statistics import record_status_changes
+
+
+@receiver(post_save, sender=Card)
+def index_saved_card(sender, instance, **kwargs):
+    """
+    Keeps the full-text search index in sync with a created or updated card.
+    """
+
+    index_cards([instance])
+
+
+@receiver(post_delete, sender=Card)
+def unindex_deleted_card(sender, instance, **kwargs):
+    """
+    Removes a deleted card from the full-text search index.
+    """
+
+    unindex_cards([instance.id])
+
+
+@receiver(post_delete, sender=Card)
+def release_deleted_card_attachment(sender, instance, **kwargs):
+    """
+    Drops the reference of a deleted card to its attachment, deleting the file if no other card shares it.
+    """
+
+    release_attachment(instance.attachment.name)
+
+
+@receiver(post_delete, sender=ArchivedCard)
+def release_deleted_archived_card_attachment(sender, instance, **kwargs):
+    """
+    Drops the reference of a deleted archived card to its attachment, deleting the file if no other card shares it.
+    """
+
+    release_attachment(instance.attachment.name)
+
+
+@receiver(post_save, sender=Card)
+def record_saved_card(sender, instance, created, **kwargs):
+    """
+    Appends a created or updated card to the change log of its board, which also invalidates the ETag of its page.
+    """
+
+    record_changes([(instance.board_id, 'CARD', instance.id, 'CREATED' if created else 'UPDATED')])
+
+
+@receiver(post_delete, sender=Card)
+def record_deleted_card(sender, instance, origin=None, **kwargs):
+    """
+    Appends a deleted card to the change log of its board, which also invalidates the ETag of its page.
+    """
+
+    if isinstance(origin, Board):
+        # The whole board is being deleted along with its change log
+        return
+
+    record_changes([(instance.board_id, 'CARD', instance.id, 'DELETED')])
+
+
+@receiver(post_save, sender=Card)
+def count_saved_card(sender, instance, created, **kwargs):
+    """
+    Adds a created card to the card counters of its board. Status changes of existing cards are counted by the
+    code changing them, which knows the previous status.
+    """
+
+    if created:
+        record_card_counts([(instance.board_id, None, instance.status)])
+
+
+@receiver(post_delete, sender=Card)
+def count_deleted_card(sender, instance, origin=None, **kwargs):
+    """
+    Removes a deleted card from the card counters of its board.
+    """
+
+    if isinstance(origin, Board):
+        # The whole board is being deleted along with its counters
+        return
+
+    record_card_counts([(instance.board_id, instance.status, None)])
+
+
+@receiver(post_save, sender=Card)
+def count_created_done_card(sender, instance, created, **kwargs):
+    """
+    Adds a card created as done to the completion statistics of its board. Status changes of existing cards are
+    counted by the code changing them.
+    """
+
+    if created and instance.status == 'DONE':
+        record_status_changes([(instance.board_id, None, 'DONE', None)])
+
+
+@receiver(post_delete, sender=Card)
+def uncount_deleted_done_card(sender, instance, origin=None, **kwargs):
+    """
+    Removes a deleted done card from the completion statistics of its board.
+    """
+
+    if isinstance(origin, Board) or instance.status != 'DONE':
+        # The whole board is being deleted along with its statistics
+        return
+
+    record_status_changes([(instance.board_id, 'DONE', None, instance.done_datetime)])
+
+
+@receiver(post_delete, sender=ArchivedCard)
+def uncount_deleted_archived_card(sender, instance, origin=None, **kwargs):
+    """
+    Removes a deleted archived card, which was done, from the completion statistics of its board.
+    """
+
+    if isinstance(origin, Board):
+        return
+
+    record_status_changes([(instance.board_id, 'DONE', None, instance.done_datetime)])
+
+
+@receiver(post_save, sender=Board)
+def invalidate_saved_board(sender, instance, created, **kwargs):
+    """
+    Invalidates the cached dashboards showing a created or updated board.
+    """
+
+    if created:
+        touch_boards([instance.id])
+    else:
+        record_changes([(instance.id, 'BOARD', instance.id, 'UPDATED')])
+
+    # Invalidate after the commit, so that a dashboard rebuilt meanwhile is not cached with the new version
+    transaction.on_commit(lambda: invalidate_boards([instance.id]))
+    if created:
+        transaction.on_commit(lambda: invalidate_user(instance.owner_id))
+
+
+@receiver(post_delete, sender=Board)
+def invalidate_deleted_board(sender, instance, **kwargs):
+    """
+    Invalidates the cached dashboards showing a deleted board.
+    """
+
+    board_id = instance.id
+    transaction.on_commit(lambda: invalidate_boards([board_id]))
+
+
+@receiver(post_delete, sender=Board)
+def delete_board_changes(sender, instance, **kwargs):
+    """
+    Deletes the change log of a deleted board, which has no database cascade.
+    """
+
+    BoardChange.objects.filter(board_id=instance.id).delete()
+
+
+@receiver(m2m_changed, sender=Board.users.through)
+@receiver(m2m_changed, sender=CustomUser.boards.through)
+def invalidate_board_members(sender, instance, action, reverse, model, pk_set, **kwargs):
+    """
+    Records users joining or leaving a board in its change log and invalidates the cached dashboards affected.
+
+    The handler is connected to both membership relations, Board.users and CustomUser.boards. The instance is a
+    board or a user depending on the side the relation was changed from.
+    """
+
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+
+    if isinstance(instance, Board):
+        board_ids, user_ids = [instance.id], list(pk_set or [])
+    else:
+        board_ids, user_ids = list(pk_set or []), [instance.id]
+
+    if action == 'post_clear':
+        # The cleared memberships are not known any more, only the ETags can be invalidated
+        touch_boards(board_ids)
+    else:
+        record_changes(
+            (board_id, 'MEMBER', user_id, 'ADDED' if action == 'post_add' else 'REMOVED')
+            for board_id in board_ids for user_id in user_ids
+        )
+
+    # A board that is added shows up on the dashboards of its new users, a removed one disappears from theirs
+    # because its version changes
+    transaction.on_commit(lambda: invalidate_boards(board_ids))
+    if action == 'post_add' or action == 'post_clear' and not isinstance(instance, Board):
+        for user_id in user_ids:
+            transaction.on_commit(lambda user_id=user_id: invalidate_user(user_id))
+
+
+@receiver(m2m_changed, sender=Board.users.through)
+def count_board_members_changed(sender, instance, action, pk_set, **kwargs):
+    """
+    Recounts the members of the boards that users joined or left.
+    """
+
+    if action == 'pre_clear' and not isinstance(instance, Board):
+        # The boards the user leaves are not passed to post_clear, remember them beforehand
+        instance._cleared_board_ids = list(instance.invited_boards.values_list('id', flat=True))
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+
+    if isinstance(instance, Board):
+        count_board_members([instance.id])
+    elif action == 'post_clear':
+        count_board_members(getattr(instance, '_cleared_board_ids', []))
+    else:
+        count_board_members(pk_set or [])
+
+
+@receiver(pre_delete, sender=CustomUser)
+def remember_deleted_user_boards(sender, instance, **kwargs):
+    """
+    Remembers the boards a deleted user is a member of, whose memberships are deleted without m2m signals.
+    """
+
+    instance._member_board_ids = list(instance.invited_boards.values_list('id', flat=True))
+
+
+@receiver(post_delete, sender=CustomUser)
+def count_deleted_user_boards(sender, instance, **kwargs):
+    """
+    Recounts the members of the boards a deleted user was a member of.
+    """
+
+    count_board_members(getattr(instance, '_member_board_ids', []))
+
+
+@receiver(post_save, sender=CustomUser)
+def invalidate_saved_user(sender, instance, created, update_fields, **kwargs):
+    """
+    Invalidates the cached dashboards listing a user who may have been renamed among the invited users of a board.
+    """
+
+    if created or update_fields and set(update_fields) <= {'last_login'}:
+        return
+
+    board_ids = list(instance.boards.values_list('id', flat=True))
+    touch_boards(board_ids)
+    if board_ids:
+        transaction.on_commit(lambda: invalidate_boards(board_ids))
@@ -0,0 +1,60 @@
+// Resumable upload of large card attachments, sent in chunks to the attachment upload API
+const CHUNKED_UPLOAD_MIN_SIZE = 2 * 1024 * 1024;
+const CHUNKED_UPLOAD_RETRIES = 5;
+
+function sleep(milliseconds) {
+  return new Promise(resolve => setTimeout(resolve, milliseconds));
+}
+
+// The CSRF token of the forms of the page, or of the CSRF cookie, sent in a header as the chunks are raw bytes
+function csrfToken() {
+  const input = document.querySelector('input[name="csrfmiddlewaretoken"]');
+  if (input) {
+    return input.value;
+  }
+  const cookie = document.cookie.split('; ').find(item => item.startsWith('csrftoken='));
+  return cookie ? decodeURIComponent(cookie.slice('csrftoken='.length)) : '';
+}
+
+async function postJson(url, body) {
+  const response = await fetch(url, {method: 'POST', body: body, headers: {'X-CSRFToken': csrfToken()}});
+  const data = await response.json();
+  if (data.status === 'error' && response.status !== 409) {
+    throw new Error(data.message);
+  }
+  return data;
+}
+
+// Uploads a file and resolves to the upload ID to send in the 'attachment_upload' field of a card form
+async function uploadInChunks(file, startUrl) {
+  const form = new FormData();
+  form.append('filename', file.name);
+  form.append('size', file.size);
+  const upload = await postJson(startUrl, form);
+  const uploadUrl = `${startUrl}${upload.upload_id}/`;
+
+  let received = upload.received;
+  let failures = 0;
+  while (received < file.size) {
+    try {
+      const chunk = file.slice(received, received + upload.chunk_size);
+      const data = await postJson(`${uploadUrl}?offset=${received}`, chunk);
+      received = data.received;
+      failures = 0;
+    } catch (error) {
+      // Ask the server where to resume from after a flaky connection, waiting longer after every failure
+      if (++failures > CHUNKED_UPLOAD_RETRIES) {
+        throw error;
+      }
+      await sleep(1000 * 2 ** failures);
+      try {
+        received = (await (await fetch(uploadUrl)).json()).received;
+      } catch (statusError) {
+        // Retry the same chunk
+      }
+    }
+  }
+
+  await postJson(`${uploadUrl}complete/`, new FormData());
+  return upload.upload_id;
+}
@@ -0,0 +1,160 @@
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import Greatest, TruncDate
+from django.utils import timezone
+
+from .models import ArchivedCard, BoardDailyStatistics, Card
+
+# Length in days of every statistics window shown on the board details page
+STATISTICS_WINDOWS = {
+    'daily_done': 1,
+    'weekly_done': 7,
+    'monthly_done': 30,
+    'annually_done': 365,
+}
+
+
+def _window_start(today, days):
+    """
+    Returns the first date included in a statistics window ending today.
+
+    Args:
+        today (date): The current local date.
+        days (int): The length of the window in days.
+
+    Returns:
+        date: The first date of the window.
+    """
+
+    return today - timedelta(days=days - 1)
+
+
+def get_board_statistics(board):
+    """
+    Returns the number of cards completed on a board for every statistics window.
+
+    The counts are read from the per-day rollup table with a single conditional aggregation, so the cost
+    depends on the number of days in the longest window and not on the number of cards on the board.
+
+    Args:
+        board (Board): The board to compute the statistics for.
+
+    Returns:
+        dict: A mapping of window names ('daily_done', 'weekly_done', ...) to completed card counts.
+    """
+
+    today = timezone.localdate()
+    longest_window = max(STATISTICS_WINDOWS.values())
+
+    # Sum the daily completion counters of every window in one query
+    statistics = BoardDailyStatistics.objects.filter(
+        board=board, date__gte=_window_start(today, longest_window)
+    ).aggregate(**{
+        name: Sum('done_count', filter=Q(date__gte=_window_start(today, days)), default=0)
+        for name, days in STATISTICS_WINDOWS.items()
+    })
+
+    return statistics
+
+
+def count_done_cards(board):
+    """
+    Counts the cards currently done on a board for every statistics window directly from the Card table and the
+    archive.
+
+    All windows are computed in one conditional aggregation query per table. It is used to rebuild and verify the
+    rollup table.
+
+    Args:
+        board (Board): The board to compute the statistics for.
+
+    Returns:
+        dict: A mapping of window names ('daily_done', 'weekly_done', ...) to done card counts.
+    """
+
+    today = timezone.localdate()
+    longest_window = max(STATISTICS_WINDOWS.values())
+
+    counts = dict.fromkeys(STATISTICS_WINDOWS, 0)
+    for cards in (Card.objects.filter(board=board, status='DONE'), ArchivedCard.objects.filter(board=board)):
+        table_counts = cards.filter(done_datetime__date__gte=_window_start(today, longest_window)).aggregate(**{
+            name: Count('id', filter=Q(done_datetime__date__gte=_window_start(today, days)))
+            for name, days in STATISTICS_WINDOWS.items()
+        })
+        for name, count in table_counts.items():
+            counts[name] += count
+
+    return counts
+
+
+def record_status_changes(changes):
+    """
+    Updates the daily completion rollup after the status of several cards has changed.
+
+    A card moved to 'DONE' is counted on the current day. A card moved out of 'DONE' is removed from the day it was
+    completed on, as stamped in its done datetime, which edits of the card do not change. The changes are combined
+    per board and day, so every affected day is written once. A deleted card is a change to the None status.
+
+    Args:
+        changes (Iterable[tuple]): (board_id, old_status, new_status, old_done_datetime) tuples, one per card.
+    """
+
+    today = timezone.localdate()
+    deltas = defaultdict(int)
+
+    for board_id, old_status, new_status, old_done_datetime in changes:
+        if old_status == new_status:
+            continue
+
+        if new_status == 'DONE':
+            # Count the completion on the current day
+            deltas[board_id, today] += 1
+        elif old_status == 'DONE' and old_done_datetime is not None:
+            # Take back the completion from the day the card was completed
+            deltas[board_id, timezone.localdate(old_done_datetime)] -= 1
+
+    for (board_id, date), delta in deltas.items():
+        if delta > 0:
+            BoardDailyStatistics.objects.get_or_create(board_id=board_id, date=date)
+            BoardDailyStatistics.objects.filter(board_id=board_id, date=date).update(
+                done_count=F('done_count') + delta
+            )
+        elif delta < 0:
+            BoardDailyStatistics.objects.filter(board_id=board_id, date=date).update(
+                done_count=Greatest(F('done_count') + delta, 0)
+            )
+
+
+def rebuild_board_statistics(board):
+    """
+    Rebuilds the daily completion rollup of a board from the cards that are currently done or archived.
+
+    Args:
+        board (Board): The board to rebuild the rollup for.
+
+    Returns:
+        int: The number of daily rows written.
+    """
+
+    # Group the done and archived cards of the board by the local date they were done on
+    done_counts = defaultdict(int)
+    for cards in (Card.objects.filter(board=board, status='DONE'), ArchivedCard.objects.filter(board=board)):
+        rows = (
+            cards.filter(done_datetime__isnull=False)
+            .annotate(date=TruncDate('done_datetime', tzinfo=timezone.get_current_timezone()))
+            .values('date')
+            .annotate(done_count=Count('id'))
+            .order_by()
+        )
+        for row in rows:
+            done_counts[row['date']] += row['done_count']
+
+    # Replace the existing rollup rows with the recomputed ones
+    BoardDailyStatistics.objects.filter(board=board).delete()
+    statistics = BoardDailyStatistics.objects.bulk_create([
+        BoardDailyStatistics(board=board, date=date, done_count=done_count) for date, done_count in done_counts.items()
+    ])
+
+    return len(statistics)
@@ -0,0 +1,1149 @@
+import gzip
+import json
+import os
+import runpy
+import sqlite3
+import tempfile
+import tracemalloc
+from io import BytesIO, StringIO
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.messages import get_messages
+from django.core import mail
+from django.core.cache import cache, caches
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import Client, LiveServerTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+
+from . import settings as project_settings
+from .archive import archive_board_cards, archived_cards_page
+from .attachments import blob_name, discard_upload, file_digest, release_attachment, start_upload, store_attachment
+from .backends.sqlite3.base import DatabaseWrapper
+from .changes import batched_changes, record_changes
+from .columns import COLUMN_PAGE_SIZE, column_page
+from .counters import reconcile_board_counters
+from .dashboard import BOARD_VERSION_KEY, USER_VERSION_KEY, get_dashboard, invalidate_boards, invalidate_user
+from .exports import iter_board_json, iter_buffered
+from .fragments import CARD_TILE_CACHE, render_card_tiles
+from .mail import claim_due_emails, deliver_queued_emails
+from .models import ArchivedCard, AttachmentBlob, Board, BoardChange, Card, CustomUser, OutgoingEmail
+from .profiling import RequestProfile, record_profile, render_profile_metrics, reset_profile_metrics
+from .ranking import RANK_GAP, move_cards
+from .realtime import InProcessBroker, RedisBroker, stream_board_events
+from .statistics import count_done_cards, get_board_statistics
+from .thumbnails import generate_pending_thumbnails, thumbnail_name
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class BoardTestCase(TestCase):
+    """
+    Creates a board with an owner signed in to the test client.
+    """
+
+    def setUp(self):
+        # The dashboards and card tiles cached by the previous tests refer to rolled back rows
+        cache.clear()
+        self.owner = CustomUser.objects.create(username='owner', email='owner@example.com', password='pw')
+        self.board = Board.objects.create(title='Board', description='Description', owner=self.owner)
+        self.client.force_login(self.owner)
+
+    def create_cards(self, count, status='TO_DO'):
+        return [
+            Card.objects.create(board=self.board, title=f'Card {index}', creator=self.owner, status=status)
+            for index in range(count)
+        ]
+
+    def at(self, days_ago):
+        # Runs the code of the block as if it was the given number of days ago
+        return mock.patch('django.utils.timezone.now', return_value=timezone.now() - timedelta(days=days_ago))
+
+
+class BoardSlugTests(BoardTestCase):
+
+    def create_board(self, title, owner=None):
+        return Board.objects.create(title=title, description='Description', owner=owner or self.owner)
+
+    def test_colliding_slugs_get_a_suffix(self):
+        self.assertEqual(self.board.slug, 'board')
+        self.assertEqual(self.create_board('Board').slug, 'board-2')
+        self.assertEqual(self.create_board('BOARD!').slug, 'board-3')
+        self.assertEqual(self.create_board('Boards').slug, 'boards')
+
+        # Slugs are only unique per owner
+        other = CustomUser.objects.create(username='other', email='other@example.com', password='pw')
+        self.assertEqual(self.create_board('Board', owner=other).slug, 'board')
+
+    def test_slug_fits_the_field_with_its_suffix(self):
+        first, second = self.create_board('x' * 100), self.create_board('x' * 100)
+        self.assertEqual(first.slug, 'x' * 46)
+        self.assertEqual(second.slug, 'x' * 46 + '-2')
+        self.assertEqual(self.create_board('!!!').slug, 'board-2')
+
+    def test_slug_taken_concurrently_is_retried(self):
+        unique_slug = Board.unique_slug
+
+        def stale_slug(board, text, taken=()):
+            # The first slug is picked as if the board of the setup had not been saved yet
+            return 'board' if not taken else unique_slug(board, text, taken)
+
+        with mock.patch.object(Board, 'unique_slug', autospec=True, side_effect=stale_slug) as picked:
+            board = self.create_board('Board')
+
+        self.assertEqual(picked.call_count, 2)
+        self.assertEqual(board.slug, 'board-2')
+        self.assertEqual(Board.objects.get(id=board.id).slug, 'board-2')
+
+
+class DatabaseProfileTests(TestCase):
+
+    def database_settings(self, **environ):
+        with mock.patch.dict(os.environ, environ):
+            return runpy.run_path(project_settings.__file__)['DATABASES']['default']
+
+    def test_sqlite_connections_are_tuned(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'db.sqlite3')
+            wrapper = DatabaseWrapper({**connection.settings_dict, 'NAME': path}, alias='tuned')
+            wrapper.ensure_connection()
+            self.addCleanup(wrapper.close)
+
+            with wrapper.cursor() as cursor:
+                for pragma, value in (('journal_mode', 'wal'), ('synchronous', 1), ('busy_timeout', 20000)):
+                    cursor.execute(f'PRAGMA {pragma}')
+                    self.assertEqual(cursor.fetchone()[0], value)
+
+            # A transaction takes the write lock when it begins, another writer has to wait for it
+            other = sqlite3.connect(path, timeout=0)
+            self.addCleanup(other.close)
+            wrapper._start_transaction_under_autocommit()
+            with self.assertRaisesMessage(sqlite3.OperationalError, 'database is locked'):
+                other.execute('CREATE TABLE other (id INTEGER)')
+            wrapper.rollback()
+
+    def test_invalid_sqlite_transaction_mode_is_rejected(self):
+        options = {**connection.settings_dict['OPTIONS'], 'transaction_mode': 'LAZY'}
+        wrapper = DatabaseWrapper({**connection.settings_dict, 'OPTIONS': options}, alias='invalid')
+        with self.assertRaises(ImproperlyConfigured):
+            wrapper.get_connection_params()
+
+    def test_postgresql_profile_is_read_from_the_environment(self):
+        database = self.database_settings(BUSYBOARD_DB_ENGINE='postgresql', BUSYBOARD_DB_HOST='db')
+        self.assertEqual((database['HOST'], database['PORT']), ('db', '5432'))
+        self.assertEqual(database['CONN_MAX_AGE'], 600)
+        self.assertTrue(database['CONN_HEALTH_CHECKS'])
+        self.assertFalse(database['DISABLE_SERVER_SIDE_CURSORS'])
+
+        # Through a transaction pooler the server-side cursors are disabled
+        database = self.database_settings(BUSYBOARD_DB_ENGINE='postgresql', BUSYBOARD_DB_POOLED='1')
+        self.assertEqual(database['PORT'], '6432')
+        self.assertTrue(database['DISABLE_SERVER_SIDE_CURSORS'])
+
+        with self.assertRaises(ImproperlyConfigured):
+            self.database_settings(BUSYBOARD_DB_ENGINE='oracle')
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class LoadTestTests(LiveServerTestCase):
+
+    def setUp(self):
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        media = override_settings(MEDIA_ROOT=media_root.name)
+        media.enable()
+        self.addCleanup(media.disable)
+
+    def generate(self, *args):
+        out = StringIO()
+        call_command('generate_dataset', '--users=3', '--boards=4', '--cards=60', '--attachments=0.2', *args,
+                     stdout=out)
+        return out.getvalue()
+
+    def test_generated_dataset_is_consistent(self):
+        self.generate()
+
+        boards = Board.objects.filter(owner__username__startswith='loaduser')
+        self.assertEqual(CustomUser.objects.filter(username__startswith='loaduser').count(), 3)
+        self.assertEqual(boards.count(), 4)
+        self.assertEqual(Card.objects.filter(board__in=boards).count(), 60)
+        self.assertTrue(Card.objects.exclude(attachment=None).exists())
+        self.assertEqual(reconcile_board_counters(boards), 0)
+
+        # The users of an earlier dataset are only replaced on request
+        with self.assertRaises(CommandError):
+            self.generate()
+        self.assertIn('3 existing users deleted', self.generate('--clear'))
+        self.assertEqual(Card.objects.filter(board__in=boards).count(), 60)
+
+    def test_load_test_runs_sessions_against_the_server(self):
+        self.generate('--users=1')
+        out = StringIO()
+        # The live server threads share the in-memory test database, a single session keeps its writes apart
+        call_command('load_test', f'--url={self.live_server_url}', '--sessions=1', '--duration=1', stdout=out)
+
+        report = out.getvalue()
+        for endpoint in ('my_boards', 'board_details', 'update_card_statuses', 'export_board_to_json'):
+            self.assertIn(endpoint, report)
+        self.assertRegex(report, r'\d+ requests, 0 errors')
+
+
+class QueryPlanTests(TestCase):
+
+    def test_models_match_the_migrations(self):
+        # makemigrations --check exits with an error status when a model change has no migration
+        call_command('makemigrations', 'busyboard_app', check=True, dry_run=True, stdout=StringIO())
+
+    def test_board_and_card_views_do_not_scan_whole_tables(self):
+        out = StringIO()
+        call_command('check_query_plans', stdout=out)
+        self.assertIn('no full table scans', out.getvalue())
+
+
+class BoardStatisticsTests(BoardTestCase):
+
+    def assertStatisticsMatchCards(self):
+        self.assertEqual(get_board_statistics(self.board), count_done_cards(self.board))
+
+    def test_done_card_counted_on_completion_day(self):
+        card, = self.create_cards(1)
+
+        with self.at(10):
+            self.client.post(reverse('update_card_status'), {'card_id': card.id, 'status': 'DONE'})
+
+        statistics = get_board_statistics(self.board)
+        self.assertEqual(statistics['weekly_done'], 0)
+        self.assertEqual(statistics['monthly_done'], 1)
+        self.assertStatisticsMatchCards()
+
+    def test_edited_done_card_moved_out_of_done(self):
+        card, = self.create_cards(1)
+
+        with self.at(10):
+            self.client.post(reverse('update_card_status'), {'card_id': card.id, 'status': 'DONE'})
+        with self.at(3):
+            # Editing the card moves its update datetime but not the day it was completed on
+            card.refresh_from_db()
+            card.title = 'Edited'
+            card.save()
+        self.client.post(reverse('update_card_status'), {'card_id': card.id, 'status': 'TO_DO'})
+
+        self.assertEqual(get_board_statistics(self.board)['annually_done'], 0)
+        self.assertStatisticsMatchCards()
+
+    def test_deleted_done_card(self):
+        card, other = self.create_cards(2, status='DONE')
+
+        self.client.post(reverse('delete_card', args=[card.id]))
+
+        self.assertEqual(get_board_statistics(self.board)['daily_done'], 1)
+        self.assertStatisticsMatchCards()
+
+    def test_statistics_query_count(self):
+        self.create_cards(20, status='DONE')
+
+        with self.assertNumQueries(1):
+            get_board_statistics(self.board)
+
+
+class BoardPageQueryCountTests(BoardTestCase):
+
+    def add_members_and_cards(self, count):
+        # Run the cache invalidations that follow the commits of the changes
+        with self.captureOnCommitCallbacks(execute=True):
+            for index in range(count):
+                number = CustomUser.objects.count()
+                member = CustomUser.objects.create(
+                    username=f'member{number}', email=f'member{number}@example.com', password='pw',
+                )
+                self.board.users.add(member)
+                self.board.invited_users.add(member)
+                Card.objects.create(board=self.board, title=f'Card {index}', creator=member,
+                                    status=Card.STATUS_CHOICES[index % len(Card.STATUS_CHOICES)][0])
+
+    def assertConstantQueries(self, url):
+        self.add_members_and_cards(2)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get(url).status_code, 200)
+
+        # The page of a board ten times larger runs the same queries
+        self.add_members_and_cards(20)
+        with self.assertNumQueries(len(queries)):
+            self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_my_boards(self):
+        self.assertConstantQueries(reverse('my_boards'))
+
+    def test_board_details(self):
+        self.assertConstantQueries(reverse('board_details', args=[self.board.id, self.board.slug]))
+
+
+class BoardExportTests(BoardTestCase):
+
+    def measure_export(self, card_count):
+        board = Board.objects.create(title=f'Export {card_count}', description='Export', owner=self.owner)
+        Card.objects.bulk_create([
+            Card(board=board, title=f'Card {index}', description='Exported card ' * 20, creator=self.owner)
+            for index in range(card_count)
+        ])
+
+        tracemalloc.start()
+        try:
+            size = sum(len(chunk) for chunk in iter_buffered(iter_board_json(board, chunk_size=100)))
+            return size, tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    def test_export_memory_is_bounded(self):
+        _, small_peak = self.measure_export(500)
+        size, large_peak = self.measure_export(5000)
+
+        # Ten times more cards take about the same memory, far less than the exported document
+        self.assertLess(large_peak, small_peak * 1.5)
+        self.assertLess(large_peak, size / 4)
+
+    def test_export_keeps_column_order(self):
+        self.create_cards(3)
+        # Move the bottom card of the column to the top
+        top, bottom = Card.objects.filter(board=self.board).order_by('rank')[::2]
+        move_cards([(bottom.id, 'TO_DO', None, top.id)])
+
+        response = self.client.get(reverse('export_board_to_json', args=[self.board.id]))
+        exported = json.loads(b''.join(response.streaming_content))['cards']
+
+        column = Card.objects.filter(board=self.board, status='TO_DO').order_by('rank')
+        self.assertEqual([card['title'] for card in exported], [card.title for card in column])
+        self.assertEqual(exported[0]['title'], bottom.title)
+
+
+class BoardImportTests(BoardTestCase):
+
+    def import_file(self, content, name='board.json'):
+        # Drop the messages of the previous imports
+        self.client.cookies.pop('messages', None)
+        response = self.client.post(reverse('import_board_from_json'), {'file': SimpleUploadedFile(name, content)})
+        self.assertEqual(response.status_code, 302)
+        return [str(message) for message in get_messages(response.wsgi_request)]
+
+    def test_round_trip_keeps_column_order(self):
+        for card in self.create_cards(5):
+            # Give two cards the same rank, they keep the order of the export
+            card.rank = 0 if card.title in ('Card 1', 'Card 2') else card.rank
+            card.save()
+        export = b''.join(self.client.get(reverse('export_board_to_json', args=[self.board.id])).streaming_content)
+
+        self.assertEqual(self.import_file(export), ['Imported 5 cards.'])
+
+        board = Board.objects.exclude(id=self.board.id).get()
+        original = Card.objects.filter(board=self.board).order_by('rank', 'id')
+        imported = Card.objects.filter(board=board).order_by('rank')
+        self.assertEqual([card.title for card in imported], [card.title for card in original])
+        ranks = [card.rank for card in imported]
+        self.assertTrue(all(upper - lower >= RANK_GAP for lower, upper in zip(ranks, ranks[1:])))
+
+    def test_compact_json_and_ndjson(self):
+        board = {'title': 'Imported', 'description': 'Imported board'}
+        cards = [{'title': f'Card {index}', 'status': 'Done'} for index in range(3)]
+        compact = json.dumps({'board': board, 'cards': cards}, separators=(',', ':')).encode()
+        ndjson = '\n'.join(json.dumps(record) for record in [{'board': board}, *cards]).encode()
+
+        self.assertEqual(self.import_file(compact), ['Imported 3 cards.'])
+        self.assertEqual(self.import_file(gzip.compress(ndjson), 'board.ndjson.gz'), ['Imported 3 cards.'])
+        self.assertEqual(Card.objects.filter(board__title='Imported', status='DONE').count(), 6)
+
+    def test_invalid_files(self):
+        board = {'title': 'Imported'}
+        for content in (
+            '{"board": {"title": "Café"}}'.encode('latin-1'),
+            gzip.compress(b'{"board": {}}')[:-10],
+            b'\x1f\x8bnot gzip',
+            json.dumps({'board': {'title': 123}}).encode(),
+            json.dumps({'board': board, 'cards': [{'title': ['list']}]}).encode(),
+            json.dumps({'board': board, 'cards': [{'title': 'Card', 'description': 1}]}).encode(),
+            json.dumps({'board': board, 'cards': [{'title': 'Card', 'color': 'red'}]}).encode(),
+            json.dumps({'board': board, 'cards': [{'title': 'Card', 'status': 1}]}).encode(),
+        ):
+            with self.subTest(content=content):
+                message, = self.import_file(content)
+                self.assertTrue(message.startswith('The board could not be imported'), message)
+
+        self.assertFalse(Board.objects.filter(title='Imported').exists())
+
+
+class BoardCounterTests(BoardTestCase):
+
+    def counters(self):
+        board = Board.objects.get(id=self.board.id)
+        return (board.member_count, board.todo_card_count, board.in_progress_card_count, board.done_card_count)
+
+    def test_counters_follow_cards_and_members(self):
+        card, _, _ = self.create_cards(3)
+        member = CustomUser.objects.create(username='member', email='member@example.com', password='pw')
+        self.board.users.add(member)
+        self.assertEqual(self.counters(), (1, 3, 0, 0))
+
+        self.client.post(reverse('update_card_status'), {'card_id': card.id, 'status': 'DONE'})
+        self.client.post(reverse('delete_card', args=[Card.objects.filter(status='TO_DO').first().id]))
+        self.board.users.remove(member)
+        self.assertEqual(self.counters(), (0, 1, 0, 1))
+
+    def test_drifted_counters_are_reconciled(self):
+        self.create_cards(2)
+        other = Board.objects.create(title='Other', description='Other', owner=self.owner)
+
+        # Cards written without the signals leave the counters behind
+        Card.objects.bulk_create([Card(board=self.board, title='Raw', creator=self.owner, status='DONE')])
+        Board.objects.filter(id=self.board.id).update(member_count=5)
+
+        self.assertEqual(reconcile_board_counters(Board.objects.all()), 1)
+        self.assertEqual(self.counters(), (0, 2, 0, 1))
+        self.assertEqual(Board.objects.get(id=other.id).todo_card_count, 0)
+
+        # The counters are right now, nothing is left to repair
+        out = StringIO()
+        call_command('reconcile_board_counters', stdout=out)
+        self.assertIn('0 board counters repaired', out.getvalue())
+
+
+class CardStatusTests(BoardTestCase):
+
+    def test_update_card_status_rejects_invalid_requests(self):
+        card, = self.create_cards(1)
+
+        for data in ({'status': 'DONE'}, {'card_id': 'x', 'status': 'DONE'}, {'card_id': card.id, 'status': 'LOST'}):
+            with self.subTest(data=data):
+                self.assertEqual(self.client.post(reverse('update_card_status'), data).status_code, 400)
+
+        card.refresh_from_db()
+        self.assertEqual(card.status, 'TO_DO')
+        self.assertEqual(Board.objects.get(id=self.board.id).todo_card_count, 1)
+
+    def test_update_card_statuses_requires_csrf_token(self):
+        card, = self.create_cards(1)
+        client = Client(enforce_csrf_checks=True)
+        client.force_login(self.owner)
+        moves = json.dumps([{'card_id': card.id, 'status': 'DONE'}])
+
+        self.assertEqual(client.post(reverse('update_card_statuses'), {'moves': moves}).status_code, 403)
+
+        # The board page sets the CSRF cookie whose token it posts with the moves
+        client.get(reverse('board_details', args=[self.board.id, self.board.slug]))
+        token = client.cookies['csrftoken'].value
+        response = client.post(reverse('update_card_statuses'), {'moves': moves, 'csrfmiddlewaretoken': token})
+        self.assertEqual(response.json(), {'status': 'success', 'updated': 1})
+
+
+class CardRankTests(BoardTestCase):
+
+    def column(self, status='TO_DO'):
+        return list(Card.objects.filter(board=self.board, status=status).order_by('rank', 'id'))
+
+    def test_status_change_without_neighbours_goes_to_top(self):
+        self.create_cards(2, status='DONE')
+        card, = self.create_cards(1)
+        Card.objects.filter(id=card.id).update(rank=10 ** 12)
+
+        self.client.post(reverse('update_card_status'), {'card_id': card.id, 'status': 'DONE'})
+
+        self.assertEqual(self.column('DONE')[0], card)
+
+    def test_crowded_column_is_rebalanced_in_one_change(self):
+        self.create_cards(2)
+        top, bottom = self.column()
+        version = Board.objects.get(id=self.board.id).version
+
+        # Move cards between the same two cards until the gap between them runs out
+        upper = top
+        for card in self.create_cards(30):
+            move_cards([(card.id, 'TO_DO', upper.id, bottom.id)])
+            upper = card
+
+        ranks = [card.rank for card in self.column()]
+        self.assertEqual(len(set(ranks)), 32)
+        self.assertEqual([card.id for card in self.column()][-1], bottom.id)
+        changes = BoardChange.objects.filter(board=self.board, seq__gt=version, object_type='COLUMN')
+        self.assertGreater(changes.count(), 0)
+        self.assertFalse(BoardChange.objects.filter(board=self.board, seq__gt=version, object_type='CARD',
+                                                    object_id=bottom.id).exists())
+
+    def test_stale_neighbours_do_not_collide(self):
+        self.create_cards(3)
+        first, second, third = self.column()
+        moved, = self.create_cards(1)
+
+        # The neighbours sent by a client that missed an earlier move are in the wrong order
+        move_cards([(moved.id, 'TO_DO', third.id, first.id)])
+
+        ranks = [card.rank for card in self.column()]
+        self.assertEqual(len(set(ranks)), 4)
+
+
+class BoardPermissionTests(BoardTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.member = CustomUser.objects.create(username='member', email='member@example.com', password='pw')
+        self.outsider = CustomUser.objects.create(username='outsider', email='outsider@example.com', password='pw')
+        self.board.users.add(self.member)
+        self.card, = self.create_cards(1)
+
+    def client_for(self, user):
+        client = Client()
+        client.force_login(user)
+        return client
+
+    def member_urls(self):
+        board_args = [self.board.id, self.board.slug]
+        return [
+            reverse('board_details', args=board_args),
+            reverse('board_column', args=board_args + ['TO_DO']),
+            reverse('board_archive', args=board_args),
+            reverse('get_card_details', args=[self.card.id]),
+            reverse('export_board_to_json', args=[self.board.id]),
+        ]
+
+    def test_board_views_are_limited_to_owner_and_members(self):
+        for url in self.member_urls():
+            with self.subTest(url=url):
+                self.assertEqual(self.client_for(self.owner).get(url).status_code, 200)
+                self.assertEqual(self.client_for(self.member).get(url).status_code, 200)
+                self.assertEqual(self.client_for(self.outsider).get(url).status_code, 403)
+
+    def test_missing_boards_and_cards_are_not_found(self):
+        client = self.client_for(self.owner)
+        self.assertEqual(client.get(reverse('board_details', args=[self.board.id + 1, 'board'])).status_code, 404)
+        self.assertEqual(client.get(reverse('get_card_details', args=[self.card.id + 1])).status_code, 404)
+
+    def test_owner_only_views_are_forbidden_to_members(self):
+        board_args = [self.board.id, self.board.slug]
+        for url in (reverse('edit_board', args=[self.board.id]), reverse('invite_to_board', args=board_args)):
+            with self.subTest(url=url):
+                self.assertEqual(self.client_for(self.owner).get(url).status_code, 200)
+                self.assertEqual(self.client_for(self.member).get(url).status_code, 403)
+                self.assertEqual(self.client_for(self.outsider).get(url).status_code, 403)
+
+        member = self.client_for(self.member)
+        for url, data in (
+            (reverse('save_board_changes', args=[self.board.id]), {'title': 'Renamed', 'description': 'Renamed'}),
+            (reverse('remove_user_from_board', args=board_args), {'username': 'member'}),
+            (reverse('delete_board', args=[self.board.id]), {}),
+        ):
+            with self.subTest(url=url):
+                self.assertEqual(member.post(url, data).status_code, 403)
+
+        # Nothing has been changed by the member
+        self.board.refresh_from_db()
+        self.assertEqual(self.board.title, 'Board')
+        self.assertTrue(self.board.users.filter(id=self.member.id).exists())
+
+
+class DashboardCacheTests(BoardTestCase):
+
+    def titles(self):
+        return [board['title'] for board in get_dashboard(self.owner)['owned_boards']]
+
+    def test_evicted_board_version_does_not_match_the_cached_dashboard(self):
+        invalidate_boards([self.board.id])
+        self.assertEqual(self.titles(), ['Board'])
+
+        # The version of the board is evicted, then the board changes without the signals refreshing the cache
+        cache.delete(BOARD_VERSION_KEY.format(board_id=self.board.id))
+        Board.objects.filter(id=self.board.id).update(title='Renamed')
+        invalidate_boards([self.board.id])
+
+        self.assertEqual(self.titles(), ['Renamed'])
+
+    def test_evicted_user_version_does_not_match_the_cached_dashboard(self):
+        invalidate_user(self.owner.id)
+        self.assertEqual(self.titles(), ['Board'])
+
+        cache.delete(USER_VERSION_KEY.format(user_id=self.owner.id))
+        Board.objects.bulk_create([Board(title='Other', description='Other', owner=self.owner, slug='other')])
+        invalidate_user(self.owner.id)
+
+        self.assertEqual(self.titles(), ['Board', 'Other'])
+
+
+@override_settings(EMAIL_BACKEND='busyboard_app.mail.OutboxEmailBackend',
+                   OUTBOX_DELIVERY_BACKEND='django.core.mail.backends.locmem.EmailBackend')
+class OutboxTests(TestCase):
+
+    def queue_email(self):
+        mail.send_mail('Subject', 'Body', 'from@example.com', ['to@example.com'])
+
+    def test_emails_are_queued_and_sent_by_the_worker(self):
+        self.queue_email()
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(OutgoingEmail.objects.get().status, 'PENDING')
+
+        self.assertEqual(deliver_queued_emails(), (1, 0))
+        self.assertEqual(mail.outbox[0].subject, 'Subject')
+        self.assertEqual(mail.outbox[0].to, ['to@example.com'])
+        self.assertEqual(OutgoingEmail.objects.get().status, 'SENT')
+        self.assertEqual(deliver_queued_emails(), (0, 0))
+
+    def test_failed_emails_are_retried_with_backoff_then_given_up(self):
+        self.queue_email()
+
+        with mock.patch('django.core.mail.backends.locmem.EmailBackend.send_messages', side_effect=OSError('Down')):
+            self.assertEqual(deliver_queued_emails(max_attempts=2), (0, 1))
+            email = OutgoingEmail.objects.get()
+            self.assertEqual((email.status, email.attempts, email.last_error), ('PENDING', 1, 'OSError: Down'))
+            self.assertGreater(email.next_attempt_datetime, timezone.now())
+
+            # The email is not due again before its retry delay
+            self.assertEqual(deliver_queued_emails(max_attempts=2), (0, 0))
+            OutgoingEmail.objects.update(next_attempt_datetime=timezone.now())
+            self.assertEqual(deliver_queued_emails(max_attempts=2), (0, 1))
+
+        email = OutgoingEmail.objects.get()
+        self.assertEqual((email.status, email.attempts), ('FAILED', 2))
+        self.assertEqual(len(mail.outbox), 0)
+
+    def test_claimed_emails_are_not_claimed_again(self):
+        self.queue_email()
+        self.assertEqual(len(claim_due_emails()), 1)
+        self.assertEqual(claim_due_emails(), [])
+
+
+class MetricsTests(BoardTestCase):
+
+    @override_settings(METRICS_TOKEN='scrape-token')
+    def test_metrics_require_token_or_staff(self):
+        for name in ('dashboard_cache_metrics', 'profiling_metrics'):
+            with self.subTest(name=name):
+                url = reverse(name)
+                scraper = Client()
+                self.assertEqual(scraper.get(url).status_code, 403)
+                self.assertEqual(scraper.get(url, HTTP_AUTHORIZATION='Bearer wrong').status_code, 403)
+                self.assertEqual(scraper.get(url, HTTP_AUTHORIZATION='Bearer scrape-token').status_code, 200)
+
+                # Signed-in users only see the metrics if they are staff members
+                self.assertEqual(self.client.get(url).status_code, 403)
+                CustomUser.objects.filter(id=self.owner.id).update(is_staff=True)
+                self.assertEqual(self.client.get(url).status_code, 200)
+                CustomUser.objects.filter(id=self.owner.id).update(is_staff=False)
+
+    @override_settings(METRICS_TOKEN='')
+    def test_metrics_token_is_disabled_when_not_set(self):
+        scraper = Client()
+        for authorization in ('Bearer ', 'Bearer'):
+            with self.subTest(authorization=authorization):
+                response = scraper.get(reverse('profiling_metrics'), HTTP_AUTHORIZATION=authorization)
+                self.assertEqual(response.status_code, 403)
+
+    def test_profiling_metrics_are_shared_through_the_cache(self):
+        reset_profile_metrics()
+        profile = RequestProfile()
+        profile.queries = 3
+        record_profile('board_details', 0.02, profile)
+
+        # The histograms read back from the cache include the measurements of the process rendering them
+        metrics = render_profile_metrics()
+        self.assertIn('busyboard_request_queries_bucket{view="board_details",le="5"} 1', metrics)
+        self.assertIn('busyboard_request_duration_seconds_sum{view="board_details"} 0.020000', metrics)
+
+        # Measurements flushed by another process sharing the cache are added to them
+        cache.incr('profiling:busyboard_request_queries:board_details:count', 2)
+        self.assertIn('busyboard_request_queries_count{view="board_details"} 3', render_profile_metrics())
+        reset_profile_metrics()
+
+
+class APITests(BoardTestCase):
+
+    def cards_url(self, board=None):
+        return reverse('api_board_cards', args=[(board or self.board).id])
+
+    def test_cards_are_paginated_with_a_cursor(self):
+        cards = self.create_cards(5)
+
+        ids, cursor = [], None
+        while True:
+            params = {'limit': 2, 'fields': 'id,title'}
+            if cursor:
+                params['cursor'] = cursor
+            page = self.client.get(self.cards_url(), params).json()
+            self.assertLessEqual(len(page['results']), 2)
+            self.assertEqual(set(page['results'][0]), {'id', 'title'})
+            ids.extend(item['id'] for item in page['results'])
+            cursor = page['next_cursor']
+            if not cursor:
+                break
+
+        self.assertEqual(ids, [card.id for card in cards])
+        self.assertEqual(self.client.get(self.cards_url(), {'cursor': 'invalid'}).status_code, 400)
+        self.assertEqual(self.client.get(self.cards_url(), {'limit': 0}).status_code, 400)
+        self.assertEqual(self.client.get(self.cards_url(), {'fields': 'secret'}).status_code, 400)
+
+    def test_bulk_create_is_atomic(self):
+        response = self.client.post(self.cards_url(), [{'title': 'Valid'}, {'title': 'Invalid', 'color': '#12'}],
+                                    content_type='application/json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['message'], 'Card 1: the color must be a #RRGGBB color')
+        self.assertFalse(Card.objects.filter(board=self.board).exists())
+
+        response = self.client.post(self.cards_url(), {'cards': [{'title': 'Valid', 'color': '#1A2B3C'}]},
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Card.objects.get(id=response.json()['created'][0]).color, '#1A2B3C')
+
+    def test_bulk_update_is_atomic(self):
+        first, second = self.create_cards(2)
+        other_board = Board.objects.create(title='Other', description='Other', owner=self.owner)
+        other, = Card.objects.bulk_create([Card(board=other_board, title='Other', creator=self.owner)])
+
+        for items, status in (
+            ([{'id': first.id, 'title': 'Edited'}, {'id': second.id, 'status': 'LOST'}], 400),
+            ([{'id': first.id, 'title': 'Edited'}, {'title': 'No id'}], 400),
+            ([{'id': first.id, 'title': 'Edited'}, {'id': other.id, 'title': 'Edited'}], 404),
+        ):
+            with self.subTest(items=items):
+                response = self.client.patch(self.cards_url(), items, content_type='application/json')
+                self.assertEqual(response.status_code, status)
+                first.refresh_from_db()
+                self.assertEqual(first.title, 'Card 0')
+
+        response = self.client.patch(self.cards_url(), [{'id': first.id, 'title': 'Edited'}],
+                                     content_type='application/json')
+        self.assertEqual(response.json(), {'status': 'success', 'updated': [first.id]})
+
+    def test_invalid_requests_are_rejected(self):
+        for body, content_type, status in (
+            ('title=Card', 'application/x-www-form-urlencoded', 415),
+            ('{', 'application/json', 400),
+            ('[]', 'application/json', 400),
+            ('[{"description": "No title"}]', 'application/json', 400),
+            ('[{"title": "Card", "priority": "URGENT"}]', 'application/json', 400),
+        ):
+            with self.subTest(body=body):
+                response = self.client.post(self.cards_url(), body, content_type=content_type)
+                self.assertEqual(response.status_code, status)
+                self.assertEqual(response.json()['status'], 'error')
+
+        self.assertEqual(self.client.delete(self.cards_url()).status_code, 405)
+
+    def test_boards_are_limited_to_owner_and_members(self):
+        outsider = CustomUser.objects.create(username='outsider', email='outsider@example.com', password='pw')
+        card, = self.create_cards(1)
+        client = Client()
+        self.assertEqual(client.get(self.cards_url()).status_code, 401)
+
+        client.force_login(outsider)
+        self.assertEqual(client.get(reverse('api_boards')).json()['results'], [])
+        for url in (reverse('api_board', args=[self.board.id]), self.cards_url(),
+                    reverse('api_card', args=[card.id])):
+            with self.subTest(url=url):
+                self.assertEqual(client.get(url).status_code, 404)
+        response = client.post(self.cards_url(), [{'title': 'Intruder'}], content_type='application/json')
+        self.assertEqual(response.status_code, 404)
+
+        self.board.users.add(outsider)
+        self.assertEqual(client.get(reverse('api_card', args=[card.id])).json()['title'], 'Card 0')
+
+    def test_session_writes_require_csrf_token(self):
+        client = Client(enforce_csrf_checks=True)
+        client.force_login(self.owner)
+
+        response = client.post(self.cards_url(), [{'title': 'Forged'}], content_type='application/json')
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(response.json()['status'], 'error')
+        self.assertFalse(Card.objects.filter(board=self.board).exists())
+
+        # Reading the API sets the CSRF cookie whose token the writes send in a header
+        client.get(reverse('api_boards'))
+        token = client.cookies['csrftoken'].value
+        response = client.post(self.cards_url(), [{'title': 'Created'}], content_type='application/json',
+                               HTTP_X_CSRFTOKEN=token)
+        self.assertEqual(response.status_code, 201)
+
+
+class RealtimeTests(BoardTestCase):
+
+    def test_api_changes_are_published(self):
+        url = reverse('api_board_cards', args=[self.board.id])
+        broker = InProcessBroker()
+
+        with mock.patch('busyboard_app.realtime.get_broker', return_value=broker), \
+                mock.patch.object(broker, 'publish') as publish, self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(url, [{'title': 'Created'}, {'title': 'Other'}],
+                                        content_type='application/json')
+            created = response.json()['created']
+            self.client.patch(url, [{'id': created[0], 'title': 'Edited', 'status': 'DONE'}],
+                              content_type='application/json')
+
+        events = [event for _, (board_id, event), _ in publish.mock_calls]
+        self.assertEqual([event['type'] for event in events], ['created', 'created', 'edited'])
+        self.assertEqual(events[2]['card']['status'], 'DONE')
+        self.assertIn('Edited', events[2]['html'])
+
+    def test_redis_listener_reconnects_after_a_connection_error(self):
+        class Disconnected(Exception):
+            pass
+
+        def listen():
+            # The connection drops twice before delivering a message
+            if listen.calls < 2:
+                listen.calls += 1
+                raise Disconnected
+            yield {'channel': f'{RedisBroker.CHANNEL_PREFIX}{self.board.id}'.encode(), 'data': b'data: {}\n\n'}
+
+        listen.calls = 0
+        broker = RedisBroker.__new__(RedisBroker)
+        InProcessBroker.__init__(broker)
+        broker._pubsub = mock.Mock(listen=listen)
+        broker._connection_errors = (Disconnected,)
+
+        with mock.patch('busyboard_app.realtime.time.sleep') as sleep, \
+                mock.patch.object(broker, 'deliver') as deliver, self.assertLogs('busyboard_app.realtime', 'WARNING'):
+            broker._listen()
+
+        self.assertEqual([call.args[0] for call in sleep.mock_calls], [0.5, 1])
+        deliver.assert_called_once_with(self.board.id, 'data: {}\n\n')
+
+    async def test_stream_closes_when_access_is_removed(self):
+        member = await CustomUser.objects.acreate(username='member', email='member@example.com', password='pw')
+        await self.board.users.aadd(member)
+
+        with mock.patch('busyboard_app.realtime.get_broker', return_value=InProcessBroker()), \
+                mock.patch('busyboard_app.realtime.REALTIME_HEARTBEAT_INTERVAL', 0.01), \
+                mock.patch('busyboard_app.realtime.REALTIME_STREAM_TIMEOUT', 5):
+            stream = stream_board_events(self.board.id, member)
+            self.assertTrue((await anext(stream)).startswith('retry:'))
+            self.assertEqual(await anext(stream), ': ping\n\n')
+
+            await self.board.users.aremove(member)
+            frames = [frame async for frame in stream]
+
+        # The stream ends at the next access check, without asking the browser to reconnect
+        self.assertEqual(set(frames) - {': ping\n\n'}, set())
+
+
+class ThumbnailTests(BoardTestCase):
+
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        media = override_settings(MEDIA_ROOT=media_root.name)
+        media.enable()
+        self.addCleanup(media.disable)
+
+    def upload_photo(self, name):
+        content = BytesIO()
+        Image.new('RGB', (300, 200), 'teal').save(content, Image.registered_extensions()[name[name.rindex('.'):]])
+        photo = SimpleUploadedFile(name, content.getvalue())
+        self.client.post(reverse('settings'), {'change_photo': '', 'new_photo': photo})
+        return CustomUser.objects.get(id=self.owner.id)
+
+    def test_photos_differing_by_extension_have_their_own_thumbnails(self):
+        self.assertNotEqual(thumbnail_name('photos/me.jpg', 'small', 'webp'),
+                            thumbnail_name('photos/me.png', 'small', 'webp'))
+
+    def test_uploaded_photo_is_queued_for_the_worker(self):
+        user = self.upload_photo('me.png')
+        # The original photo is shown until the worker has generated the thumbnails
+        self.assertEqual(user.small_profile_photo.webp, user.profile_photo.url)
+
+        self.assertEqual(generate_pending_thumbnails(), (1, []))
+
+        user = CustomUser.objects.get(id=self.owner.id)
+        self.assertTrue(user.small_profile_photo.webp.endswith('/thumbnails/me.png_64.webp'))
+        self.assertEqual(generate_pending_thumbnails(), (0, []))
+
+    def test_non_image_upload_is_rejected(self):
+        photo = SimpleUploadedFile('me.png', b'not an image')
+        response = self.client.post(reverse('settings'), {'change_photo': '', 'new_photo': photo})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['profile_photo_form'].errors)
+        self.assertFalse(CustomUser.objects.get(id=self.owner.id).profile_photo)
+
+    def test_oversized_photo_leaves_the_queue(self):
+        user = self.upload_photo('me.png')
+
+        # A photo of more pixels than twice the limit of Pillow is refused as a decompression bomb
+        with mock.patch.object(Image, 'MAX_IMAGE_PIXELS', 1000):
+            generated, failed = generate_pending_thumbnails()
+        self.assertEqual((generated, failed), (0, [user]))
+
+        # The worker does not pick the photo again, and the original photo is still shown
+        self.assertEqual(generate_pending_thumbnails(), (0, []))
+        user = CustomUser.objects.get(id=self.owner.id)
+        self.assertEqual(user.small_profile_photo.webp, user.profile_photo.url)
+
+        # A new photo is queued again
+        self.upload_photo('other.png')
+        self.assertEqual(generate_pending_thumbnails(), (1, []))
+
+
+class AttachmentTests(BoardTestCase):
+
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        media = override_settings(MEDIA_ROOT=media_root.name)
+        media.enable()
+        self.addCleanup(media.disable)
+
+    def test_identical_files_share_one_blob(self):
+        first = store_attachment(ContentFile(b'report'), 'report.txt')
+        second = store_attachment(ContentFile(b'report'), 'report.txt')
+
+        self.assertEqual(first, second)
+        self.assertEqual(AttachmentBlob.objects.get().ref_count, 2)
+
+    def test_file_of_a_deleted_blob_is_not_overwritten(self):
+        content = ContentFile(b'report')
+        with self.captureOnCommitCallbacks() as callbacks:
+            release_attachment(store_attachment(content, 'report.txt'))
+        old_name = blob_name(file_digest(content), 'report.txt')
+
+        # The same content is uploaded again before the file of the deleted blob is removed
+        with self.captureOnCommitCallbacks(execute=True):
+            name = store_attachment(ContentFile(b'report'), 'report.txt')
+            for callback in callbacks:
+                callback()
+
+        self.assertNotEqual(name, old_name)
+        self.assertFalse(default_storage.exists(old_name))
+        with default_storage.open(name) as file:
+            self.assertEqual(file.read(), b'report')
+
+    def test_chunked_upload_requires_csrf_token(self):
+        client = Client(enforce_csrf_checks=True)
+        client.force_login(self.owner)
+        url = reverse('start_attachment_upload')
+
+        self.assertEqual(client.post(url, {'filename': 'report.txt', 'size': 6}).status_code, 403)
+
+        client.get(reverse('board_details', args=[self.board.id, self.board.slug]))
+        token = client.cookies['csrftoken'].value
+        response = client.post(url, {'filename': 'report.txt', 'size': 6}, HTTP_X_CSRFTOKEN=token)
+        self.assertEqual(response.json()['status'], 'success')
+
+
+    def test_discarded_upload_only_deletes_its_own_files(self):
+        default_storage.save('busyboard_app/files/other.txt', ContentFile(b'other'))
+        upload = start_upload(self.owner, 'report.txt', 6)
+        upload.attachment = 'busyboard_app/files/other.txt'
+        upload.save()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            discard_upload(upload)
+
+        # A name that is not a blob was not generated for the upload
+        self.assertTrue(default_storage.exists('busyboard_app/files/other.txt'))
+
+        upload = start_upload(self.owner, 'report.txt', 6)
+        upload.attachment = store_attachment(ContentFile(b'report'), 'report.txt')
+        upload.save()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            discard_upload(upload)
+
+        self.assertFalse(default_storage.exists(upload.attachment))
+        self.assertFalse(AttachmentBlob.objects.exists())
+
+class ChangeLogTests(BoardTestCase):
+
+    def version_updates(self, queries):
+        return [query for query in queries if query['sql'].startswith('UPDATE') and '"version"' in query['sql']]
+
+    def test_batched_card_saves_bump_the_version_once(self):
+        cards = self.create_cards(3)
+        version = Board.objects.get(id=self.board.id).version
+
+        with CaptureQueriesContext(connection) as queries, batched_changes():
+            for card in cards:
+                card.title = f'Edited {card.id}'
+                card.save()
+
+        self.assertEqual(len(self.version_updates(queries)), 1)
+        self.assertEqual(Board.objects.get(id=self.board.id).version, version + 3)
+        self.assertEqual(BoardChange.objects.filter(board=self.board, seq__gt=version, action='UPDATED').count(), 3)
+
+    def test_moves_and_rebalance_are_recorded_at_once(self):
+        self.create_cards(2)
+        top, bottom = Card.objects.filter(board=self.board).order_by('rank')
+        moved = self.create_cards(2)
+        # Leave no free rank between the two cards, so that the moves rebalance the column
+        Card.objects.filter(id=bottom.id).update(rank=top.rank + 1)
+        moves = json.dumps([{'card_id': card.id, 'status': 'TO_DO', 'previous_id': top.id, 'next_id': bottom.id}
+                            for card in moved])
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post(reverse('update_card_statuses'), {'moves': moves})
+
+        self.assertEqual(len(self.version_updates(queries)), 1)
+        self.assertTrue(BoardChange.objects.filter(board=self.board, object_type='COLUMN').exists())
+
+    def test_import_records_the_created_cards(self):
+        export = json.dumps({'board': {'title': 'Imported'}, 'cards': [{'title': f'Card {index}'}
+                                                                        for index in range(5)]}).encode()
+        self.client.post(reverse('import_board_from_json'), {'file': SimpleUploadedFile('board.json', export)})
+
+        board = Board.objects.get(title='Imported')
+        self.assertEqual(BoardChange.objects.filter(board=board, object_type='CARD', action='CREATED').count(), 5)
+
+
+class BoardSearchTests(BoardTestCase):
+
+    def test_search_results_are_paginated_by_column(self):
+        for index, card in enumerate(self.create_cards(COLUMN_PAGE_SIZE + 15)):
+            card.title = f'Zebra {index}' if index >= 5 else f'Lion {index}'
+            card.save()
+
+        response = self.client.get(reverse('board_details', args=[self.board.id, self.board.slug]),
+                                   {'search': 'zebra'})
+        first_page = response.context['todo_cards']
+        self.assertEqual(len(first_page), COLUMN_PAGE_SIZE)
+        self.assertIsNotNone(response.context['todo_cursor'])
+
+        # The next page of the column continues the search results
+        page = self.client.get(reverse('board_column', args=[self.board.id, self.board.slug, 'TO_DO']),
+                               {'cursor': response.context['todo_cursor'], 'search': 'zebra'}).json()
+        self.assertIsNone(page['next_cursor'])
+        self.assertEqual(page['html'].count('data-card-id='), 10)
+        self.assertNotIn('Lion', page['html'])
+        self.assertIn('<mark>Zebra</mark>', page['html'])
+
+    def test_search_results_keep_the_relevance_order(self):
+        cards = self.create_cards(30)
+        for index, card in enumerate(cards):
+            card.title = f'Zebra {index}'
+            card.description = 'zebra zebra zebra' if index == 29 else ''
+            card.save()
+
+        # The best match comes first although it is last in the column
+        results, cursor = column_page(self.board, 'TO_DO', limit=10, query='zebra')
+        self.assertEqual(results[0], cards[29])
+
+        # Paging by (search_rank, id) goes through every match once, in the order of a single query
+        pages = list(results)
+        while cursor:
+            results, cursor = column_page(self.board, 'TO_DO', cursor, limit=10, query='zebra')
+            pages.extend(results)
+        self.assertEqual(pages, column_page(self.board, 'TO_DO', limit=30, query='zebra')[0])
+        self.assertEqual(len(set(pages)), 30)
+
+
+class ArchiveTests(BoardTestCase):
+
+    def test_done_cards_are_archived_in_batches(self):
+        with self.at(40):
+            old_cards = self.create_cards(5, status='DONE')
+        self.create_cards(1, status='DONE')
+        self.create_cards(1)
+
+        with mock.patch('busyboard_app.archive.record_changes', wraps=record_changes) as record:
+            archived = archive_board_cards(self.board.id, timezone.now() - timedelta(days=30), batch_size=2)
+
+        # Three batches of at most two cards, and a last query finding nothing left to archive
+        self.assertEqual(archived, 5)
+        self.assertEqual(record.call_count, 3)
+        self.assertEqual(set(ArchivedCard.objects.values_list('id', flat=True)), {card.id for card in old_cards})
+        self.assertEqual(Card.objects.filter(board=self.board).count(), 2)
+        self.assertEqual(BoardChange.objects.filter(board=self.board, action='ARCHIVED').count(), 5)
+        self.board.refresh_from_db()
+        self.assertEqual(self.board.done_card_count, 1)
+
+    def test_archive_pages_by_done_datetime(self):
+        now = timezone.now()
+        # Edited after completion in the reverse order, which the archive must not follow
+        for card_id, days_ago in ((1, 3), (2, 1), (3, 2), (4, 1), (5, 4)):
+            ArchivedCard.objects.create(
+                id=card_id, board=self.board, title=f'Card {card_id}', create_datetime=now - timedelta(days=10),
+                update_datetime=now - timedelta(days=5 - days_ago), done_datetime=now - timedelta(days=days_ago),
+            )
+
+        ids, cursor = [], None
+        while True:
+            cards, cursor = archived_cards_page(self.board, cursor=cursor, limit=2)
+            ids.extend(card.id for card in cards)
+            if not cursor:
+                break
+
+        self.assertEqual(ids, [4, 2, 3, 1, 5])
+
+
+class CardTileCacheTests(BoardTestCase):
+
+    def setUp(self):
+        super().setUp()
+        caches[CARD_TILE_CACHE].clear()
+
+    def render(self):
+        return render_card_tiles(Card.objects.filter(board=self.board).select_related('creator').order_by('id'))
+
+    def test_tiles_are_rendered_once(self):
+        self.create_cards(3)
+        self.render()
+
+        with mock.patch('busyboard_app.fragments.get_template') as get_template:
+            cards = self.render()
+        get_template.return_value.render.assert_not_called()
+        self.assertIn('Card 0', cards[0].tile)
+
+    def test_edited_card_gets_a_new_tile(self):
+        card, other = self.create_cards(2)
+        self.render()
+
+        card.title = 'Edited'
+        card.save()
+        with mock.patch.object(caches[CARD_TILE_CACHE], 'set_many') as set_many:
+            cards = self.render()
+
+        # Only the tile of the edited card is rendered again
+        self.assertEqual(len(set_many.call_args.args[0]), 1)
+        self.assertIn('Edited', cards[0].tile)
+        self.assertIn('Card 1', cards[1].tile)
+
+    def test_tiles_hold_nothing_specific_to_the_viewer(self):
+        self.create_cards(1)
+        response = self.client.get(reverse('board_details', args=[self.board.id, self.board.slug]))
+        token = response.context['csrf_token']
+
+        # The tile cached by the board page is shared with every viewer
+        with mock.patch('busyboard_app.fragments.get_template') as get_template:
+            card, = self.render()
+        get_template.return_value.render.assert_not_called()
+        self.assertNotIn(str(token), card.tile)
+
+
+class BoardETagTests(BoardTestCase):
+
+    def get_board(self, etag=None):
+        url = reverse('board_details', args=[self.board.id, self.board.slug])
+        return self.client.get(url, HTTP_IF_NONE_MATCH=etag) if etag else self.client.get(url)
+
+    def test_card_changes_change_the_etag(self):
+        card, = self.create_cards(1)
+        etag = self.get_board()['ETag']
+        self.assertEqual(self.get_board(etag).status_code, 304)
+
+        for change in (
+            lambda: Card.objects.get(id=card.id).save(),
+            lambda: self.client.post(reverse('update_card_status'), {'card_id': card.id, 'status': 'DONE'}),
+            lambda: self.client.post(reverse('delete_card', args=[card.id])),
+        ):
+            change()
+            response = self.get_board(etag)
+            self.assertEqual(response.status_code, 200)
+            etag = response['ETag']
+
+    def test_etag_does_not_read_the_cards(self):
+        self.create_cards(3)
+        etag = self.get_board()['ETag']
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.get_board(etag).status_code, 304)
+        self.assertFalse(any(Card._meta.db_table in query['sql'] for query in queries))
@@ -0,0 +1,161 @@
+import os
+from collections import namedtuple
+from io import BytesIO
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import F
+from PIL import Image, ImageOps
+
+# Side in pixels of every square thumbnail of a profile photo, twice the displayed size for high density screens
+THUMBNAIL_SIZES = {
+    'small': 64,
+    'medium': 128,
+}
+
+# Pillow format and save options of every thumbnail file format
+THUMBNAIL_FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 6}),
+    'jpeg': ('JPEG', {'quality': 85, 'optimize': True, 'progressive': True}),
+}
+
+# Number of users whose thumbnails are generated per batch by the generate_thumbnails command
+THUMBNAIL_BATCH_SIZE = 50
+
+# URLs of one size of a profile photo in every thumbnail format
+ProfilePhotoVariant = namedtuple('ProfilePhotoVariant', THUMBNAIL_FORMATS)
+
+
+def thumbnail_name(photo_name, size, file_format):
+    """
+    Returns the storage name of a thumbnail of a profile photo.
+
+    Args:
+        photo_name (str): The storage name of the original photo.
+        size (str): The name of the thumbnail size ('small', 'medium').
+        file_format (str): The thumbnail file format ('webp', 'jpeg').
+
+    Returns:
+        str: The storage name of the thumbnail.
+    """
+
+    # The extension is kept, so that photos only differing by it do not share their thumbnails
+    directory, filename = os.path.split(photo_name)
+    return f'{directory}/thumbnails/{filename}_{THUMBNAIL_SIZES[size]}.{file_format}'
+
+
+def profile_photo_variant(user, size):
+    """
+    Returns the URLs of a thumbnail size of the profile photo of a user, without any storage access.
+
+    Users whose thumbnails have not been generated yet get the URL of the original photo in every format.
+
+    Args:
+        user (CustomUser): The user.
+        size (str): The name of the thumbnail size ('small', 'medium').
+
+    Returns:
+        ProfilePhotoVariant: The URLs by format, or None if the user has no profile photo.
+    """
+
+    if not user.profile_photo:
+        return None
+    if user.profile_photo_thumbnails != user.profile_photo.name:
+        return ProfilePhotoVariant(*[user.profile_photo.url] * len(THUMBNAIL_FORMATS))
+    return ProfilePhotoVariant(*[
+        default_storage.url(thumbnail_name(user.profile_photo.name, size, file_format))
+        for file_format in THUMBNAIL_FORMATS
+    ])
+
+
+def generate_profile_photo_thumbnails(user):
+    """
+    Writes every thumbnail of the profile photo of a user and records that they are available.
+
+    A photo that cannot be read, including one whose pixel count exceeds the decompression bomb limit of Pillow,
+    is recorded as failed instead, which takes it out of the queue of generate_pending_thumbnails().
+
+    Args:
+        user (CustomUser): The user whose profile photo is current.
+
+    Returns:
+        bool: True if the thumbnails were generated, False if the photo could not be read.
+    """
+
+    users = user._meta.model.objects.filter(id=user.id, profile_photo=user.profile_photo.name)
+    photo_name = user.profile_photo.name
+    try:
+        with default_storage.open(photo_name) as file:
+            image = Image.open(file)
+            image = ImageOps.exif_transpose(image).convert('RGB')
+    except (OSError, ValueError, Image.DecompressionBombError):
+        # Do not mark a photo uploaded in the meantime
+        users.update(profile_photo_thumbnails_failed=photo_name)
+        return False
+
+    for size, side in THUMBNAIL_SIZES.items():
+        # Crop the photo to a centered square, as the avatars are round
+        thumbnail = ImageOps.fit(image, (side, side), Image.LANCZOS)
+        for file_format, (pillow_format, options) in THUMBNAIL_FORMATS.items():
+            content = BytesIO()
+            thumbnail.save(content, pillow_format, **options)
+
+            name = thumbnail_name(photo_name, size, file_format)
+            default_storage.delete(name)
+            default_storage.save(name, ContentFile(content.getvalue()))
+
+    # Do not overwrite the state of a photo uploaded in the meantime
+    users.update(profile_photo_thumbnails=photo_name)
+    return True
+
+
+def delete_profile_photo_thumbnails(photo_name):
+    """
+    Deletes every thumbnail of a profile photo.
+
+    Args:
+        photo_name (str): The storage name of the original photo.
+    """
+
+    for size in THUMBNAIL_SIZES:
+        for file_format in THUMBNAIL_FORMATS:
+            default_storage.delete(thumbnail_name(photo_name, size, file_format))
+
+
+def generate_pending_thumbnails(batch_size=THUMBNAIL_BATCH_SIZE):
+    """
+    Generates the thumbnails of a batch of profile photos uploaded since their thumbnails were last generated.
+
+    The users whose photo differs from the one of their thumbnails are the queue, written by the uploads
+    themselves, so that no photo is forgotten when a worker stops. Photos that could not be read leave the queue
+    until they are replaced. Every user is locked while their thumbnails are written, and users locked by another
+    worker are skipped.
+
+    Args:
+        batch_size (int): The maximum number of users to process.
+
+    Returns:
+        tuple: The number of users whose thumbnails were generated, and the users whose photo could not be read.
+    """
+
+    pending = get_user_model().objects.exclude(profile_photo='').exclude(
+        profile_photo_thumbnails=F('profile_photo')
+    ).exclude(profile_photo_thumbnails_failed=F('profile_photo'))
+
+    generated = 0
+    failed = []
+    for user_id in pending.order_by('id').values_list('id', flat=True)[:batch_size]:
+        with transaction.atomic():
+            user = pending.select_for_update(skip_locked=True).only('id', 'username', 'profile_photo').filter(
+                id=user_id
+            ).first()
+            if user is None:
+                continue
+            if generate_profile_photo_thumbnails(user):
+                generated += 1
+            else:
+                failed.append(user)
+
+    return generated, failed
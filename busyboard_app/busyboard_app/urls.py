@@ -20,7 +20,7 @@ from django.contrib import admin
 from django.urls import path, include
 from django.contrib.auth import views as auth_views
 
-from . import views
+from . import api, views
 
 urlpatterns = [
     # globals
@@ -48,22 +48,42 @@ urlpatterns = [
     # main app
     path('settings/', views.settings, name='settings'),
     path('my_boards/', views.my_boards, name='my_boards'),
+    path('my_boards/cache_metrics/', views.dashboard_cache_metrics, name='dashboard_cache_metrics'),
+    path('profiling/metrics/', views.profiling_metrics, name='profiling_metrics'),
     path('my_boards/create/', views.create_board, name='create_board'),
+    path('my_boards/import/', views.import_board_from_json, name='import_board_from_json'),
     path('edit_board/<int:board_id>/', views.edit_board, name='edit_board'),
     path('save_board_changes/<int:board_id>/', views.save_board_changes, name='save_board_changes'),
-    path('my_boards/<slug:slug>/', views.board_details, name='board_details'),
-    path('my_boards/<slug:slug>/invite/', views.invite_to_board, name='invite_to_board'),
-    path('my_boards/<slug:slug>/leave/', views.leave_board, name='leave_board'),
-    path('my_boards/<slug:slug>/remove_user/', views.remove_user_from_board, name='remove_user_from_board'),
+    path('my_boards/<int:board_id>/<slug:slug>/', views.board_details, name='board_details'),
+    path('my_boards/<int:board_id>/<slug:slug>/columns/<str:status>/', views.board_column, name='board_column'),
+    path('my_boards/<int:board_id>/<slug:slug>/archive/', views.board_archive, name='board_archive'),
+    path('my_boards/<int:board_id>/<slug:slug>/events/', views.board_events, name='board_events'),
+    path('my_boards/<int:board_id>/<slug:slug>/invite/', views.invite_to_board, name='invite_to_board'),
+    path('my_boards/<int:board_id>/<slug:slug>/leave/', views.leave_board, name='leave_board'),
+    path('my_boards/<int:board_id>/<slug:slug>/remove_user/', views.remove_user_from_board,
+         name='remove_user_from_board'),
     path('delete_board/<int:board_id>/', views.delete_board, name='delete_board'),
     path('create_card/', views.create_card, name='create_card'),
     path('update_card_status/', views.update_card_status, name='update_card_status'),
+    path('update_card_statuses/', views.update_card_statuses, name='update_card_statuses'),
+    path('attachment_uploads/', views.start_attachment_upload, name='start_attachment_upload'),
+    path('attachment_uploads/<uuid:upload_id>/', views.attachment_upload, name='attachment_upload'),
+    path('attachment_uploads/<uuid:upload_id>/complete/', views.complete_attachment_upload,
+         name='complete_attachment_upload'),
     path('get_card_details/<int:card_id>/', views.get_card_details, name='get_card_details'),
     path('edit_card/<int:card_id>/', views.edit_card, name='edit_card'),
     path('save_card_changes/<int:card_id>/', views.save_card_changes, name='save_card_changes'),
     path('delete_card/<int:card_id>/', views.delete_card, name='delete_card'),
     path('export_board/<int:board_id>/', views.export_board_to_json, name='export_board_to_json'),
     path('sign_out/', views.sign_out, name='sign_out'),
+
+    # JSON API
+    path('api/v1/boards/', api.boards, name='api_boards'),
+    path('api/v1/boards/<int:board_id>/', api.board, name='api_board'),
+    path('api/v1/boards/<int:board_id>/members/', api.board_members, name='api_board_members'),
+    path('api/v1/boards/<int:board_id>/cards/', api.board_cards, name='api_board_cards'),
+    path('api/v1/boards/<int:board_id>/changes/', api.board_changes, name='api_board_changes'),
+    path('api/v1/cards/<int:card_id>/', api.card, name='api_card'),
 ]
 
 if settings.DEBUG:
@@ -1,19 +1,41 @@
-import datetime
 import json
 import random
-from datetime import timezone, timedelta
 
 from django.contrib import messages
 from django.contrib.auth import logout, update_session_auth_hash, login
 from django.contrib.auth.decorators import login_required
+from django.core.handlers.asgi import ASGIRequest
 from django.core.mail import send_mail
-from django.http import JsonResponse, HttpResponseForbidden, HttpResponse
+from django.http import JsonResponse, HttpResponseForbidden, HttpResponse, StreamingHttpResponse
 from django.shortcuts import render, redirect, get_object_or_404
+from django.utils import timezone
+from django.views.decorators.cache import cache_control
 from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import condition
+from django.db import transaction
 from django.db.models import Q
 
+from .archive import archived_cards_page
+from .attachments import (ATTACHMENT_CHUNK_SIZE, append_upload_chunk, attach_upload, complete_upload, get_upload,
+                          start_upload)
+from .changes import batched_changes
+from .columns import column_counts, column_page
+from .counters import record_card_counts
+from .dashboard import dashboard_cache_stats, get_dashboard
+from .etags import board_etag, card_etag, card_last_modified
+from .exports import iter_board_json, iter_board_ndjson, iter_buffered, iter_gzip
 from .forms import *
+from .fragments import render_card_tiles
+from .imports import BoardImportError, import_board
 from .models import *
+from .permissions import (
+    BOARD_MEMBER, board_permission_required, board_roles, card_roles, is_board_member, metrics_permission_required,
+)
+from .profiling import render_profile_metrics
+from .ranking import move_cards
+from .realtime import publish_card_event, publish_card_moves, stream_board_events
+from .statistics import get_board_statistics, record_status_changes
+from .thumbnails import delete_profile_photo_thumbnails
 
 
 def landing(request):
@@ -50,7 +72,7 @@ def contact_us(request):
             email = form.cleaned_data.get('email')
             message = form.cleaned_data.get('message')
 
-            # Send an email with the form data
+            # Queue an email with the form data, it is sent in the background by the send_queued_mail command
             send_mail(
                 'New Feedback',
                 f'Name: {name}\nPhone: {phone}\nEmail: {email}\n\nMessage:\n{message}',
@@ -85,6 +107,7 @@ def sign_up(request):
         form = CustomUserCreationForm(request.POST, request.FILES)
         if form.is_valid():
             # Save the user object created from the form
+            # The profile photo is resized in the background by the generate_thumbnails command
             user = form.save()
 
             # Log in the user
@@ -159,20 +182,29 @@ def settings(request):
 
     # Create an instance of the UserProfileUpdateForm with the current user's data
     user_profile_update_form = UserProfileUpdateForm(request.POST or None, instance=request.user)
+    profile_photo_form = ProfilePhotoForm()
     password_change_form = None
 
     if request.method == 'POST':
         # Check if the 'delete_photo' button was clicked
         if 'delete_photo' in request.POST:
-            # Delete the user's profile photo
+            # Delete the user's profile photo and its thumbnails
+            delete_profile_photo_thumbnails(request.user.profile_photo.name)
+            request.user.profile_photo_thumbnails = ''
             request.user.profile_photo.delete(save=True)
             return redirect('settings')
         # Check if the 'change_photo' button was clicked
         elif 'change_photo' in request.POST:
-            # Update the user's profile photo with the new photo
-            request.user.profile_photo = request.FILES['new_photo']
-            request.user.save()
-            return redirect('settings')
+            # Check that the new photo is an image Pillow can read before it is stored
+            profile_photo_form = ProfilePhotoForm(request.POST, request.FILES)
+            if profile_photo_form.is_valid():
+                # Update the user's profile photo with the new photo, which the generate_thumbnails command
+                # resizes in the background
+                if request.user.profile_photo:
+                    delete_profile_photo_thumbnails(request.user.profile_photo.name)
+                request.user.profile_photo = profile_photo_form.cleaned_data['new_photo']
+                request.user.save()
+                return redirect('settings')
         # Check if the 'delete_account' button was clicked
         elif 'delete_account' in request.POST:
             # Delete the user's account and log them out
@@ -200,6 +232,7 @@ def settings(request):
     # Prepare the context data to be passed to the template
     context = {
         'user_profile_update_form': user_profile_update_form,
+        'profile_photo_form': profile_photo_form,
         'password_change_form': password_change_form,
     }
 
@@ -219,22 +252,59 @@ def my_boards(request):
         HttpResponse: The rendered "My Boards" page.
     """
 
-    # Retrieve the boards owned by the user
-    owned_boards = Board.objects.filter(owner=request.user)
-
-    # Retrieve the boards the user is invited to
-    invited_boards = Board.objects.filter(invited_users=request.user)
+    # Retrieve the boards owned by the user and the boards they are invited to, from the cache when possible
+    dashboard = get_dashboard(request.user)
 
     # Prepare the context data to be passed to the template
     context = {
-        'owned_boards': owned_boards,
-        'invited_boards': invited_boards
+        'owned_boards': dashboard['owned_boards'],
+        'invited_boards': dashboard['invited_boards']
     }
 
     # Render the "My Boards" page with the context data
     return render(request, 'busyboard_boards/my_boards.html', context)
 
 
+@metrics_permission_required
+def dashboard_cache_metrics(request):
+    """
+    Returns the hit and miss counters of the "My Boards" cache in the Prometheus text format.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+
+    Returns:
+        HttpResponse: The counters, or a forbidden response without the metrics token or a staff session.
+    """
+
+    stats = dashboard_cache_stats()
+
+    # Render the counters as one Prometheus metric with a label per result
+    lines = [
+        '# HELP busyboard_dashboard_cache_requests_total "My Boards" dashboard cache lookups by result.',
+        '# TYPE busyboard_dashboard_cache_requests_total counter',
+        f'busyboard_dashboard_cache_requests_total{{result="hit"}} {stats["hits"]}',
+        f'busyboard_dashboard_cache_requests_total{{result="miss"}} {stats["misses"]}',
+    ]
+
+    return HttpResponse('\n'.join(lines) + '\n', content_type='text/plain; version=0.0.4')
+
+
+@metrics_permission_required
+def profiling_metrics(request):
+    """
+    Returns the request profiling histograms of all processes in the Prometheus text format.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+
+    Returns:
+        HttpResponse: The histograms, or a forbidden response without the metrics token or a staff session.
+    """
+
+    return HttpResponse(render_profile_metrics(), content_type='text/plain; version=0.0.4')
+
+
 @login_required(login_url='sign_in')
 def create_board(request):
     """
@@ -279,6 +349,35 @@ def create_board(request):
 
 
 @login_required(login_url='sign_in')
+def import_board_from_json(request):
+    """
+    Creates a new board from an uploaded JSON or NDJSON board export.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+
+    Returns:
+        HttpResponse: A redirect to the imported board or to the "My Boards" page if the file could not be imported.
+    """
+
+    if request.method == 'POST' and 'file' in request.FILES:
+        try:
+            # Import the board and its cards from the uploaded file
+            board, imported = import_board(request.FILES['file'], request.user)
+        except BoardImportError as error:
+            messages.error(request, f'The board could not be imported: {error}')
+            return redirect('my_boards')
+
+        # Redirect to the imported board
+        messages.success(request, f'Imported {imported} cards.')
+        return redirect('board_details', board_id=board.id, slug=board.slug)
+
+    # Redirect to the "My Boards" page
+    return redirect('my_boards')
+
+
+@login_required(login_url='sign_in')
+@board_permission_required(owner=True)
 def edit_board(request, board_id):
     """
     Renders the board editing page and handles the update of board title and description.
@@ -316,6 +415,7 @@ def edit_board(request, board_id):
 
 
 @login_required(login_url='sign_in')
+@board_permission_required(owner=True)
 def save_board_changes(request, board_id):
     """
     Saves the changes made to a board's title and description.
@@ -344,6 +444,7 @@ def save_board_changes(request, board_id):
 
 
 @login_required(login_url='sign_in')
+@board_permission_required(owner=True)
 def delete_board(request, board_id):
     """
     Deletes a board.
@@ -368,98 +469,188 @@ def delete_board(request, board_id):
 
 
 @login_required(login_url='sign_in')
-def board_details(request, slug):
+@board_permission_required()
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=board_etag)
+def board_details(request, board_id, slug):
     """
     Renders the board details page of the BusyBoard application, displaying the cards, statistics and search results related to the board.
 
+    Requests carrying the ETag of an unchanged page are answered with 304 Not Modified before the page is built.
+
     Args:
         request (HttpRequest): The HTTP request object.
+        board_id (int): The ID of the board.
         slug (str): The slug of the board.
 
     Returns:
         HttpResponse: The rendered board details page or a forbidden response if the user does not have access to the board.
     """
 
-    # Retrieve the board object with the given slug or return a 404 error if not found
-    board = get_object_or_404(Board, slug=slug)
+    # Retrieve the board object with the given board_id together with its owner and members or return a 404 error if not found
+    board = get_object_or_404(Board.objects.select_related('owner').prefetch_related('invited_users'), id=board_id)
+
+    # Redirect outdated or mistyped slugs to the canonical board URL
+    if slug != board.slug:
+        return redirect('board_details', board_id=board.id, slug=board.slug)
 
     # Retrieve the search query from the request GET parameters
     query = request.GET.get('search')
 
-    # Get the current datetime
-    now = datetime.datetime.now()
+    # Count the number of cards with status 'DONE' for the daily, weekly, monthly and annual windows
+    statistics = get_board_statistics(board)
+
+    # Read the number of cards of every column from the counters of the board
+    counts = column_counts(board)
+
+    # Render the first page of every column, the next ones are loaded by the page as the columns are scrolled. A
+    # search filters the cards by title and description with the full-text search index, column by column
+    columns = {}
+    cursors = {}
+    for status, _ in Card.STATUS_CHOICES:
+        columns[status], cursors[status] = column_page(board, status, query=query)
+
+    # Render the card tiles or read them from the cache
+    render_card_tiles(card for cards in columns.values() for card in cards)
+
+    # Prepare the context data to be passed to the template
+    context = {
+        'board': board,
+        'todo_cards': columns['TO_DO'],
+        'in_progress_cards': columns['IN_PROGRESS'],
+        'done_cards': columns['DONE'],
+        'todo_count': counts['TO_DO'],
+        'in_progress_count': counts['IN_PROGRESS'],
+        'done_count': counts['DONE'],
+        'todo_cursor': cursors.get('TO_DO'),
+        'in_progress_cursor': cursors.get('IN_PROGRESS'),
+        'done_cursor': cursors.get('DONE'),
+        **statistics,
+    }
+
+    # Render the board details page with the context data
+    return render(request, 'busyboard_boards/board_details.html', context)
+
+
+@login_required(login_url='sign_in')
+@board_permission_required()
+def board_column(request, board_id, slug, status):
+    """
+    Returns the next page of a board column, as the board page loads it when the column is scrolled to its end.
+
+    The page follows the 'cursor' query parameter, the cursor of the previous page, and only holds the cards
+    matching the 'search' query parameter if there is one.
 
-    # Count the number of cards with status 'DONE' updated today
-    daily_done = Card.objects.filter(board=board, status='DONE', update_datetime__day=now.day).count()
+    Args:
+        request (HttpRequest): The HTTP request object.
+        board_id (int): The ID of the board.
+        slug (str): The slug of the board.
+        status (str): The status of the column.
+
+    Returns:
+        JsonResponse: The HTML of the card tiles and the cursor of the next page, or an error message.
+    """
 
-    # Count the number of cards with status 'DONE' updated in the past 7 days
-    weekly_done = Card.objects.filter(board=board, status='DONE', update_datetime__gte=now - timedelta(days=7)).count()
+    # Retrieve the board object with the given board_id or return a 404 error if not found
+    board = get_object_or_404(Board, id=board_id)
 
-    # Count the number of cards with status 'DONE' updated in the past 30 days
-    monthly_done = Card.objects.filter(board=board, status='DONE',
-                                       update_datetime__gte=now - timedelta(days=30)).count()
+    if status not in {status for status, _ in Card.STATUS_CHOICES}:
+        return JsonResponse({'status': 'error', 'message': 'Invalid status'}, status=404)
 
-    # Count the number of cards with status 'DONE' updated in the past 365 days
-    annually_done = Card.objects.filter(board=board, status='DONE',
-                                        update_datetime__gte=now - timedelta(days=365)).count()
+    try:
+        cards, cursor = column_page(board, status, request.GET.get('cursor'), query=request.GET.get('search'))
+    except ValueError:
+        return JsonResponse({'status': 'error', 'message': 'Invalid cursor'}, status=400)
 
-    # Check if the user has access to the board
-    if not (request.user == board.owner or request.user in board.users.all()):
-        return HttpResponseForbidden("You do not have access to this board.")
+    # Render the card tiles or read them from the cache
+    render_card_tiles(cards)
 
-    if query:
-        # Filter cards by title and description based on the search query
-        todo_cards = Card.objects.filter(
-            Q(board=board, status='TO_DO', title__icontains=query) |
-            Q(board=board, status='TO_DO', description__icontains=query)
-        ).order_by('-create_datetime')
+    return JsonResponse({'status': 'success', 'html': ''.join(card.tile for card in cards), 'next_cursor': cursor})
 
-        in_progress_cards = Card.objects.filter(
-            Q(board=board, status='IN_PROGRESS', title__icontains=query) |
-            Q(board=board, status='IN_PROGRESS', description__icontains=query)
-        ).order_by('-create_datetime')
 
-        done_cards = Card.objects.filter(
-            Q(board=board, status='DONE', title__icontains=query) |
-            Q(board=board, status='DONE', description__icontains=query)
-        ).order_by('-create_datetime')
-    else:
-        # Retrieve cards without search query
-        todo_cards = Card.objects.filter(board=board, status='TO_DO').order_by('-create_datetime')
-        in_progress_cards = Card.objects.filter(board=board, status='IN_PROGRESS').order_by('-create_datetime')
-        done_cards = Card.objects.filter(board=board, status='DONE').order_by('-create_datetime')
+@login_required(login_url='sign_in')
+@board_permission_required()
+def board_archive(request, board_id, slug):
+    """
+    Renders the archived cards of a board, the most recently completed first, optionally filtered by a search.
+
+    The 'search' query parameter holds the words to look for, and the 'cursor' query parameter the position of the
+    page to show.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+        board_id (int): The ID of the board.
+        slug (str): The slug of the board.
+
+    Returns:
+        HttpResponse: The rendered archive page or a forbidden response if the user does not have access to the board.
+    """
+
+    # Retrieve the board object with the given board_id or return a 404 error if not found
+    board = get_object_or_404(Board, id=board_id)
+
+    query = request.GET.get('search', '')
+    try:
+        cards, cursor = archived_cards_page(board, query, request.GET.get('cursor'))
+    except ValueError:
+        return redirect('board_archive', board_id=board.id, slug=board.slug)
 
-    # Prepare the context data to be passed to the template
     context = {
         'board': board,
-        'todo_cards': todo_cards,
-        'in_progress_cards': in_progress_cards,
-        'done_cards': done_cards,
-        'daily_done': daily_done,
-        'weekly_done': weekly_done,
-        'monthly_done': monthly_done,
-        'annually_done': annually_done,
+        'cards': cards,
+        'query': query,
+        'next_cursor': cursor,
     }
 
-    # Render the board details page with the context data
-    return render(request, 'busyboard_boards/board_details.html', context)
+    return render(request, 'busyboard_boards/board_archive.html', context)
+
+
+@login_required(login_url='sign_in')
+@board_permission_required()
+def board_events(request, board_id, slug):
+    """
+    Streams the card changes of a board to the board page as server-sent events, so it can update without reloading.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+        board_id (int): The ID of the board.
+        slug (str): The slug of the board.
+
+    Returns:
+        StreamingHttpResponse: The event stream, an empty response if the application is not served over ASGI,
+        or a forbidden response if the user does not have access to the board.
+    """
+
+    # Retrieve the board object with the given board_id or return a 404 error if not found
+    board = get_object_or_404(Board, id=board_id)
+
+    # A WSGI worker cannot hold the stream open, a 204 response tells the browser not to reconnect
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse(status=204)
+
+    response = StreamingHttpResponse(stream_board_events(board.id, request.user), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
 
 
 @login_required(login_url='sign_in')
-def invite_to_board(request, slug):
+@board_permission_required(owner=True)
+def invite_to_board(request, board_id, slug):
     """
     Handles the invitation of a user to a board in the BusyBoard application.
 
     Args:
         request (HttpRequest): The HTTP request object.
+        board_id (int): The ID of the board.
         slug (str): The slug of the board.
 
     Returns:
         HttpResponse: A redirect to the board details page after inviting the user or a rendered invitations page if the request method is GET.
     """
 
-    # Retrieve the board object with the given slug or return a 404 error if not found
-    board = get_object_or_404(Board, slug=slug)
+    # Retrieve the board object with the given board_id or return a 404 error if not found
+    board = get_object_or_404(Board, id=board_id)
 
     if request.method == 'POST':
         # Retrieve the username of the user to invite from the form data
@@ -475,27 +666,29 @@ def invite_to_board(request, slug):
         user_to_invite.invited_boards.add(board)
 
         # Redirect to the board details page
-        return redirect('board_details', slug=slug)
+        return redirect('board_details', board_id=board.id, slug=board.slug)
 
     # Render the invitations page with the board data
     return render(request, 'busyboard_boards/invitations.html', {'board': board})
 
 
 @login_required(login_url='sign_in')
-def remove_user_from_board(request, slug):
+@board_permission_required(owner=True)
+def remove_user_from_board(request, board_id, slug):
     """
     Removes a user from a board in the BusyBoard application.
 
     Args:
         request (HttpRequest): The HTTP request object.
+        board_id (int): The ID of the board.
         slug (str): The slug of the board.
 
     Returns:
         HttpResponse: A redirect to the "My Boards" page after removing the user from the board.
     """
 
-    # Retrieve the board object with the given slug or return a 404 error if not found
-    board = get_object_or_404(Board, slug=slug)
+    # Retrieve the board object with the given board_id or return a 404 error if not found
+    board = get_object_or_404(Board, id=board_id)
 
     if request.method == 'POST':
         # Retrieve the username of the user to remove from the form data
@@ -504,8 +697,8 @@ def remove_user_from_board(request, slug):
         # Retrieve the user object with the given username or return a 404 error if not found
         user_to_remove = get_object_or_404(CustomUser, username=username)
 
-        # Check if the request user is the owner of the board and the user to remove is in the invited_users list
-        if request.user == board.owner and user_to_remove in board.invited_users.all():
+        # Check if the user to remove is a member of the board
+        if is_board_member(board.id, user_to_remove.id):
             # Remove the user from the invited_users list of the board
             board.invited_users.remove(user_to_remove)
 
@@ -517,22 +710,25 @@ def remove_user_from_board(request, slug):
 
 
 @login_required(login_url='sign_in')
-def leave_board(request, slug):
+@board_permission_required()
+def leave_board(request, board_id, slug):
     """
     Allows a user to leave a board in the BusyBoard application.
 
     Args:
         request (HttpRequest): The HTTP request object.
+        board_id (int): The ID of the board.
         slug (str): The slug of the board.
 
     Returns:
         HttpResponse: A redirect to the "My Boards" page after leaving the board.
     """
 
-    # Retrieve the board object with the given slug or return a 404 error if not found
-    board = get_object_or_404(Board, slug=slug)
+    # Retrieve the board object with the given board_id or return a 404 error if not found
+    board = get_object_or_404(Board, id=board_id)
 
-    if request.user in board.invited_users.all():
+    # Check if the request user is a member of the board rather than its owner, as cached by the permission check
+    if board_roles(request, [board.id])[board.id] == BOARD_MEMBER:
         # Remove the user from the invited_users list of the board
         board.invited_users.remove(request.user)
 
@@ -562,6 +758,10 @@ def create_card(request):
         # Retrieve the board object with the given ID or return a 404 error if not found
         board = get_object_or_404(Board, id=board_id)
 
+        # Check if the user has access to the board
+        if board_roles(request, [board.id])[board.id] is None:
+            return HttpResponseForbidden("You do not have access to this board.")
+
         # Retrieve the card details from the form data
         title = request.POST.get('title')
         description = request.POST.get('description')
@@ -577,11 +777,19 @@ def create_card(request):
         card = Card(title=title, description=description, priority=priority, attachment=attachment, board=board,
                     creator=request.user, color=color)
 
+        # Attach a file sent beforehand through the resumable upload API
+        upload = get_upload(request.user, request.POST.get('attachment_upload'), completed=True)
+        if upload:
+            attach_upload(card, upload)
+
         # Save the card to the database
         card.save()
 
+        # Show the new card to the other users viewing the board
+        publish_card_event('created', card)
+
         # Redirect to the board details page
-        return redirect('board_details', slug=board.slug)
+        return redirect('board_details', board_id=board.id, slug=board.slug)
     else:
         # Redirect to the board details page
         return redirect('board_details')
@@ -602,17 +810,32 @@ def update_card_status(request):
 
     if request.method == 'POST':
         # Retrieve the card ID and status from the form data
-        card_id = request.POST.get('card_id')
+        card_id = request.POST.get('card_id', '')
         status = request.POST.get('status')
 
-        # Retrieve the card object with the given ID
-        card = Card.objects.get(id=card_id)
+        # Reject missing card IDs and unknown statuses, which would take the card out of every column
+        if not card_id.isdigit():
+            return JsonResponse({'status': 'error', 'message': 'Invalid card'}, status=400)
+        if status not in {status for status, _ in Card.STATUS_CHOICES}:
+            return JsonResponse({'status': 'error', 'message': 'Invalid status'}, status=400)
 
-        # Update the status of the card
-        card.status = status
+        # Check if the card exists and the user has access to its board
+        card_role = card_roles(request, [card_id]).get(int(card_id))
+        if card_role is None:
+            return JsonResponse({'status': 'error', 'message': 'Card not found'}, status=404)
+        if card_role[1] is None:
+            return JsonResponse({'status': 'error', 'message': 'You do not have access to this board.'}, status=403)
 
-        # Save the updated card to the database
-        card.save()
+        with transaction.atomic(), batched_changes():
+            # Move the card to the top of its new column, the move and a rebalance of the column are recorded at once
+            changes = move_cards([(int(card_id), status, None, None)])
+
+            # Update the daily completion statistics and the column counters of the board
+            record_status_changes(changes)
+            record_card_counts((board_id, old_status, new_status) for board_id, old_status, new_status, _ in changes)
+
+            # Move the card for the other users viewing the board
+            publish_card_moves([int(card_id)])
 
         # Return a JSON response with the updated status
         return JsonResponse({'status': 'success', 'new_status': status})
@@ -622,10 +845,166 @@ def update_card_status(request):
 
 
 @login_required(login_url='sign_in')
+def update_card_statuses(request):
+    """
+    Moves several cards at once, as sent by the drag and drop handler of the board page.
+
+    The moves are read from the 'moves' form field as a JSON list of {"card_id": ..., "status": ...} objects.
+    A move may also hold "previous_id" and "next_id", the IDs of the cards directly above and below its new
+    position in the column. Only the status, rank and update datetime columns of the moved cards are written,
+    with a single bulk UPDATE query.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+
+    Returns:
+        JsonResponse: A JSON response with the number of updated cards, or an error message for invalid requests.
+    """
+
+    if request.method != 'POST':
+        # Return a JSON response with an error message for invalid requests
+        return JsonResponse({'status': 'error', 'message': 'Invalid request'})
+
+    # Parse the list of moves
+    valid_statuses = {status for status, _ in Card.STATUS_CHOICES}
+    try:
+        moves = [
+            (int(move['card_id']), move['status'],
+             int(move['previous_id']) if move.get('previous_id') else None,
+             int(move['next_id']) if move.get('next_id') else None)
+            for move in json.loads(request.POST.get('moves', '[]'))
+        ]
+    except (ValueError, TypeError, KeyError, AttributeError):
+        return JsonResponse({'status': 'error', 'message': 'Invalid moves'}, status=400)
+    if not {status for _, status, _, _ in moves} <= valid_statuses:
+        return JsonResponse({'status': 'error', 'message': 'Invalid status'}, status=400)
+
+    # Check that the user has access to the boards of the moved cards and of their neighbours, with a single query
+    referenced_ids = {card_id for move in moves for card_id in (move[0], move[2], move[3]) if card_id}
+    if any(role is None for _, role in card_roles(request, referenced_ids).values()):
+        return JsonResponse({'status': 'error', 'message': 'You do not have access to this board.'}, status=403)
+
+    with transaction.atomic(), batched_changes():
+        # Move the cards with a single bulk update, the moves and the rebalanced columns are recorded at once
+        changes = move_cards(moves)
+
+        # Update the daily completion statistics and the column counters of the boards
+        record_status_changes(changes)
+        record_card_counts((board_id, old_status, new_status) for board_id, old_status, new_status, _ in changes)
+
+        # Move the cards for the other users viewing the boards
+        publish_card_moves(card_id for card_id, _, _, _ in moves)
+
+    # Return a JSON response with the number of updated cards
+    return JsonResponse({'status': 'success', 'updated': len(changes)})
+
+
+@login_required(login_url='sign_in')
+def start_attachment_upload(request):
+    """
+    Starts a resumable upload of a card attachment, to be sent in chunks.
+
+    The 'filename' and 'size' of the file are read from the form data.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+
+    Returns:
+        JsonResponse: A JSON response with the upload ID and the chunk size, or an error message for invalid requests.
+    """
+
+    if request.method != 'POST':
+        # Return a JSON response with an error message for invalid requests
+        return JsonResponse({'status': 'error', 'message': 'Invalid request'})
+
+    try:
+        size = int(request.POST.get('size'))
+    except (TypeError, ValueError):
+        return JsonResponse({'status': 'error', 'message': 'Invalid size'})
+
+    upload = start_upload(request.user, request.POST.get('filename'), size)
+    if upload is None:
+        return JsonResponse({'status': 'error', 'message': 'Invalid file'})
+
+    return JsonResponse({'status': 'success', 'upload_id': upload.id, 'chunk_size': ATTACHMENT_CHUNK_SIZE,
+                         'received': upload.received})
+
+
+@login_required(login_url='sign_in')
+def attachment_upload(request, upload_id):
+    """
+    Returns the progress of a resumable upload on GET, or appends the chunk sent as the request body on POST.
+
+    A chunk is only appended if its 'offset' query parameter is the number of bytes received so far. After an
+    interrupted request the client reads the progress and resumes from there.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+        upload_id (UUID): The ID of the upload.
+
+    Returns:
+        JsonResponse: A JSON response with the number of bytes received, with a 409 status if the chunk was not
+        appended.
+    """
+
+    with transaction.atomic():
+        upload = get_object_or_404(AttachmentUpload.objects.select_for_update(), id=upload_id, user=request.user)
+
+        if request.method == 'POST':
+            try:
+                offset = int(request.GET.get('offset', ''))
+                length = int(request.META.get('CONTENT_LENGTH') or 0)
+            except ValueError:
+                return JsonResponse({'status': 'error', 'message': 'Invalid offset'}, status=400)
+
+            if length > ATTACHMENT_CHUNK_SIZE or not append_upload_chunk(upload, offset, request, length):
+                return JsonResponse({'status': 'error', 'message': 'Invalid chunk', 'received': upload.received},
+                                    status=409)
+
+    return JsonResponse({'status': 'success', 'received': upload.received, 'size': upload.size,
+                         'completed': bool(upload.attachment)})
+
+
+@login_required(login_url='sign_in')
+def complete_attachment_upload(request, upload_id):
+    """
+    Stores a fully received upload. Identical files are stored once, whoever uploaded them.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+        upload_id (UUID): The ID of the upload.
+
+    Returns:
+        JsonResponse: A JSON response with the upload ID to send with the card form, or an error message.
+    """
+
+    if request.method != 'POST':
+        # Return a JSON response with an error message for invalid requests
+        return JsonResponse({'status': 'error', 'message': 'Invalid request'})
+
+    with transaction.atomic():
+        upload = get_object_or_404(AttachmentUpload.objects.select_for_update(), id=upload_id, user=request.user)
+
+        if not upload.attachment:
+            if upload.received != upload.size:
+                return JsonResponse({'status': 'error', 'message': 'Upload incomplete', 'received': upload.received},
+                                    status=409)
+            complete_upload(upload)
+
+    return JsonResponse({'status': 'success', 'upload_id': upload.id})
+
+
+@login_required(login_url='sign_in')
+@board_permission_required()
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=card_etag, last_modified_func=card_last_modified)
 def get_card_details(request, card_id):
     """
     Retrieves the details of a card in the BusyBoard application.
 
+    Requests for a card that has not changed since the ETag or Last-Modified date they carry are answered with
+    304 Not Modified without serializing the card.
+
     Args:
         request (HttpRequest): The HTTP request object.
         card_id (int): The ID of the card to retrieve details for.
@@ -656,6 +1035,7 @@ def get_card_details(request, card_id):
 
 
 @login_required(login_url='sign_in')
+@board_permission_required()
 def edit_card(request, card_id):
     """
     Edit the details of a card.
@@ -679,6 +1059,7 @@ def edit_card(request, card_id):
 
 
 @login_required(login_url='sign_in')
+@board_permission_required()
 def save_card_changes(request, card_id):
     """
     Save the changes made to a card.
@@ -706,6 +1087,7 @@ def save_card_changes(request, card_id):
             # If it is present, delete the card's attachment and render the edit_card.html template
             # passing the card object as a context variable
             card.attachment.delete()
+            publish_card_event('edited', card)
             return render(request, 'busyboard_boards/edit_card.html', {'card': card})
 
         # Check if the 'change_attachment' key is present in the request POST data
@@ -714,19 +1096,29 @@ def save_card_changes(request, card_id):
             # delete the card's current attachment, assign the new attachment to the card,
             # save the card, and render the edit_card.html template passing the card object as a context variable
             new_attachment = request.FILES.get('new_attachment')
-            card.attachment.delete()
-            card.attachment = new_attachment
+            upload = get_upload(request.user, request.POST.get('attachment_upload'), completed=True)
+            if upload:
+                # The file has been sent beforehand through the resumable upload API
+                attach_upload(card, upload)
+            else:
+                card.attachment.delete()
+                card.attachment = new_attachment
             card.save()
+            publish_card_event('edited', card)
             return render(request, 'busyboard_boards/edit_card.html', {'card': card})
 
         # Save the changes made to the card
         card.save()
 
+        # Show the changes to the other users viewing the board
+        publish_card_event('edited', card)
+
     # Redirect the user to the 'board_details' view for the card's board
-    return redirect('board_details', slug=card.board.slug)
+    return redirect('board_details', board_id=card.board_id, slug=card.board.slug)
 
 
 @login_required(login_url='sign_in')
+@board_permission_required()
 def delete_card(request, card_id):
     """
     Delete a card from the BusyBoard application.
@@ -745,62 +1137,60 @@ def delete_card(request, card_id):
         card = Card.objects.get(id=card_id)
 
         # Delete the card from the database
+        card_id = card.id
         card.delete()
 
+        # Remove the card for the other users viewing the board
+        card.id = card_id
+        publish_card_event('deleted', card)
+
         # Redirect the user to the 'board_details' view for the card's board
-        # by passing the board's slug as a parameter
-        return redirect('board_details', slug=card.board.slug)
+        # by passing the board's ID and slug as parameters
+        return redirect('board_details', board_id=card.board_id, slug=card.board.slug)
 
 
 @login_required(login_url='sign_in')
+@board_permission_required()
 def export_board_to_json(request, board_id):
     """
-    Exports a board and its cards to a JSON file.
+    Exports a board and its cards to a JSON or NDJSON file, optionally gzip-compressed.
+
+    The file is streamed while the cards are read in chunks, so memory usage does not grow with the board size.
 
     Args:
         request (HttpRequest): The HTTP request object.
         board_id (int): The ID of the board to be exported.
 
     Returns:
-        HttpResponse: A JSON file containing the board and its cards.
+        StreamingHttpResponse: A JSON file containing the board and its cards.
     """
 
-    # Retrieve the board object with the given board_id from the database
-    board = Board.objects.get(id=board_id)
-
-    # Retrieve all the cards associated with the board
-    cards = Card.objects.filter(board=board)
+    # Retrieve the board object with the given board_id and its owner from the database
+    board = Board.objects.select_related('owner').get(id=board_id)
 
-    # Create a dictionary to store the board and card data
-    board_data = {
-        'board': {
-            'title': board.title,
-            'description': board.description,
-            'owner': board.owner.username,
-            'slug': board.slug,
-            'color': board.color
-        },
-        'cards': []
-    }
-
-    # Iterate over each card and add its data to the board_data dictionary
-    for card in cards:
-        card_data = {
-            'title': card.title,
-            'description': card.description,
-            'status': card.get_status_display(),
-            'color': card.color
-        }
-        board_data['cards'].append(card_data)
-
-    # Convert the board_data dictionary to JSON format
-    json_data = json.dumps(board_data, indent=4)
+    # Choose the output format, newline-delimited JSON is requested with ?format=ndjson
+    if request.GET.get('format') == 'ndjson':
+        content = iter_board_ndjson(board)
+        content_type = 'application/x-ndjson'
+        filename = f'{board.slug}.ndjson'
+    else:
+        content = iter_board_json(board)
+        content_type = 'application/json'
+        filename = f'{board.slug}.json'
+
+    # Compress the output on the fly if requested with ?gzip=1, both write the cards in blocks of a few kilobytes
+    if request.GET.get('gzip'):
+        content = iter_gzip(content)
+        content_type = 'application/gzip'
+        filename += '.gz'
+    else:
+        content = iter_buffered(content)
 
-    # Create an HTTP response with the JSON data
-    response = HttpResponse(json_data, content_type='application/json')
+    # Create a streaming HTTP response that writes the cards as they are read from the database
+    response = StreamingHttpResponse(content, content_type=content_type)
 
-    # Set the Content-Disposition header to specify the filename of the JSON file
-    response['Content-Disposition'] = f'attachment; filename="{board.slug}.json"'
+    # Set the Content-Disposition header to specify the filename of the exported file
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
 
     # Return the HTTP response
     return response